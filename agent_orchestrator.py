@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+# --- Background Loop ---
+# Streamlit runs the script synchronously, so agent graphs run on one
+# process-wide event loop in a daemon thread and hand results back through
+# thread-safe futures that a later rerun can poll or wait on.
+DEFAULT_LIMITS = {"llm": 4, "tts": 4, "io": 8}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Process-wide background event loop, started on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="agent-orchestrator", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+class AgentTask:
+    """
+    One unit of agent work. ``func(inputs)`` receives a dict of its
+    dependencies' results and may be a coroutine function or a plain
+    (blocking) function, which is run in a worker thread. ``resource`` names
+    the concurrency limit it counts against.
+    """
+
+    def __init__(self, name, func, deps=(), resource="llm"):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.resource = resource
+
+
+class AgentRun:
+    """
+    A running task graph. Results are exposed per task as concurrent futures,
+    so the UI can check ``done(name)`` on a rerun or block on ``result(name)``.
+    A failed or cancelled task cancels everything that depends on it.
+    """
+
+    def __init__(self, tasks, limits=None):
+        self.tasks = {task.name: task for task in tasks}
+        for task in tasks:
+            missing = [dep for dep in task.deps if dep not in self.tasks]
+            if missing:
+                raise ValueError(f"Task {task.name!r} depends on unknown tasks {missing}")
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.futures = {name: Future() for name in self.tasks}
+        self.spans = {}
+        self.started = None
+        self.finished = None
+        self._asyncio_tasks = {}
+        self._cancelled = set()
+        self._loop = None
+
+    # --- Execution ---
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self.started = time.perf_counter()
+        semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        for name in self._topological_order():
+            self._asyncio_tasks[name] = asyncio.ensure_future(self._run_task(self.tasks[name], semaphores))
+        # cancel() may have been called before there were tasks to cancel.
+        for name in list(self._cancelled):
+            self._cancel(name)
+        await asyncio.gather(*self._asyncio_tasks.values(), return_exceptions=True)
+        for future in self.futures.values():
+            # Tasks cancelled before their first step never reach _run_task.
+            future.cancel()
+        self.finished = time.perf_counter()
+        return self
+
+    def _topological_order(self):
+        order, seen, visiting = [], set(), set()
+
+        def visit(name):
+            if name in seen:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through {name!r}")
+            visiting.add(name)
+            for dep in self.tasks[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            seen.add(name)
+            order.append(name)
+
+        for name in self.tasks:
+            visit(name)
+        return order
+
+    async def _run_task(self, task, semaphores):
+        future = self.futures[task.name]
+        try:
+            inputs = {}
+            for dep in task.deps:
+                inputs[dep] = await self._asyncio_tasks[dep]
+        except BaseException:
+            # A dependency failed or was cancelled, so this task never starts.
+            future.cancel()
+            raise
+        semaphore = semaphores.get(task.resource)
+        started = None
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+            started = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(task.func):
+                    result = await task.func(inputs)
+                else:
+                    # Cancelling only abandons a blocking call; the thread runs to completion.
+                    result = await asyncio.to_thread(task.func, inputs)
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if started is not None:
+                self.spans[task.name] = (task.resource, started, time.perf_counter())
+        future.set_result(result)
+        return result
+
+    def start(self):
+        """Run on the background loop; returns self for polling"""
+        asyncio.run_coroutine_threadsafe(self.run(), get_loop())
+        return self
+
+    def cancel(self, name=None):
+        """Cancel one task (and so its dependents) or, with no name, the whole run"""
+        names = [name] if name else list(self.tasks)
+        # Seen by run() if it has not scheduled the tasks yet.
+        self._cancelled.update(names)
+        loop = self._loop or get_loop()
+        for task_name in names:
+            loop.call_soon_threadsafe(self._cancel, task_name)
+
+    def _cancel(self, name):
+        task = self._asyncio_tasks.get(name)
+        if task is not None:
+            task.cancel()
+
+    def record(self, name, started, ended, resource="ui"):
+        """Add a span for work done outside the run (e.g. a streamed reply) so the trace shows the overlap"""
+        self.spans[name] = (resource, started, ended)
+
+    # --- Results ---
+    def done(self, name):
+        return self.futures[name].done()
+
+    def result(self, name, timeout=None):
+        return self.futures[name].result(timeout)
+
+    def ready(self, name):
+        """The task's result if it finished successfully, else None, without waiting"""
+        future = self.futures[name]
+        if future.done() and not future.cancelled() and future.exception() is None:
+            return future.result()
+        return None
+
+    def trace(self):
+        """
+        Per-task spans in ms from the start of the run, plus the wall-clock
+        time saved against running the same tasks one after another.
+        """
+        if self.started is None:
+            return {"spans": [], "wall_ms": 0.0, "sequential_ms": 0.0, "saved_ms": 0.0}
+        spans = []
+        for name, (resource, started, ended) in sorted(self.spans.items(), key=lambda item: item[1][1]):
+            future = self.futures.get(name)
+            if future is None:
+                status = "ok"
+            else:
+                status = "cancelled" if future.cancelled() else "failed" if future.done() and future.exception() else "ok"
+            spans.append({
+                "task": name,
+                "resource": resource,
+                "start_ms": round((started - self.started) * 1000, 1),
+                "end_ms": round((ended - self.started) * 1000, 1),
+                "status": status,
+            })
+        end = max([ended for _, _, ended in self.spans.values()] + [self.finished or self.started])
+        wall_ms = (end - self.started) * 1000
+        sequential_ms = sum(span["end_ms"] - span["start_ms"] for span in spans)
+        return {
+            "spans": spans,
+            "wall_ms": round(wall_ms, 1),
+            "sequential_ms": round(sequential_ms, 1),
+            "saved_ms": round(max(sequential_ms - wall_ms, 0.0), 1),
+        }
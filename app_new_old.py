@@ -1,13 +1,34 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import graphviz
 from openai import OpenAI
-import base64
-#import queue
-#from streamlit_webrtc import webrtc_streamer, WebRtcMode, AudioProcessorBase
-#from pydub import AudioSegment
-#import io
-#import av
+import time
+import hashlib
+import uuid
+try:
+    # Microphone capture is optional; without it the app is text only.
+    from streamlit_webrtc import webrtc_streamer, WebRtcMode, AudioProcessorBase
+except ImportError:
+    webrtc_streamer = None
+    AudioProcessorBase = object
+
+from agent_orchestrator import AgentRun, AgentTask
+from audio_encoding import encode_speech
+from audio_server import audio_url
+from cmdb_index import CmdbIndex
+from data_registry import freeze
+from http_client import call_limited
+from log_store import LogStore
+from log_templates import TemplateMiner
+from pcm_buffer import PCMRingBuffer
+from prompt_context import estimate_tokens, format_cmdb
+from qa_cache import context_key, get_qa_cache
+from rate_limiter import BACKGROUND, INTERACTIVE
+from tracing import NO_SPAN, bind, get_metrics_server, get_tracer, set_current, span, traced
+from tts_cache import get_tts_cache
+from tts_pipeline import TTSPipeline, speak_text
+from vad import trim_to_speech
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -27,23 +48,50 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Data Simulation (from original JS) ---
-CMDB_DF = pd.DataFrame([
-    {'id': 'app-a', 'type': 'Application', 'name': 'Web Storefront', 'associated_cis': ['lb-a', 'web-s-1', 'web-s-2', 'pg-db-a', 'data-int-svc', 'pay-api']},
-    {'id': 'app-b', 'type': 'Application', 'name': 'SAP S/4HANA', 'associated_cis': ['sap-as-1', 'hana-db']},
-    {'id': 'app-c', 'type': 'Application', 'name': 'Salesforce CRM', 'associated_cis': ['sf-int-s', 'data-int-svc']},
-    {'id': 'app-d', 'type': 'Application', 'name': 'Legacy Mainframe', 'associated_cis': ['mf-z']},
-    {'id': 'app-e', 'type': 'Application', 'name': 'Data Integration Service', 'associated_cis': ['sap-sf-if', 'sf-int-s', 'web-s-1']},
-    {'id': 'app-f', 'type': 'Application', 'name': 'Billing Microservice', 'associated_cis': ['bill-host', 'mysql-db']},
-    {'id': 'app-g', 'type': 'Application', 'name': 'Reporting Dashboard', 'associated_cis': ['report-host', 'pg-db-a']},
-    {'id': 'lb-a', 'type': 'Load Balancer', 'name': 'NGINX Load Balancer', 'associated_cis': []},
-    {'id': 'web-s-1', 'type': 'Server', 'name': 'Web Server 1', 'associated_cis': ['app-a']},
-    {'id': 'web-s-2', 'type': 'Server', 'name': 'Web Server 2', 'associated_cis': ['app-a']},
-    {'id': 'pg-db-a', 'type': 'Database', 'name': 'PostgreSQL DB A', 'associated_cis': ['web-s-1', 'web-s-2']},
-    {'id': 'hana-db', 'type': 'Database', 'name': 'SAP HANA DB', 'associated_cis': ['sap-as-1']},
-    {'id': 'sap-as-1', 'type': 'Server', 'name': 'SAP Application Server', 'associated_cis': ['app-b', 'hana-db']},
-    {'id': 'sf-int-s', 'type': 'Server', 'name': 'Salesforce Integration Server', 'associated_cis': ['app-c', 'app-e']},
-    {'id': 'sap-sf-if', 'type': 'Interface', 'name': 'SAP-Salesforce Interface', 'associated_cis': ['app-e']},
-])
+# Built once per process and shared read-only by every session; a rerun only
+# looks them up instead of rebuilding them.
+@st.cache_resource
+def get_cmdb_records():
+    return freeze([
+        {'id': 'app-a', 'type': 'Application', 'name': 'Web Storefront', 'associated_cis': ['lb-a', 'web-s-1', 'web-s-2', 'pg-db-a', 'data-int-svc', 'pay-api']},
+        {'id': 'app-b', 'type': 'Application', 'name': 'SAP S/4HANA', 'associated_cis': ['sap-as-1', 'hana-db']},
+        {'id': 'app-c', 'type': 'Application', 'name': 'Salesforce CRM', 'associated_cis': ['sf-int-s', 'data-int-svc']},
+        {'id': 'app-d', 'type': 'Application', 'name': 'Legacy Mainframe', 'associated_cis': ['mf-z']},
+        {'id': 'app-e', 'type': 'Application', 'name': 'Data Integration Service', 'associated_cis': ['sap-sf-if', 'sf-int-s', 'web-s-1']},
+        {'id': 'app-f', 'type': 'Application', 'name': 'Billing Microservice', 'associated_cis': ['bill-host', 'mysql-db']},
+        {'id': 'app-g', 'type': 'Application', 'name': 'Reporting Dashboard', 'associated_cis': ['report-host', 'pg-db-a']},
+        {'id': 'lb-a', 'type': 'Load Balancer', 'name': 'NGINX Load Balancer', 'associated_cis': []},
+        {'id': 'web-s-1', 'type': 'Server', 'name': 'Web Server 1', 'associated_cis': ['app-a']},
+        {'id': 'web-s-2', 'type': 'Server', 'name': 'Web Server 2', 'associated_cis': ['app-a']},
+        {'id': 'pg-db-a', 'type': 'Database', 'name': 'PostgreSQL DB A', 'associated_cis': ['web-s-1', 'web-s-2']},
+        {'id': 'hana-db', 'type': 'Database', 'name': 'SAP HANA DB', 'associated_cis': ['sap-as-1']},
+        {'id': 'sap-as-1', 'type': 'Server', 'name': 'SAP Application Server', 'associated_cis': ['app-b', 'hana-db']},
+        {'id': 'sf-int-s', 'type': 'Server', 'name': 'Salesforce Integration Server', 'associated_cis': ['app-c', 'app-e']},
+        {'id': 'sap-sf-if', 'type': 'Interface', 'name': 'SAP-Salesforce Interface', 'associated_cis': ['app-e']},
+    ])
+
+@st.cache_resource
+def get_cmdb_frame():
+    return pd.DataFrame(get_cmdb_records())
+
+@st.cache_resource
+def log_templates():
+    """Incident logs collapsed into per-component templates, built once per process"""
+    return TemplateMiner.from_text(SIMULATED_LOGS).summary()
+
+@st.cache_resource
+def get_log_store():
+    """Time- and component-indexed logs for Agent 5 questions, shared by all sessions"""
+    return LogStore.from_text(SIMULATED_LOGS)
+
+FUZZY_MATCH_THRESHOLD = 0.75
+IMPACT_DEPTH = 2
+QA_LOG_LINES = 40
+
+@st.cache_resource
+def get_cmdb_index():
+    """Name/id lookup and dependency index over the CMDB, shared by all sessions"""
+    return CmdbIndex(get_cmdb_records())
 
 SIMULATED_LOGS = """
 2025-09-03 22:15:01 [ERROR] [Web Storefront] - Failed to submit order, dependency timeout.
@@ -55,25 +103,25 @@ SIMULATED_LOGS = """
 
 # --- OpenAI Client & Voice Handling ---
 try:
-    client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+    # Retries go through http_client.call_limited, which shares rate limits and
+    # 429 back-off with every other session in the process.
+    client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"], max_retries=0)
 except Exception:
     st.error("OpenAI API key not found. Please add it to your Streamlit secrets.", icon="🚨")
     st.stop()
     
-# Initialize audio buffer
+# Initialize audio buffer: the last RETENTION_SECONDS of raw PCM, fixed size
 if "audio_buffer" not in st.session_state:
-    st.session_state.audio_buffer = queue.Queue()
+    st.session_state.audio_buffer = PCMRingBuffer()
 
 class AudioProcessor(AudioProcessorBase):
-    def recv(self, frame: av.AudioFrame) -> av.AudioFrame:
-        # Convert audio frame to pydub AudioSegment
-        sound = AudioSegment(
-            data=frame.to_ndarray().tobytes(),
-            sample_width=frame.format.bytes,
-            frame_rate=frame.sample_rate,
-            channels=len(frame.layout.channels),
-        )
-        st.session_state.audio_buffer.put(sound)
+    def __init__(self, audio_buffer):
+        # recv runs on the WebRTC thread, where session state is not
+        # available, so the session's buffer is handed in.
+        self.audio_buffer = audio_buffer
+
+    def recv(self, frame):
+        self.audio_buffer.write_frame(frame)
         return frame
 
 # --- Session State Initialization ---
@@ -94,130 +142,412 @@ def init_session_state():
         st.session_state.user_input = None
     if "transcribe_clicked" not in st.session_state:
         st.session_state.transcribe_clicked = False
+    if "agent_run" not in st.session_state:
+        st.session_state.agent_run = None
+    if "rca_run" not in st.session_state:
+        st.session_state.rca_run = None
+    if "rca_click_ms" not in st.session_state:
+        st.session_state.rca_click_ms = None
+    if "incident_id" not in st.session_state:
+        st.session_state.incident_id = uuid.uuid4().hex
 
 init_session_state()
 
+# --- Tracing ---
+# Each script run is a span in the incident's trace, with agent work, provider
+# calls, speech and drawing nested under it. The span ends with the run
+# (including one cut short by st.rerun()), so idle time between interactions
+# is not counted.
+def start_rerun_span():
+    st.session_state.rerun_span = get_tracer().start_span("streamlit.rerun", trace_id=st.session_state.incident_id,
+                                                          parent=NO_SPAN, stage=st.session_state.stage)
+    set_current(st.session_state.rerun_span)
+
 # --- AI & Helper Functions ---
+def complete_chat(system_prompt, user_prompt, model="gpt-4o-mini", priority=INTERACTIVE):
+    """Blocking completion that raises on failure; safe to call off the script thread"""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    completion = call_limited(client.chat.completions.create, {"model": model, "messages": messages}, priority)
+    return completion.choices[0].message.content
+
 def get_ai_response(system_prompt, user_prompt, model="gpt-4o-mini"):
     try:
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return completion.choices[0].message.content
+        return complete_chat(system_prompt, user_prompt, model)
     except Exception as e:
         st.error(f"Error calling OpenAI API: {e}", icon="🚨")
         return "Sorry, I encountered an error."
 
-def text_to_speech(text):
-    try:
-        response = client.audio.speech.create(model="tts-1", voice="alloy", input=text)
-        return response.content
-    except Exception as e:
-        st.error(f"Error in text-to-speech conversion: {e}", icon="🚨")
-        return None
+def stream_ai_response(system_prompt, user_prompt, model="gpt-4o-mini"):
+    """Yield completion text as it is generated"""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    stream = call_limited(client.chat.completions.create, {"model": model, "messages": messages, "stream": True})
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+ERROR_REPLY = "Sorry, I encountered an error."
+
+def stream_agent_message(agent_name, system_prompt, user_prompt):
+    """
+    Stream an agent reply into the chat as it arrives, speaking each sentence
+    as soon as it is synthesized, then record it
+    """
+    started = time.perf_counter()
+    timing = {}
+    speech = TTSPipeline(bind(synthesize_speech))
+
+    def timed_tokens():
+        try:
+            for token in stream_ai_response(system_prompt, user_prompt):
+                if "ttft_ms" not in timing:
+                    timing["ttft_ms"] = (time.perf_counter() - started) * 1000
+                speech.feed(token)
+                play_speech(speech, wait=False)
+                yield token
+        except Exception as e:
+            st.error(f"Error calling OpenAI API: {e}", icon="🚨")
+            yield ERROR_REPLY
+
+    with span("agent.stream", agent=agent_name) as stream_span, st.chat_message(agent_name):
+        response = st.write_stream(timed_tokens())
+        stream_span.set(ttft_ms=round(timing.get("ttft_ms", 0.0), 1), completion_tokens=estimate_tokens(response))
+        speech.close()
+        play_speech(speech)
+        if "ttft_ms" in timing:
+            caption = f"First token in {timing['ttft_ms']:.0f} ms"
+            if speech.first_audio_ms is not None:
+                caption += f" · first audio in {speech.first_audio_ms:.0f} ms"
+            st.caption(caption)
+    add_message(agent_name, response, play_audio=False, ttft_ms=timing.get("ttft_ms"))
+    return response
 
-def speech_to_text(audio_bytes):
+TTS_MODEL = "tts-1"
+TTS_VOICE = "alloy"
+
+def synthesize_speech(text):
+    """
+    TTS for one chunk, served from the content-addressed cache when this text
+    was spoken before. Runs on the TTS worker pool, so errors are raised to the caller
+    """
+    # Queued behind chat completions when the provider's limits are tight.
+    with span("tts.synthesize", characters=len(text)) as tts_span:
+        audio = get_tts_cache().get_or_synthesize(text, TTS_VOICE, TTS_MODEL, lambda chunk: call_limited(
+            client.audio.speech.create, {"model": TTS_MODEL, "voice": TTS_VOICE, "input": chunk}, BACKGROUND).content)
+        tts_span.set(audio_bytes=len(audio))
+        return audio
+
+# Chunks are queued on the parent page and played back to back, so each one can
+# be sent as soon as it is ready without cutting off the one still playing.
+AUDIO_QUEUE_JS = """
+<script>
+(function () {
+    const page = window.parent;
+    if (!page.ttsQueue) {
+        page.ttsQueue = [];
+        page.ttsPlaying = false;
+        page.ttsPlayNext = function () {
+            const src = page.ttsQueue.shift();
+            page.ttsPlaying = Boolean(src);
+            if (!src) return;
+            const audio = new page.Audio(src);
+            audio.onended = page.ttsPlayNext;
+            audio.onerror = page.ttsPlayNext;
+            audio.play().catch(page.ttsPlayNext);
+        };
+    }
+    page.ttsQueue.push("AUDIO_URL");
+    if (!page.ttsPlaying) page.ttsPlayNext();
+})();
+</script>
+"""
+
+def play_audio_chunk(audio):
+    # With AUDIO_BASE_URL set only a short URL goes into the page and the browser
+    # fetches (and caches) the MP3 itself; otherwise the clip is inlined.
+    with span("audio.publish", audio_bytes=len(audio)):
+        components.html(AUDIO_QUEUE_JS.replace("AUDIO_URL", audio_url(audio)), height=0)
+
+def play_speech(speech, wait=True):
+    """Queue synthesized chunks for playback in order; without wait, only those already done"""
+    for _, audio in (speech.audio() if wait else speech.ready()):
+        play_audio_chunk(audio)
+    if wait and speech.errors:
+        st.error(f"Error in text-to-speech conversion: {speech.errors[0]}", icon="🚨")
+
+@traced()
+def speech_to_text(audio_file):
+    """Transcribe an encoded (file name, bytes, content type) upload as produced by encode_speech"""
     try:
-        with io.BytesIO() as buffer:
-            # Write audio bytes to buffer
-            buffer.write(audio_bytes)
-            buffer.seek(0)
-            # Create a temporary file in memory
-            audio_file = io.BytesIO(buffer.read())
-            audio_file.name = "audio.wav"
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file
-            )
+        transcript = call_limited(client.audio.transcriptions.create, {"model": "whisper-1", "file": audio_file})
         return transcript.text
     except Exception as e:
         st.error(f"Error in speech-to-text conversion: {e}", icon="🚨")
         return ""
 
-def add_message(agent_name, text, play_audio=True):
-    st.session_state.messages.append({"role": agent_name, "content": text})
+def add_message(agent_name, text, play_audio=True, ttft_ms=None):
+    st.session_state.messages.append({"role": agent_name, "content": text, "ttft_ms": ttft_ms})
     if play_audio:
-        audio_data = text_to_speech(text)
-        if audio_data:
-            audio_b64 = base64.b64encode(audio_data).decode()
-            audio_html = f'<audio autoplay><source src="data:audio/mp3;base64,{audio_b64}" type="audio/mp3"></audio>'
-            st.markdown(audio_html, unsafe_allow_html=True)
+        play_speech(speak_text(text, bind(synthesize_speech)))
 
 # --- Agent Logic ---
+@traced()
 def agent_1_triage():
     system_prompt = "You are Agent 1, the incident triage manager. Welcome the user to the Major Incident bridge and ask them to specify which application is having issues by name from the CMDB list."
     user_prompt = "The user has just joined the call. Please provide a welcome message."
-    with st.spinner("Agent 1 is preparing the bridge..."):
-        response = get_ai_response(system_prompt, user_prompt)
-        add_message("Agent 1", response)
+    stream_agent_message("Agent 1", system_prompt, user_prompt)
     st.session_state.first_run = False
 
+@traced()
 def agent_2_cmdb_lookup(app_name):
-    app_ci = CMDB_DF[CMDB_DF['name'].str.lower() == app_name.lower()]
-    if app_ci.empty:
-        add_message("Agent 1", f"I'm sorry, I couldn't find '{app_name}' in our CMDB. Please select a valid application from the list on the right.")
-        return
-    st.session_state.selected_app = app_ci.iloc[0]
+    app_ci = get_cmdb_index().find(app_name)
+    if app_ci is None or app_ci.get('type') != 'Application':
+        # Voice transcripts rarely match exactly ("sap s4 hana"), so take a
+        # confident fuzzy match and offer the runners-up otherwise. Only
+        # applications can be selected, not the databases and servers under them.
+        suggestions = [(score, ci) for score, ci in get_cmdb_index().suggest(app_name, k=5)
+                       if ci.get('type') == 'Application'][:3]
+        if suggestions and suggestions[0][0] >= FUZZY_MATCH_THRESHOLD:
+            app_ci = suggestions[0][1]
+            app_name = app_ci['name']
+        elif suggestions:
+            names = ", ".join(f"'{ci['name']}'" for _, ci in suggestions)
+            add_message("Agent 1", f"I'm sorry, I couldn't find '{app_name}' in our CMDB. Did you mean {names}? Please select a valid application from the list on the right.")
+            return
+        else:
+            add_message("Agent 1", f"I'm sorry, I couldn't find '{app_name}' in our CMDB. Please select a valid application from the list on the right.")
+            return
+    st.session_state.selected_app = app_ci
     st.session_state.stage = "bridge_joined"
-    system_prompt = "You are Agent 2, a CMDB analyst. Confirm you've identified the application and its dependencies. Hand over to Agent 3 for log extraction. Inform the user they can now join the bridge call."
+    start_incident_prefetch(app_ci)
+    system_prompt = "You are Agent 2, a CMDB analyst. Confirm you've identified the application and its dependencies. Name any other impacted services you are given. Hand over to Agent 3 for log extraction. Inform the user they can now join the bridge call."
     user_prompt = f"The user has identified the application as '{app_name}'. Confirm this and explain the next step."
-    with st.spinner("Agent 2 is analyzing CMDB..."):
-        response = get_ai_response(system_prompt, user_prompt)
-        add_message("Agent 2", response)
+    impacted = get_cmdb_index().impacted_applications(app_ci['id'], depth=IMPACT_DEPTH)
+    if impacted:
+        user_prompt += f" Other services impacted through shared CIs: {', '.join(ci['name'] for ci in impacted)}."
+    started = time.perf_counter()
+    stream_agent_message("Agent 2", system_prompt, user_prompt)
+    st.session_state.agent_run.record("agent_2_confirmation", started, time.perf_counter())
+
+AGENT_3_PROMPT = "You are Agent 3, a log analysis specialist. You've received the following logs. Briefly summarize the key errors and state you are passing this summary to Agent 4 for root cause analysis."
+AGENT_4_PROMPT = "You are Agent 4, a Root Cause Analysis specialist. Based on the log summary, generate a final incident report. The root cause is an expired SSL certificate on the 'SAP-Salesforce Interface'. Your report must have three sections: 'Root Cause Analysis', 'Recommended Fix', and 'Preventative Measures'."
+PREFETCH_WAIT_SECONDS = 60
+
+def rca_prompt(log_summary, templates):
+    return f"Log summary: {log_summary}\n\nLog templates:\n{templates}"
+
+def rca_key(user_prompt):
+    """Identifies the exact RCA inputs, so a report computed from stale ones is never shown"""
+    return hashlib.sha256(f"{AGENT_4_PROMPT}\0{user_prompt}".encode()).hexdigest()
+
+def rca_task(templates):
+    """Agent 4 as a background task: the report plus the key of the inputs it was built from"""
+    def generate(inputs):
+        user_prompt = rca_prompt(inputs["log_summary"], templates)
+        return {"key": rca_key(user_prompt), "report": complete_chat(AGENT_4_PROMPT, user_prompt, priority=BACKGROUND)}
+    return generate
+
+def start_incident_prefetch(app_ci):
+    """
+    Speculatively pull and digest the logs of the application's blast radius
+    and have Agent 3 summarize them, then Agent 4 write the RCA from that
+    summary, in the background while Agent 2 is still confirming the
+    application. A previous run is cancelled.
+    """
+    if st.session_state.agent_run is not None:
+        st.session_state.agent_run.cancel()
+    store = get_log_store()
+    names = [app_ci['name']] + [ci['name'] for ci, _, _ in get_cmdb_index().blast_radius(app_ci['id'], IMPACT_DEPTH)]
+    component_names = [name for name in names if name in store.by_component] or None
 
+    def fetch_logs(inputs):
+        _, records = store.query(components=component_names)
+        return store.format(records)
+
+    def digest_logs(inputs):
+        return TemplateMiner.from_text(inputs["logs"]).summary()
+
+    def summarize_logs(inputs):
+        return complete_chat(AGENT_3_PROMPT, f"Here are the logs, collapsed into message templates:\n{inputs['templates']}",
+                             priority=BACKGROUND)
+
+    # Bound to the current span so the background work shows in this incident's trace.
+    st.session_state.agent_run = AgentRun([
+        AgentTask("logs", bind(traced("prefetch.logs")(fetch_logs)), resource="io"),
+        AgentTask("templates", bind(traced("prefetch.templates")(digest_logs)), deps=["logs"], resource="io"),
+        AgentTask("log_summary", bind(traced("prefetch.log_summary")(summarize_logs)), deps=["templates"]),
+        AgentTask("rca", bind(traced("prefetch.rca")(rca_task(log_templates()))), deps=["log_summary"]),
+    ]).start()
+    st.session_state.rca_run = st.session_state.agent_run
+
+def start_rca_prefetch(log_summary):
+    """
+    Recompute the RCA in the background for a summary the prefetch did not
+    produce; the in-flight RCA for the old inputs is cancelled.
+    """
+    if st.session_state.rca_run is not None:
+        st.session_state.rca_run.cancel("rca")
+    generate = rca_task(log_templates())
+    st.session_state.rca_run = AgentRun([
+        AgentTask("rca", bind(traced("prefetch.rca")(lambda inputs: generate({"log_summary": log_summary})))),
+    ]).start()
+
+def prefetched(name, run=None):
+    """A background result, waiting for it if still running; None if it failed or was never started"""
+    run = run or st.session_state.agent_run
+    if run is None or name not in run.futures:
+        return None
+    try:
+        return run.result(name, timeout=PREFETCH_WAIT_SECONDS)
+    except Exception:
+        return None
+
+@traced()
 def agent_3_log_analysis():
     st.session_state.stage = "rca_generation"
-    system_prompt = "You are Agent 3, a log analysis specialist. You've received the following logs. Briefly summarize the key errors and state you are passing this summary to Agent 4 for root cause analysis."
-    user_prompt = f"Here are the logs:\n{SIMULATED_LOGS}"
-    with st.spinner("Agent 3 is analyzing logs..."):
-        response = get_ai_response(system_prompt, user_prompt)
-        st.session_state.log_summary = response
-        add_message("Agent 3", response)
+    with st.spinner("Agent 3 is analysing the logs..."):
+        summary = prefetched("log_summary")
+    if summary:
+        with st.chat_message("Agent 3"):
+            st.markdown(summary)
+        add_message("Agent 3", summary)
+        st.session_state.log_summary = summary
+        return
+    user_prompt = f"Here are the logs, collapsed into message templates:\n{log_templates()}"
+    st.session_state.log_summary = stream_agent_message("Agent 3", AGENT_3_PROMPT, user_prompt)
+    start_rca_prefetch(st.session_state.log_summary)
 
+@traced()
 def agent_4_rca_and_fix():
     st.session_state.stage = "incident_resolved"
-    system_prompt = "You are Agent 4, a Root Cause Analysis specialist. Based on the log summary, generate a final incident report. The root cause is an expired SSL certificate on the 'SAP-Salesforce Interface'. Your report must have three sections: 'Root Cause Analysis', 'Recommended Fix', and 'Preventative Measures'."
-    user_prompt = f"Log summary: {st.session_state.log_summary}"
+    clicked = time.perf_counter()
+    user_prompt = rca_prompt(st.session_state.log_summary, log_templates())
     with st.spinner("Agent 4 is performing RCA..."):
-        response = get_ai_response(system_prompt, user_prompt)
+        # Usually precomputed while the user was still reading Agent 3's summary.
+        prefetch = prefetched("rca", st.session_state.rca_run)
+        if prefetch is not None and prefetch["key"] == rca_key(user_prompt):
+            response = prefetch["report"]
+        else:
+            response = get_ai_response(AGENT_4_PROMPT, user_prompt)
         st.session_state.rca_report = response
+        st.session_state.rca_click_ms = (time.perf_counter() - clicked) * 1000
         add_message("Agent 4", "I have completed the analysis and generated the final report. This incident bridge can now be closed.")
 
-def agent_5_qa(query):
-    context = f"""
-    CMDB Data: {CMDB_DF.to_string()}
-    Simulated Logs: {SIMULATED_LOGS if st.session_state.log_summary else "Not available yet."}
-    Log Summary: {st.session_state.log_summary if st.session_state.log_summary else "Not available yet."}
-    RCA Report: {st.session_state.rca_report if st.session_state.rca_report else "Not available yet."}
+@st.cache_data
+def qa_static_context():
+    """CMDB for Agent 5 in compact form, built once per process"""
+    return f"CMDB Data:\n{format_cmdb(get_cmdb_index().records)}"
+
+def qa_log_context(query):
     """
+    Only the log lines the question is about: the components it names (or
+    the selected application's blast radius), narrowed to any time window
+    and error/warning wording it mentions.
+    """
+    store = get_log_store()
+    default_components = None
+    if st.session_state.selected_app is not None:
+        app_id = st.session_state.selected_app['id']
+        names = [st.session_state.selected_app['name']]
+        names += [ci['name'] for ci, _, _ in get_cmdb_index().blast_radius(app_id, IMPACT_DEPTH)]
+        default_components = [name for name in names if name in store.by_component] or None
+    filters = store.filters_for_question(query, default_components)
+    total, records = store.query(limit=QA_LOG_LINES, **filters)
+    if not records:
+        return "No log lines match the question."
+    lines = store.format(records)
+    if total > len(records):
+        lines += f"\n... {total - len(records)} more matching lines omitted"
+    return lines
+
+@traced()
+def agent_5_qa(query):
+    # Static context leads the system prompt so repeated questions share a cacheable prefix.
     system_prompt = "You are Agent 5, a helpful Q&A assistant. Answer the user's question based ONLY on the provided context. If the information is not in the context, say that you cannot answer that question at this time."
-    with st.spinner("Agent 5 is checking the records..."):
-        response = get_ai_response(system_prompt, f"Context:\n{context}\n\nUser Question: {query}")
-        add_message("Agent 5", response)
+    system_prompt += f"\n\nContext:\n{qa_static_context()}"
+    logs = qa_log_context(query) if st.session_state.log_summary else "Not available yet."
+    context = f"""Relevant Logs:
+{logs}
+Log Summary: {st.session_state.log_summary if st.session_state.log_summary else "Not available yet."}
+RCA Report: {st.session_state.rca_report if st.session_state.rca_report else "Not available yet."}"""
+    # Everyone asking about the same logs, summary and report shares answers, across sessions.
+    cache = get_qa_cache()
+    key = context_key(system_prompt, context)
+    answer = cache.get(key, query)
+    if answer is not None:
+        add_message("Agent 5", answer)
+        return
+    answer = stream_agent_message("Agent 5", system_prompt, f"{context}\n\nUser Question: {query}")
+    if not answer.endswith(ERROR_REPLY):
+        cache.put(key, query, answer)
 
 # --- UI Drawing Functions ---
+@traced()
 def draw_knowledge_graph():
     if st.session_state.selected_app is not None:
-        st.subheader("Knowledge Graph: Associated CIs")
+        st.subheader("Knowledge Graph: Impacted CIs")
         app_info = st.session_state.selected_app
+        depth = st.slider("Impact depth (hops)", 1, 5, IMPACT_DEPTH, key="impact_depth")
         dot = graphviz.Digraph()
         dot.node(app_info['id'], app_info['name'], shape='ellipse', style='filled', fillcolor='skyblue')
-        associated_ids = app_info['associated_cis']
-        associated_cis = CMDB_DF[CMDB_DF['id'].isin(associated_ids)]
-        for _, ci in associated_cis.iterrows():
-            dot.node(ci['id'], ci['name'], shape='box', style='filled', fillcolor='lightgray')
-            dot.edge(app_info['id'], ci['id'])
+        for ci, hops, via in get_cmdb_index().blast_radius(app_info['id'], depth):
+            if ci['type'] == 'Application':
+                dot.node(ci['id'], ci['name'], shape='ellipse', style='filled', fillcolor='khaki')
+            else:
+                dot.node(ci['id'], ci['name'], shape='box', style='filled', fillcolor='lightgray' if hops == 1 else 'whitesmoke')
+            dot.edge(via, ci['id'])
         st.graphviz_chart(dot)
 
+def draw_agent_timeline(run):
+    trace = run.trace()
+    if not trace["spans"]:
+        return
+    with st.expander("Agent timeline"):
+        st.dataframe(pd.DataFrame(trace["spans"]), use_container_width=True, hide_index=True)
+        st.caption(f"{trace['sequential_ms']:.0f} ms of agent work in {trace['wall_ms']:.0f} ms wall-clock "
+                   f"({trace['saved_ms']:.0f} ms saved by running in parallel)")
+
+def draw_trace_waterfall():
+    """Where this incident's time went: one bar per span, indented under the span that started it"""
+    metrics_server = get_metrics_server()
+    if metrics_server is not None:
+        st.caption(f"Prometheus metrics at http://localhost:{metrics_server.server_address[1]}/metrics; "
+                   "set TRACE_JSONL to also append every span to a file.")
+    rows = get_tracer().waterfall(st.session_state.incident_id, limit=100)
+    if not rows:
+        st.caption("No spans recorded yet.")
+        return
+    frame = pd.DataFrame([{
+        "span": f"{i:03d} {'· ' * row['depth']}{row['name']}",
+        "start_ms": row["start_ms"],
+        "end_ms": row["start_ms"] + row["duration_ms"],
+        "duration_ms": row["duration_ms"],
+        "status": row["error"] or "ok",
+        "details": ", ".join(f"{key}={value}" for key, value in row["attrs"].items()),
+    } for i, row in enumerate(rows)])
+    st.vega_lite_chart(frame, {
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "span", "type": "nominal", "sort": None, "title": None},
+            "x": {"field": "start_ms", "type": "quantitative", "title": "ms since the first span"},
+            "x2": {"field": "end_ms"},
+            "color": {"field": "status", "type": "nominal", "legend": None},
+            "tooltip": [{"field": "span"}, {"field": "duration_ms"}, {"field": "details"}],
+        },
+        "height": {"step": 14},
+    }, use_container_width=True)
+
 def draw_data_panel():
     with st.container(border=True):
         if st.session_state.stage == "app_selection":
             st.subheader("CMDB: Applications")
-            st.dataframe(CMDB_DF[CMDB_DF['type'] == 'Application'][['id', 'name']], use_container_width=True)
+            cmdb_frame = get_cmdb_frame()
+            st.dataframe(cmdb_frame[cmdb_frame['type'] == 'Application'][['id', 'name']], use_container_width=True)
         if st.session_state.selected_app is not None:
             draw_knowledge_graph()
         if st.session_state.log_summary:
@@ -227,6 +557,10 @@ def draw_data_panel():
         if st.session_state.rca_report:
             st.subheader("Final Incident Report by Agent 4")
             st.markdown(st.session_state.rca_report)
+            if st.session_state.rca_click_ms is not None:
+                st.caption(f"Report ready {st.session_state.rca_click_ms:.0f} ms after the click")
+        if st.session_state.agent_run is not None:
+            draw_agent_timeline(st.session_state.agent_run)
 
 # --- Main App & Input Handling ---
 def process_user_input(prompt):
@@ -238,71 +572,93 @@ def process_user_input(prompt):
     else:
         agent_5_qa(prompt)
 
-st.title("🗣️ AI Major Incident Manager")
-col1, col2 = st.columns([2, 1])
-
-with col1:
-    with st.container(height=600):
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-with col2:
-    draw_data_panel()
-    if st.session_state.stage == "bridge_joined":
-        if st.button("▶️ Run Log Analysis", type="primary"):
-            agent_3_log_analysis()
-    if st.session_state.stage == "rca_generation":
-        if st.button("🔎 Generate RCA & Fix", type="primary"):
-            agent_4_rca_and_fix()
-    if st.session_state.stage == "incident_resolved":
-        st.success("Incident Resolved.")
-
-# Initial welcome message
-if st.session_state.first_run:
-    agent_1_triage()
-
-# --- Voice and Text Input Section ---
-if st.session_state.stage != "incident_resolved":
-    st.write("---")
-    text_prompt = st.chat_input("Type your response here...")
-    if text_prompt:
-        process_user_input(text_prompt)
-        st.rerun()
-        
-     if st.button("Transcribe Last Spoken Words"):
-        st.session_state.transcribe_clicked = True
+start_rerun_span()
+try:
+    st.title("🗣️ AI Major Incident Manager")
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        with st.container(height=600):
+            for message in st.session_state.messages:
+                with st.chat_message(message["role"]):
+                    st.markdown(message["content"])
+                    if message.get("ttft_ms"):
+                        st.caption(f"First token in {message['ttft_ms']:.0f} ms")
+
+    with col2:
+        draw_data_panel()
+        if st.session_state.stage == "bridge_joined":
+            if st.button("▶️ Run Log Analysis", type="primary"):
+                agent_3_log_analysis()
+        if st.session_state.stage == "rca_generation":
+            if st.button("🔎 Generate RCA & Fix", type="primary"):
+                agent_4_rca_and_fix()
+        if st.session_state.stage == "incident_resolved":
+            st.success("Incident Resolved.")
+        with st.expander("Speech cache"):
+            st.json(get_tts_cache().stats())
+        with st.expander("Q&A cache"):
+            st.json(get_qa_cache().stats())
+
+    with st.sidebar:
+        st.subheader("Incident trace")
+        draw_trace_waterfall()
+
+    # Initial welcome message
+    if st.session_state.first_run:
+        agent_1_triage()
+
+    # --- Voice and Text Input Section ---
+    if st.session_state.stage != "incident_resolved":
+        st.write("---")
+        text_prompt = st.chat_input("Type your response here...")
+        if text_prompt:
+            process_user_input(text_prompt)
+            st.rerun()
         
-    if st.session_state.transcribe_clicked:
-        if not st.session_state.audio_buffer.empty():
-            combined_audio = AudioSegment.empty()
-            while not st.session_state.audio_buffer.empty():
-                try:
-                    combined_audio += st.session_state.audio_buffer.get_nowait()
-                except queue.Empty:
-                    break
-            
-            if len(combined_audio) > 0:
-                buffer = io.BytesIO()
-                combined_audio.export(buffer, format="wav")
-                buffer.seek(0)
+        if webrtc_streamer is not None:
+            audio_buffer = st.session_state.audio_buffer
+            webrtc_streamer(
+                key="bridge-audio",
+                mode=WebRtcMode.SENDONLY,
+                audio_processor_factory=lambda: AudioProcessor(audio_buffer),
+                media_stream_constraints={"video": False, "audio": True},
+            )
+        else:
+            st.caption("Install streamlit-webrtc to speak instead of typing.")
+
+        if webrtc_streamer is not None and st.button("Transcribe Last Spoken Words"):
+            st.session_state.transcribe_clicked = True
+
+        if st.session_state.transcribe_clicked:
+            audio_buffer = st.session_state.audio_buffer
+            # Only the utterances go to Whisper, as 16 kHz mono FLAC; silence between them is cut.
+            speech = trim_to_speech(audio_buffer.drain(), audio_buffer.sample_rate, audio_buffer.channels)
+            if len(speech):
                 with st.spinner("Transcribing your voice..."):
-                    st.session_state.user_input = speech_to_text(buffer.getvalue())
+                    st.session_state.user_input = speech_to_text(encode_speech(speech, audio_buffer.sample_rate))
                     st.session_state.transcribe_clicked = False
-        else:
-            st.warning("Audio buffer is empty. Speak into the microphone first.")
-            st.session_state.transcribe_clicked = False
+            else:
+                st.warning("No speech in the audio buffer. Speak into the microphone first.")
+                st.session_state.transcribe_clicked = False
+            stats = audio_buffer.stats()
+            if stats["overflow_samples"] or stats["dropped_frames"]:
+                st.caption(f"Audio older than {audio_buffer.retention_seconds}s was dropped "
+                           f"({stats['overflow_samples'] / (audio_buffer.sample_rate * audio_buffer.channels):.1f}s overwritten, "
+                           f"{stats['dropped_frames']} frames rejected)")
 
-    # Process text from either voice transcription or text input
-    text_prompt = st.chat_input("Or type your response here...")
+        # Process text from either voice transcription or text input
+        text_prompt = st.chat_input("Or type your response here...")
     
-    final_prompt = None
-    if text_prompt:
-        final_prompt = text_prompt
-    elif st.session_state.get('user_input'):
-        final_prompt = st.session_state.user_input
-        st.session_state.user_input = None  # Clear after processing
-
-    if final_prompt:
-        process_user_input(final_prompt)
-        st.rerun()
+        final_prompt = None
+        if text_prompt:
+            final_prompt = text_prompt
+        elif st.session_state.get('user_input'):
+            final_prompt = st.session_state.user_input
+            st.session_state.user_input = None  # Clear after processing
+
+        if final_prompt:
+            process_user_input(final_prompt)
+            st.rerun()
+finally:
+    st.session_state.rerun_span.finish()
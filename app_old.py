@@ -12,6 +12,15 @@ import base64
 import tempfile
 import queue
 import json
+import io
+import numpy as np
+
+from conversation_history import ConversationHistory, llm_summarizer
+from http_client import call_limited
+from log_pipeline import iter_text_lines
+from log_templates import TemplateMiner
+from rate_limiter import BACKGROUND
+from vad import UtteranceDetector
 
 # Load environment variables
 load_dotenv()
@@ -111,6 +120,8 @@ class IncidentManagerAI:
     def __init__(self, openai_api_key):
         # Initialize OpenAI API
         openai.api_key = openai_api_key
+        # Retries go through call_limited, which shares rate limits and 429 back-off process-wide.
+        openai.max_retries = 0
         self.model = "gpt-4o-mini"
         
         # Initialize speech recognition
@@ -128,8 +139,8 @@ class IncidentManagerAI:
         # Conversation state
         self.conversation_active = False
         self.logs_provided = False
-        self.logs = ""
-        self.conversation_history = []
+        self.log_templates = None
+        self.conversation_history = ConversationHistory(llm_summarizer(self.complete))
         
         # System prompt for the AI agent
         self.system_prompt = """You are an expert "Analyzer Agent" for IT incidents. Your name is IncidentBot. 
@@ -163,8 +174,8 @@ Speak clearly and concisely. Remember you're in a voice conversation."""
         """
         st.components.v1.html(js_code, height=0)
         
-    def listen(self, timeout=10, phrase_time_limit=5):
-        """Listen for speech and convert to text"""
+    def listen(self, timeout=10, phrase_time_limit=30):
+        """Listen for one utterance and convert it to text; the utterance ends at the speaker's pause"""
         if not self.microphone:
             st.session_state.status = "Microphone not available"
             return ""
@@ -172,7 +183,7 @@ Speak clearly and concisely. Remember you're in a voice conversation."""
         try:
             with self.microphone as source:
                 st.session_state.status = "Listening..."
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                audio = self.capture_utterance(source, timeout, phrase_time_limit)
                 text = self.recognizer.recognize_google(audio)
                 st.session_state.status = f"Heard: {text}"
                 return text.lower()
@@ -188,29 +199,71 @@ Speak clearly and concisely. Remember you're in a voice conversation."""
         except Exception as e:
             st.session_state.status = f"Error: {e}"
             return ""
+
+    def capture_utterance(self, source, timeout, phrase_time_limit):
+        """
+        Read the microphone until the voice activity detector closes an
+        utterance. timeout bounds the wait for speech to start and
+        phrase_time_limit is only a safety cap on its length.
+        """
+        detector = UtteranceDetector(source.SAMPLE_RATE)
+        chunk_seconds = source.CHUNK / source.SAMPLE_RATE
+        waited = spoken = 0.0
+        while True:
+            chunk = np.frombuffer(source.stream.read(source.CHUNK), dtype=np.int16)
+            utterances = detector.feed(chunk)
+            if utterances:
+                utterance = utterances[0]
+                break
+            if detector.speaking:
+                spoken += chunk_seconds
+                if spoken >= phrase_time_limit:
+                    utterance = detector.flush()
+                    break
+            else:
+                waited += chunk_seconds
+                if waited >= timeout:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+        return sr.AudioData(utterance.tobytes(), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
     
+    def log_context(self):
+        """The submitted logs as mined templates, never the raw paste"""
+        if not self.log_templates:
+            return []
+        return [{"role": "system", "content": f"Log templates from the logs provided by the SME:\n{self.log_templates}"}]
+
+    def complete(self, messages, max_tokens):
+        """One-off completion, used to fold old turns into the history summary"""
+        response = call_limited(openai.chat.completions.create, {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.2,
+            "max_tokens": max_tokens
+        }, BACKGROUND)
+        return response.choices[0].message.content
+
     def get_ai_response(self, user_input):
         """Get response from OpenAI GPT model"""
-        # Prepare messages with conversation history
+        # Pinned facts, rolling summary and recent turns, within a fixed token budget
         messages = [
             {"role": "system", "content": self.system_prompt},
-            *self.conversation_history,
+            *self.log_context(),
+            *self.conversation_history.messages(),
             {"role": "user", "content": user_input}
         ]
         
         try:
             # Use the updated OpenAI API
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
-            )
+            response = call_limited(openai.chat.completions.create, {
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": 1000
+            })
             
             ai_response = response.choices[0].message.content
             # Update conversation history
-            self.conversation_history.append({"role": "user", "content": user_input})
-            self.conversation_history.append({"role": "assistant", "content": ai_response})
+            self.conversation_history.add(user_input, ai_response)
             
             return ai_response
         except Exception as e:
@@ -219,7 +272,7 @@ Speak clearly and concisely. Remember you're in a voice conversation."""
     def start_conversation(self):
         """Start the incident management conversation"""
         self.conversation_active = True
-        self.conversation_history = []
+        self.conversation_history.clear()
         
         # Initial greeting
         greeting = """Welcome to the Major Incident bridge. I am your AI Incident Manager, IncidentBot. 
@@ -243,6 +296,9 @@ Please describe the issue or provide any application, web, or database logs you
             st.session_state.conversation_active = False
             return
             
+        if "Reported issue" not in self.conversation_history.pinned:
+            self.conversation_history.pin("Reported issue", user_input)
+
         # Check if user is providing logs
         if not self.logs_provided and ("log" in user_input or "error" in user_input or "issue" in user_input):
             self.logs_provided = True
@@ -259,6 +315,8 @@ Please describe the issue or provide any application, web, or database logs you
         # Check if analysis is complete
         if "root cause" in ai_response.lower() and ("fix" in ai_response.lower() or "solution" in ai_response.lower()):
             st.session_state.analysis_complete = True
+            rca_text = extract_section(ai_response, "Root Cause Analysis", "Proposed Fixes")
+            self.conversation_history.pin("Root cause", rca_text if rca_text != "Not available" else ai_response)
 
     def extract_main_points(self, analysis_text):
         """Extract the main points from analysis for speech"""
@@ -347,10 +405,17 @@ def main():
             st.subheader("Provide Incident Details")
             logs = st.text_area("Paste application, web, or database logs here:", height=200, 
                                placeholder="Paste logs here...")
+            log_file = st.file_uploader("Or upload a log file", type=["log", "txt"])
             
             if st.button("Submit Logs", use_container_width=True):
-                if logs:
-                    st.session_state.incident_ai.logs = logs
+                if logs or log_file:
+                    # Mine line by line into templates; the raw lines are not kept
+                    miner = TemplateMiner()
+                    if logs:
+                        miner.update(iter_text_lines(logs))
+                    if log_file:
+                        miner.update(io.TextIOWrapper(log_file, encoding="utf-8", errors="replace"))
+                    st.session_state.incident_ai.log_templates = miner.summary()
                     st.session_state.logs_provided = True
                     st.session_state.incident_ai.logs_provided = True
                     st.session_state.conversation.append({"role": "User", "message": "I've provided the logs for analysis."})
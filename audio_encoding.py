@@ -0,0 +1,121 @@
+import io
+import wave
+
+import numpy as np
+
+try:
+    import soundfile
+except Exception:
+    soundfile = None
+
+# --- Upload Format ---
+# Whisper works at 16 kHz mono, so capture audio is downmixed and resampled
+# before upload. FLAC is lossless and encodes at hundreds of times real time;
+# Opus is ~4x smaller again but encodes at only ~40x real time, so it only
+# pays off on slow uplinks. Plain 16-bit WAV is the fallback when libsndfile
+# (soundfile) is not installed.
+TARGET_RATE = 16000
+# (soundfile format, subtype, file name, content type)
+FLAC = ("FLAC", "PCM_16", "speech.flac", "audio/flac")
+OPUS = ("OGG", "OPUS", "speech.ogg", "audio/ogg")
+FORMATS = [FLAC]
+FILTER_TAPS = 63
+
+
+def lowpass_taps(cutoff, taps=FILTER_TAPS):
+    """Windowed-sinc low-pass FIR; cutoff as a fraction of the input sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+class Resampler:
+    """
+    Block-wise mono resampler to TARGET_RATE. Integer ratios (48 kHz, 32 kHz)
+    go through an anti-alias FIR and decimation, carrying filter state across
+    blocks; other rates fall back to linear interpolation.
+    """
+
+    def __init__(self, sample_rate, target_rate=TARGET_RATE):
+        self.sample_rate = sample_rate
+        self.target_rate = target_rate
+        self.factor = sample_rate // target_rate if sample_rate % target_rate == 0 else None
+        self.taps = lowpass_taps(0.45 / self.factor) if self.factor and self.factor > 1 else None
+        self.history = np.zeros(len(self.taps) - 1 if self.taps is not None else 0, dtype=np.float32)
+        self.phase = 0
+        self.position = 0.0
+
+    def process(self, mono):
+        if self.factor == 1:
+            return mono
+        if self.factor:
+            padded = np.concatenate((self.history, mono))
+            filtered = np.convolve(padded, self.taps, mode="valid")
+            self.history = padded[len(padded) - len(self.history):]
+            out = filtered[self.phase::self.factor]
+            self.phase = (self.phase - len(filtered)) % self.factor
+            return out
+        step = self.sample_rate / self.target_rate
+        positions = np.arange(self.position, len(mono), step)
+        self.position = positions[-1] + step - len(mono) if len(positions) else self.position - len(mono)
+        return np.interp(positions, np.arange(len(mono)), mono)
+
+
+class SpeechEncoder:
+    """
+    Streaming 16 kHz mono encoder for upload: write() int16 blocks as they are
+    captured (interleaved, any rate and channel count); close() returns
+    (file name, bytes, content type). Each block is downmixed, resampled and
+    handed to the codec straight away, so the full-rate audio is never held.
+    """
+
+    def __init__(self, sample_rate, channels=1, formats=None):
+        self.channels = channels
+        self.resampler = Resampler(sample_rate)
+        self.out = io.BytesIO()
+        self.samples = 0
+        self.file = None
+        self.wav = None
+        for sf_format, subtype, name, content_type in (FORMATS if formats is None else formats):
+            if soundfile is None or not soundfile.check_format(sf_format, subtype):
+                continue
+            self.file = soundfile.SoundFile(self.out, "w", samplerate=TARGET_RATE, channels=1,
+                                            format=sf_format, subtype=subtype)
+            self.name, self.content_type = name, content_type
+            break
+        if self.file is None:
+            self.wav = wave.open(self.out, "wb")
+            self.wav.setnchannels(1)
+            self.wav.setsampwidth(2)
+            self.wav.setframerate(TARGET_RATE)
+            self.name, self.content_type = "speech.wav", "audio/wav"
+
+    def write(self, samples):
+        samples = np.asarray(samples)
+        if self.channels > 1:
+            samples = samples[:len(samples) - len(samples) % self.channels].reshape(-1, self.channels)
+            mono = samples.mean(axis=1, dtype=np.float32)
+        else:
+            mono = samples.astype(np.float32)
+        pcm = np.clip(self.resampler.process(mono), -32768, 32767).astype(np.int16)
+        self.samples += len(pcm)
+        if self.file is not None:
+            self.file.write(pcm)
+        else:
+            self.wav.writeframes(pcm.tobytes())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        else:
+            self.wav.close()
+        return self.name, self.out.getvalue(), self.content_type
+
+
+def encode_speech(samples, sample_rate, channels=1, block_seconds=1.0, formats=None):
+    """Encode a whole recording for upload, block by block"""
+    encoder = SpeechEncoder(sample_rate, channels, formats)
+    block = int(block_seconds * sample_rate) * channels
+    for start in range(0, len(samples), block):
+        encoder.write(samples[start:start + block])
+    return encoder.close()
@@ -0,0 +1,140 @@
+"""
+Small HTTP server for synthesized speech, so the page references audio by a
+short URL instead of carrying base64 data URIs in every Streamlit delta.
+
+    GET /audio/<cache key>.mp3
+
+Files are looked up in the TTS cache (memory, then disk). URLs are content
+addressed, so responses are immutable and cached by the browser; single
+byte ranges are honoured for seeking and partial loads.
+
+Browsers must be able to reach the server, so it is only used when
+AUDIO_BASE_URL gives its public address (usually a proxy route to
+AUDIO_SERVER_HOST:AUDIO_SERVER_PORT on the app's own origin). Without it,
+or if the port cannot be bound, clips are inlined as data URIs, which work
+wherever the page does (Streamlit Cloud, remote users).
+"""
+import base64
+import os
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tts_cache import get_tts_cache
+
+AUDIO_HOST = os.getenv("AUDIO_SERVER_HOST", "127.0.0.1")
+# Streamlit is on 8501 and the chat API on 8502.
+AUDIO_PORT = int(os.getenv("AUDIO_SERVER_PORT", "8503"))
+# Where browsers reach this server, e.g. https://incident.example.com/tts;
+# unset means audio is sent inline.
+AUDIO_BASE_URL = os.getenv("AUDIO_BASE_URL")
+
+AUDIO_PATH = re.compile(r"^/audio/([0-9a-f]{64})\.mp3$")
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+class AudioHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_empty(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.do_GET(body=False)
+
+    def do_GET(self, body=True):
+        match = AUDIO_PATH.match(self.path.split("?", 1)[0])
+        audio = self.server.cache.lookup(match.group(1), record=False) if match else None
+        if audio is None:
+            self.send_empty(404)
+            return
+        etag = f'"{audio.key}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_empty(304, [("ETag", etag), ("Cache-Control", CACHE_CONTROL)])
+            return
+
+        data = audio.data
+        start, end = 0, len(data) - 1
+        status = 200
+        requested = self.headers.get("Range")
+        if requested and self.headers.get("If-Range", etag) == etag:
+            byte_range = RANGE.match(requested.strip())
+            if byte_range is None or byte_range.groups() == ("", ""):
+                self.send_empty(416, [("Content-Range", f"bytes */{len(data)}")])
+                return
+            first, last = byte_range.groups()
+            if first:
+                start, end = int(first), min(int(last), end) if last else end
+            else:
+                # Suffix range: the last N bytes.
+                start = max(len(data) - int(last), 0)
+            if start > end or start >= len(data):
+                self.send_empty(416, [("Content-Range", f"bytes */{len(data)}")])
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if body:
+            self.wfile.write(memoryview(data)[start:end + 1])
+
+
+def start_audio_server(host=AUDIO_HOST, port=AUDIO_PORT, cache=None):
+    """Serve the TTS cache on a background thread and return (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), AudioHandler)
+    server.daemon_threads = True
+    server.cache = cache or get_tts_cache()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://localhost:{server.server_address[1]}"
+
+
+def get_audio_server():
+    """Process-wide audio server, started on first use; None if its port could not be bound"""
+    global _server, _server_failed
+    if _server is None and not _server_failed:
+        with _server_lock:
+            if _server is None and not _server_failed:
+                try:
+                    _server, _ = start_audio_server()
+                except OSError:
+                    _server_failed = True
+    return _server
+
+
+def audio_data_uri(audio):
+    return f"data:audio/mpeg;base64,{base64.b64encode(audio.data).decode()}"
+
+
+def audio_url(audio):
+    """
+    Short URL for cached audio when AUDIO_BASE_URL is configured (starting
+    the server if needed), otherwise a data URI
+    """
+    if AUDIO_BASE_URL and get_audio_server() is not None:
+        return f"{AUDIO_BASE_URL.rstrip('/')}/audio/{audio.key}.mp3"
+    return audio_data_uri(audio)
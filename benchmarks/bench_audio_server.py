@@ -0,0 +1,74 @@
+"""
+Compare what the page carries per spoken message with inline base64 data
+URIs versus audio URLs, and check the audio server's range and caching
+behaviour.
+
+    python -m benchmarks.bench_audio_server --messages 100
+"""
+import argparse
+import base64
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import requests
+
+from audio_server import start_audio_server
+from tts_cache import TTSCache
+
+# ~4 s of 32 kbps speech, about what tts-1 returns for one agent sentence.
+AUDIO_BYTES = 16_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="audio-server-bench-")
+    cache = TTSCache(directory)
+    server, base_url = start_audio_server(port=0, cache=cache)
+    session = requests.Session()
+    session.trust_env = False
+    try:
+        inline = url = 0
+        keys = []
+        for i in range(args.messages):
+            audio = cache.put(f"Message {i}", "alloy", "tts-1", os.urandom(AUDIO_BYTES))
+            keys.append(audio.key)
+            inline += len(f'<audio autoplay><source src="data:audio/mp3;base64,{base64.b64encode(audio.data).decode()}" type="audio/mp3"></audio>')
+            url += len(f"{base_url}/audio/{audio.key}.mp3")
+        print(f"{args.messages} messages of {AUDIO_BYTES:,} B audio")
+        print(f"  inline data URIs: {inline:>11,} B of markup ({inline / (args.messages * AUDIO_BYTES):.2f}x the audio)")
+        print(f"  audio URLs:       {url:>11,} B of markup ({url // args.messages} B per message)")
+
+        target = f"{base_url}/audio/{keys[0]}.mp3"
+        full = session.get(target)
+        assert full.status_code == 200 and len(full.content) == AUDIO_BYTES
+        print(f"\nGET          {full.status_code}  {full.headers['Cache-Control']}  ETag {full.headers['ETag'][:14]}...")
+        for header in ("bytes=0-1023", "bytes=1024-", "bytes=-500", f"bytes={AUDIO_BYTES}-"):
+            response = session.get(target, headers={"Range": header})
+            expected = {"bytes=0-1023": full.content[:1024], "bytes=1024-": full.content[1024:],
+                        "bytes=-500": full.content[-500:]}.get(header, b"")
+            assert response.content == expected
+            print(f"Range {header:<14} {response.status_code}  {response.headers.get('Content-Range')}  {len(response.content):,} B")
+        revalidate = session.get(target, headers={"If-None-Match": full.headers["ETag"]})
+        print(f"If-None-Match  {revalidate.status_code}  {len(revalidate.content)} B")
+        missing = session.get(f"{base_url}/audio/{'0' * 64}.mp3")
+        print(f"unknown key    {missing.status_code}")
+
+        timings = []
+        for key in keys:
+            started = time.perf_counter()
+            session.get(f"{base_url}/audio/{key}.mp3").content
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"\nGET latency p50 {statistics.median(timings):.2f} ms over {len(keys)} files")
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
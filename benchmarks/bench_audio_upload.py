@@ -0,0 +1,98 @@
+"""
+Upload size and end-to-end transcription latency for the speech upload
+formats, against the stub transcription endpoint.
+
+    python -m benchmarks.bench_audio_upload --upload-mbps 8
+    python -m benchmarks.bench_audio_upload --upload-mbps 1 --wav bridge.wav
+
+Input is what the Transcribe button drains from the capture ring buffer
+(48 kHz stereo) after VAD trimming.
+"""
+import argparse
+import io
+import statistics
+import time
+import wave
+
+import numpy as np
+import requests
+
+from audio_encoding import FLAC, OPUS, encode_speech, soundfile
+from benchmarks.bench_vad import SAMPLE_RATE, read_wav, synthetic_fixture
+from benchmarks.stub_openai import start_stub_server
+from vad import trim_to_speech
+
+
+def raw_wav(samples, sample_rate, channels):
+    """The previous upload: full-rate interleaved WAV"""
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return "audio.wav", out.getvalue(), "audio/wav"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wav", help="16-bit PCM WAV fixture instead of the synthetic one")
+    parser.add_argument("--upload-mbps", type=float, default=8.0, help="Simulated uplink for the stub, Mbit/s")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.wav:
+        mono, sample_rate = read_wav(args.wav)
+    else:
+        mono, _ = synthetic_fixture(0)
+        sample_rate = SAMPLE_RATE
+    speech = trim_to_speech(mono, sample_rate)
+    stereo = np.repeat(speech, 2)
+
+    server, base_url = start_stub_server(latency=0.15, transcribe_byte_delay=8 / (args.upload_mbps * 1e6))
+    url = base_url + "/audio/transcriptions"
+    session = requests.Session()
+    session.trust_env = False
+    strategies = [
+        ("48 kHz stereo WAV", lambda: raw_wav(stereo, sample_rate, 2)),
+        ("16 kHz mono WAV", lambda: encode_speech(stereo, sample_rate, 2, formats=[])),
+    ]
+    if soundfile is not None:
+        strategies += [
+            ("16 kHz mono FLAC", lambda: encode_speech(stereo, sample_rate, 2, formats=[FLAC])),
+            ("16 kHz mono Opus", lambda: encode_speech(stereo, sample_rate, 2, formats=[OPUS])),
+        ]
+    else:
+        print("soundfile not installed: FLAC/Opus skipped")
+
+    print(f"{len(speech) / sample_rate:.1f}s of speech, uplink {args.upload_mbps:g} Mbit/s\n")
+    print(f"{'format':<20} {'upload':>9} {'encode':>9} {'transcribe':>11} {'end to end':>11}")
+    baseline = None
+    for label, encode in strategies:
+        encode_ms, total_ms = [], []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            name, data, content_type = encode()
+            encoded = time.perf_counter()
+            session.post(url, files={"file": (name, data, content_type)}, data={"model": "whisper-1"}).raise_for_status()
+            done = time.perf_counter()
+            encode_ms.append((encoded - started) * 1000)
+            total_ms.append((done - started) * 1000)
+        baseline = baseline or len(data)
+        encode_p50, total_p50 = statistics.median(encode_ms), statistics.median(total_ms)
+        print(f"{label:<20} {len(data) / 1024:6.0f} KB {encode_p50:6.0f} ms {total_p50 - encode_p50:8.0f} ms "
+              f"{total_p50:8.0f} ms   ({baseline / len(data):.1f}x smaller)")
+
+    if soundfile is not None:
+        name, data, _ = encode_speech(stereo, sample_rate, 2, formats=[FLAC])
+        _, wav, _ = encode_speech(stereo, sample_rate, 2, formats=[])
+        decoded, _ = soundfile.read(io.BytesIO(data), dtype="int16")
+        with wave.open(io.BytesIO(wav)) as reference:
+            expected = np.frombuffer(reference.readframes(reference.getnframes()), dtype=np.int16)
+        assert np.array_equal(decoded, expected)
+        print("\nFLAC decodes to exactly the 16 kHz PCM")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
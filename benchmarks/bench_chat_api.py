@@ -0,0 +1,163 @@
+"""
+Load-test POST /chat on chat_api.py against the stub model backend and
+report requests/s and latency at increasing numbers of concurrent sessions.
+
+    python -m benchmarks.bench_chat_api --latency 0.2 --concurrency 1 50 200 500
+
+The API and the stub run as separate processes, as in production. For
+comparison the same turns are sent to a blocking endpoint that calls the
+model from FastAPI's worker threads, which is what a synchronous handler
+(or the old Streamlit rerun per message) is limited to.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import http_client
+import incident_chat
+from benchmarks.sample_data import SAMPLE_CMDB, SAMPLE_LOGS
+from conversation import ConversationStore
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Questions go to Agent 5, so every turn waits on the model.
+QUESTIONS = ["What is failing on SAP S/4HANA?", "Which CIs does SAP S/4HANA depend on?",
+             "Why would the database connection pool be exhausted?", "How long has the checkout service been down?"]
+
+# --- Blocking baseline ---
+blocking_app = FastAPI()
+blocking_app.state.conversations = ConversationStore()
+
+
+class BlockingChatRequest(BaseModel):
+    session: str
+    chat: str = ""
+
+
+@blocking_app.post("/chat")
+def blocking_chat(body: BlockingChatRequest):
+    if not hasattr(blocking_app.state, "app_data"):
+        blocking_app.state.app_data = incident_chat.load_app_data()
+    conversation = blocking_app.state.conversations.get(body.session)
+    try:
+        return http_client.run_sync(lambda client: incident_chat.chat_turn_async(
+            client, "", conversation, body.chat, blocking_app.state.app_data))
+    except Exception as e:
+        return JSONResponse(status_code=502, content={"error": f"An error occurred: {e}"})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(args, cwd, env):
+    return subprocess.Popen([sys.executable, *args], cwd=cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+async def post(reader, writer, port, body):
+    """One keep-alive HTTP/1.1 POST; a minimal client so the load generator is not the bottleneck"""
+    data = json.dumps(body).encode()
+    writer.write(f"POST /chat HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def load(port, concurrency, requests_total):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests_total))
+
+    async def session(number):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for turn in remaining:
+            body = {"session": f"bench-{port}-{number}", "chat": QUESTIONS[turn % len(QUESTIONS)]}
+            started = time.perf_counter()
+            if await post(reader, writer, port, body) != 200:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    return len(latencies) / elapsed, p50, p99, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub model latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 200, 500])
+    parser.add_argument("--rounds", type=int, default=4, help="Requests per session at each level")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chat-api-bench-")
+    with open(os.path.join(workdir, "cmdb.json"), "w") as f:
+        json.dump(SAMPLE_CMDB, f)
+    with open(os.path.join(workdir, "logs.txt"), "w") as f:
+        f.write(SAMPLE_LOGS)
+
+    stub_port, api_port, blocking_port = free_port(), free_port(), free_port()
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, OPENAI_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+               OPENAI_API_KEY="stub")
+    processes = [
+        start(["-m", "benchmarks.stub_openai", "--port", str(stub_port), "--latency", str(args.latency)], REPO_ROOT, env),
+        start(["-m", "uvicorn", "chat_api:app", "--port", str(api_port), "--log-level", "warning"], workdir, env),
+        start(["-m", "uvicorn", "benchmarks.bench_chat_api:blocking_app", "--port", str(blocking_port),
+               "--log-level", "warning"], workdir, env),
+    ]
+    try:
+        for port in (stub_port, api_port, blocking_port):
+            wait_for(port)
+        print(f"model latency {args.latency * 1000:.0f} ms\n")
+        print(f"{'endpoint':>16} {'sessions':>9} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+        for label, port in (("async POST /chat", api_port), ("blocking", blocking_port)):
+            asyncio.run(load(port, 4, 8))
+            for concurrency in args.concurrency:
+                rate, p50, p99, errors = asyncio.run(load(port, concurrency, concurrency * args.rounds))
+                print(f"{label:>16} {concurrency:9d} {rate:8.1f} {p50:7.0f}ms {p99:7.0f}ms {errors:7d}")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-lookup latency of the CMDB index against the pandas scan it replaced.
+
+    python -m benchmarks.bench_cmdb_index --size 500000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.sample_data import synthetic_cmdb
+from cmdb_index import CmdbIndex
+
+
+def time_per_call(func, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--scans", type=int, default=5, help="Lookups to time for the pandas scan")
+    args = parser.parse_args()
+
+    records = synthetic_cmdb(args.size)
+    start = time.perf_counter()
+    index = CmdbIndex(records)
+    print(f"{len(index)} CIs indexed in {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(1)
+    apps = index.applications()
+    names = [(rng.choice(apps)["name"].upper(),) for _ in range(args.lookups)]
+    ids = [(rng.choice(records)["id"],) for _ in range(args.lookups)]
+    app_ids = [(rng.choice(apps)["id"],) for _ in range(args.lookups)]
+
+    print(f"find(name)            {time_per_call(index.find, names):10.2f} us")
+    print(f"get(id)               {time_per_call(index.get, ids):10.2f} us")
+    print(f"dependencies(app)     {time_per_call(index.dependencies, app_ids):10.2f} us")
+    print(f"dependency_closure    {time_per_call(index.dependency_closure, app_ids):10.2f} us")
+    db_ids = [(f"db-{i}",) for i in range(min(1000, len(apps) // 3))]
+    for depth in (1, 3):
+        cold = time_per_call(lambda ci_id: index.blast_radius(ci_id, depth), db_ids)
+        warm = time_per_call(lambda ci_id: index.blast_radius(ci_id, depth), db_ids)
+        size = sum(len(index.blast_radius(ci_id, depth)) for ci_id, in db_ids) / len(db_ids)
+        print(f"blast_radius(db, {depth})    {cold:10.2f} us cold, {warm:.2f} us cached, {size:.0f} CIs")
+
+    try:
+        import pandas as pd
+    except ImportError:
+        return
+    df = pd.DataFrame(records)
+
+    def pandas_lookup(name):
+        app_ci = df[df['name'].str.lower() == name.lower()]
+        return df[df['id'].isin(app_ci.iloc[0]['associated_cis'])]
+
+    print(f"pandas scan (before)  {time_per_call(pandas_lookup, names[:args.scans]):10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Model calls and latency per incident with the server-side conversation
+state machine, versus the old flow where every typed message went to the
+model with the client's state string.
+
+    python -m benchmarks.bench_conversation --latency 0.5 --incidents 20
+
+Each incident walks the scripted bridge flow below against the stub model
+backend. The old flow is replayed as one model call per typed message.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import http_client
+import incident_chat
+from benchmarks.sample_data import SAMPLE_CMDB, SAMPLE_LOGS
+from benchmarks.stub_openai import start_stub_server
+from conversation import JOIN_BRIDGE, ConversationStore
+
+# (typed message, UI action); the bridge button is the only action.
+SCRIPT = [
+    ("hi, we have an outage", None),
+    ("SAP S/4HANA", None),
+    ("", JOIN_BRIDGE),
+    ("ok", None),
+    ("run log analysis", None),
+    ("generate RCA", None),
+    ("What caused the outage?", None),
+    ("thanks", None),
+]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def run_new(client, app_data, incidents):
+    store = ConversationStore()
+    canned, generated, calls = [], [], 0
+    for number in range(incidents):
+        conversation = store.get(f"incident-{number}")
+        for text, action in SCRIPT:
+            started = time.perf_counter()
+            result = await incident_chat.chat_turn_async(client, "stub", conversation, text, app_data, action)
+            (generated if result["used_model"] else canned).append((time.perf_counter() - started) * 1000)
+        assert conversation.view()["state"] == "completed", conversation.view()
+        calls += conversation.model_calls
+    return calls, canned, generated
+
+
+async def run_old(client, app_data, incidents):
+    """One model call per typed message, as the page did when it sent its state string"""
+    latencies, calls = [], 0
+    for _ in range(incidents):
+        for text, action in SCRIPT:
+            if action:
+                continue
+            started = time.perf_counter()
+            await http_client.post_json_async(client, incident_chat.OPENAI_CHAT_URL,
+                                              incident_chat.build_payload("5", text, app_data),
+                                              headers=incident_chat.build_headers("stub"))
+            latencies.append((time.perf_counter() - started) * 1000)
+            calls += 1
+    return calls, latencies
+
+
+async def run(args, app_data):
+    async with http_client.async_client() as client:
+        old_calls, old_latencies = await run_old(client, app_data, args.incidents)
+        new_calls, canned, generated = await run_new(client, app_data, args.incidents)
+    turns = len(SCRIPT) * args.incidents
+    print(f"model latency {args.latency * 1000:.0f} ms, {args.incidents} incidents, {len(SCRIPT)} turns each\n")
+    print(f"{'flow':<22}{'calls/incident':>15}{'turn p50':>11}{'turn p99':>11}{'total s':>9}")
+    print(f"{'old (model per turn)':<22}{old_calls / args.incidents:>15.1f}{percentile(old_latencies, 0.5):>9.1f}ms"
+          f"{percentile(old_latencies, 0.99):>9.1f}ms{sum(old_latencies) / 1000:>9.1f}")
+    latencies = canned + generated
+    print(f"{'state machine':<22}{new_calls / args.incidents:>15.1f}{percentile(latencies, 0.5):>9.1f}ms"
+          f"{percentile(latencies, 0.99):>9.1f}ms{sum(latencies) / 1000:>9.1f}")
+    print(f"\n{len(canned)}/{turns} turns answered without the model: p50 {percentile(canned, 0.5):.2f} ms, "
+          f"p99 {percentile(canned, 0.99):.2f} ms; model turns p50 {percentile(generated, 0.5):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub model latency in seconds")
+    parser.add_argument("--incidents", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="conversation-bench-")
+    server, base_url = start_stub_server(latency=args.latency)
+    try:
+        cmdb_path = os.path.join(workdir, "cmdb.json")
+        logs_path = os.path.join(workdir, "logs.txt")
+        with open(cmdb_path, "w") as f:
+            json.dump(SAMPLE_CMDB, f)
+        with open(logs_path, "w") as f:
+            f.write(SAMPLE_LOGS)
+        incident_chat.OPENAI_CHAT_URL = base_url + "/chat/completions"
+        asyncio.run(run(args, incident_chat.load_app_data(cmdb_path, logs_path)))
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
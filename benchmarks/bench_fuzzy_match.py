@@ -0,0 +1,64 @@
+"""
+Top-k fuzzy CMDB name suggestions on a large synthetic CMDB.
+
+    python -m benchmarks.bench_fuzzy_match --size 500000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.sample_data import SAMPLE_CMDB, synthetic_cmdb
+from cmdb_index import CmdbIndex
+
+TRANSCRIPTS = ["sap s4 hana", "sales force crm", "web store front", "reportin dashbord", "legacy main frame"]
+
+
+def garble(name, rng):
+    """Simulate a speech-to-text miss: drop, swap or repeat one character"""
+    chars = list(name.lower())
+    i = rng.randrange(1, len(chars) - 1)
+    edit = rng.choice(["drop", "swap", "repeat"])
+    if edit == "drop":
+        del chars[i]
+    elif edit == "swap":
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    else:
+        chars.insert(i, chars[i])
+    return "".join(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    sample = CmdbIndex(SAMPLE_CMDB)
+    for transcript in TRANSCRIPTS:
+        score, ci = sample.suggest(transcript, k=1)[0]
+        print(f"{transcript!r:<22} -> {ci['name']} ({score:.2f})")
+
+    records = synthetic_cmdb(args.size)
+    index = CmdbIndex(records)
+    start = time.perf_counter()
+    index.suggest("warm up")
+    print(f"\n{len(index)} CIs, trigram index built in {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(3)
+    targets = [rng.choice(records)["name"] for _ in range(args.queries)]
+    queries = [garble(name, rng) for name in targets]
+    samples = []
+    correct = 0
+    for target, query in zip(targets, queries):
+        start = time.perf_counter()
+        suggestions = index.suggest(query, k=args.k)
+        samples.append((time.perf_counter() - start) * 1000)
+        correct += any(ci["name"] == target for _, ci in suggestions)
+    samples.sort()
+    print(f"p50={samples[len(samples) // 2]:.3f} ms  p99={samples[int(len(samples) * 0.99)]:.3f} ms  "
+          f"target in top-{args.k}: {correct / len(queries):.1%}")
+
+
+if __name__ == "__main__":
+    main()
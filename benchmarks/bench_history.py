@@ -0,0 +1,79 @@
+"""
+Replay a 200-turn bridge call against the stub model and compare per-turn
+prompt size of the full resent history with the budgeted ConversationHistory.
+
+    python -m benchmarks.bench_history --turns 200
+
+The stub also answers the summarization calls, so the run exercises the same
+request path the app uses.
+"""
+import argparse
+import random
+import time
+
+import http_client
+from benchmarks.stub_openai import start_stub_server
+from conversation_history import ConversationHistory, llm_summarizer
+from prompt_context import estimate_tokens
+
+SYSTEM_PROMPT = "You are IncidentBot, an analyzer agent on a major incident bridge call."
+UTTERANCES = [
+    "The web storefront is returning 504s for checkout since {t}, roughly {n} failed orders so far.",
+    "Data Integration Service logs show connection to SAP failed {n} times in the last ten minutes.",
+    "SAP HANA DB is reporting a spike of failed logins from the integration user at {t}.",
+    "We restarted web server {k} at {t} but the error rate only dropped for a minute.",
+    "The SAP-Salesforce interface shows SSL handshake failures, certificate expiry is being checked.",
+    "Network team confirms no firewall changes since yesterday; latency to the SAP host is {n} ms.",
+    "Can you summarize what we know so far and what the next step should be?",
+]
+
+
+def utterance(rng):
+    return rng.choice(UTTERANCES).format(t=f"22:{rng.randrange(60):02d}", n=rng.randrange(2, 900), k=rng.randrange(1, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency per call, seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    url = base_url + "/chat/completions"
+
+    def complete(messages, max_tokens):
+        return http_client.post_json(url, {"model": "stub", "messages": messages, "max_tokens": max_tokens})["choices"][0]["message"]["content"]
+
+    rng = random.Random(5)
+    full = []
+    history = ConversationHistory(llm_summarizer(complete), token_budget=args.budget)
+    history.pin("Affected application", "Web Storefront (app-a)")
+    report_at = {1, 10, 25, 50, 100, 150, args.turns}
+    managed_tokens = []
+    print(f"{'turn':>5} {'full history':>13} {'managed':>8} {'recent turns':>13} {'summarizer calls':>17}")
+    started = time.perf_counter()
+    for turn in range(1, args.turns + 1):
+        user_input = utterance(rng)
+        system = [{"role": "system", "content": SYSTEM_PROMPT}]
+        user = [{"role": "user", "content": user_input}]
+        legacy = sum(estimate_tokens(m["content"]) + 4 for m in system + full + user)
+        messages = system + history.messages() + user
+        managed = sum(estimate_tokens(m["content"]) + 4 for m in messages)
+        managed_tokens.append(managed)
+        reply = complete(messages, 400)
+        full += [{"role": "user", "content": user_input}, {"role": "assistant", "content": reply}]
+        history.add(user_input, reply)
+        if turn == 120:
+            history.pin("Root cause", "Expired SSL certificate on the SAP-Salesforce Interface")
+        if turn in report_at:
+            print(f"{turn:>5} {legacy:>13,} {managed:>8,} {len(history):>13} {history.summarizer_calls:>17}")
+    elapsed = time.perf_counter() - started
+    tail = managed_tokens[len(managed_tokens) // 2:]
+    print(f"\nsecond half: managed prompt {min(tail)}..{max(tail)} tokens (budget {args.budget} + system/user), "
+          f"{history.summarizer_calls} summarizer calls for {args.turns} turns, {elapsed:.2f}s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
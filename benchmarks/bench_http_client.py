@@ -0,0 +1,91 @@
+"""
+Compare a fresh requests.post per chat turn with the pooled http_client session.
+
+    python -m benchmarks.bench_http_client --requests 200
+    python -m benchmarks.bench_http_client --certfile cert.pem --keyfile key.pem
+
+Pass a self-signed certificate for ``localhost`` to include the TLS handshake,
+which is where most of the per-request saving comes from in production.
+"""
+import argparse
+import asyncio
+import ssl
+import time
+
+import aiohttp
+import requests
+
+import http_client
+from benchmarks.stub_openai import start_stub_server
+
+PAYLOAD = {
+    "model": "gpt-4o-mini",
+    "messages": [{"role": "user", "content": "Which application is down?"}],
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(f"{label:<22} p50={percentile(samples, 50):7.2f} ms  p99={percentile(samples, 99):7.2f} ms")
+
+
+def run(label, call, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    report(label, samples)
+
+
+async def run_pooled(label, url, count, certfile):
+    # http_client's pool, trusting the self-signed certificate if there is one.
+    client = http_client.async_client()
+    if certfile:
+        await client.close()
+        client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=http_client.ASYNC_MAX_CONNECTIONS,
+                                           ssl=ssl.create_default_context(cafile=certfile)),
+            timeout=client.timeout,
+        )
+    async with client:
+        # Warm the pool so the first handshake is not counted against the session.
+        await http_client.post_json_async(client, url, PAYLOAD)
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            await http_client.post_json_async(client, url, PAYLOAD)
+            samples.append((time.perf_counter() - start) * 1000)
+    report(label, samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated model latency in seconds")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, certfile=args.certfile, keyfile=args.keyfile)
+    url = base_url + "/chat/completions"
+    verify = args.certfile or True
+
+    def fresh_connection():
+        response = requests.post(url, json=PAYLOAD, verify=verify)
+        response.raise_for_status()
+        response.json()
+
+    print(f"{args.requests} requests against {url}")
+    run("requests.post (before)", fresh_connection, args.requests)
+    asyncio.run(run_pooled("http_client (after)", url, args.requests, args.certfile))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Simulate many concurrent bridges in one process: every incident walks the
+bridge flow through the incident registry against the stub model backend.
+
+    python -m benchmarks.bench_incidents --incidents 200 --latency 0.5 --limits 8 32 128
+
+For each model-call limit it reports throughput, turn latency, time to
+resolve an incident and fairness across incidents (Jain's index of the
+mean turn latency per incident; 1.0 means every bridge was served alike).
+A second participant asks a question while the log analysis runs, so turns
+queue on the same incident; each incident's final state is checked against
+its own application.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import http_client
+import incident_chat
+from benchmarks.bench_chat_api import REPO_ROOT, free_port, start, wait_for
+from benchmarks.sample_data import SAMPLE_CMDB, SAMPLE_LOGS
+from conversation import COMPLETED, JOIN_BRIDGE
+from incident_registry import IncidentRegistry
+
+APPLICATIONS = [ci["name"] for ci in SAMPLE_CMDB if ci["type"] == "Application"]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def jain_index(values):
+    return sum(values) ** 2 / (len(values) * sum(value * value for value in values)) if values else 1.0
+
+
+async def incident(registry, number, think, rng):
+    """One bridge: pick the application, join, analyse (with a concurrent question), RCA, follow-up"""
+    incident_id = f"incident-{number}"
+    application = APPLICATIONS[number % len(APPLICATIONS)]
+    latencies = []
+
+    async def turn(text, action=None):
+        started = time.perf_counter()
+        result = await registry.submit(incident_id, text, action)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return result
+
+    started = time.perf_counter()
+    for text, action in ((application, None), ("", JOIN_BRIDGE)):
+        await asyncio.sleep(rng.uniform(0, think))
+        await turn(text, action)
+    await asyncio.sleep(rng.uniform(0, think))
+    await asyncio.gather(turn("run log analysis"), turn("What is the impact so far?"))
+    for text in ("generate RCA", "What caused the outage?"):
+        await asyncio.sleep(rng.uniform(0, think))
+        await turn(text)
+    view = registry.get(incident_id).view()
+    assert view["state"] == COMPLETED and view["app"]["name"] == application, view
+    return (time.perf_counter() - started) * 1000, latencies
+
+
+async def simulate(incidents, limit, think, app_data):
+    rng = random.Random(limit)
+    async with http_client.async_client() as client:
+        registry = IncidentRegistry(client, "stub", lambda: app_data, max_model_calls=limit)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(incident(registry, number, think, rng) for number in range(incidents)))
+        elapsed = time.perf_counter() - started
+    stats = registry.stats()
+    assert stats["incidents"] == incidents and stats["queued_turns"] == 0, stats
+    resolve_ms = [resolved for resolved, _ in results]
+    turn_ms = [latency for _, latencies in results for latency in latencies]
+    fairness = jain_index([sum(latencies) / len(latencies) for _, latencies in results])
+    model = stats["model_calls"]
+    print(f"{limit:>6} {len(turn_ms) / elapsed:8.1f} {model['calls'] / elapsed:8.1f} {percentile(turn_ms, 0.5):7.0f}ms "
+          f"{percentile(turn_ms, 0.99):7.0f}ms {percentile(resolve_ms, 0.5) / 1000:7.1f}s {max(resolve_ms) / 1000:7.1f}s "
+          f"{fairness:9.3f} {model['peak']:5d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--incidents", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub model latency in seconds")
+    parser.add_argument("--think", type=float, default=1.0, help="Longest pause between a participant's turns, in seconds")
+    parser.add_argument("--limits", type=int, nargs="+", default=[8, 32, 128], help="Concurrent model call limits to try")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="incidents-bench-")
+    stub_port = free_port()
+    stub = start(["-m", "benchmarks.stub_openai", "--port", str(stub_port), "--latency", str(args.latency)],
+                 REPO_ROOT, dict(os.environ, PYTHONPATH=REPO_ROOT))
+    try:
+        cmdb_path = os.path.join(workdir, "cmdb.json")
+        logs_path = os.path.join(workdir, "logs.txt")
+        with open(cmdb_path, "w") as f:
+            json.dump(SAMPLE_CMDB, f)
+        with open(logs_path, "w") as f:
+            f.write(SAMPLE_LOGS)
+        app_data = incident_chat.load_app_data(cmdb_path, logs_path)
+        wait_for(stub_port)
+        incident_chat.OPENAI_CHAT_URL = f"http://127.0.0.1:{stub_port}/v1/chat/completions"
+        print(f"{args.incidents} incidents, model latency {args.latency * 1000:.0f} ms, think time up to {args.think:g} s\n")
+        print(f"{'limit':>6} {'turns/s':>8} {'calls/s':>8} {'turn p50':>9} {'turn p99':>9} {'resolve':>8} "
+              f"{'slowest':>8} {'fairness':>9} {'peak':>5}")
+        for limit in args.limits:
+            asyncio.run(simulate(args.incidents, limit, args.think, app_data))
+    finally:
+        stub.terminate()
+        stub.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
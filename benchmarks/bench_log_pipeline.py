@@ -0,0 +1,101 @@
+"""
+Mine a synthetic multi-GB log into templates and show that memory stays flat.
+
+    python -m benchmarks.bench_log_pipeline --size-mb 4096
+    python -m benchmarks.bench_log_pipeline --path /var/log/incident.log
+
+Peak anonymous RSS (heap, excluding the memory-mapped file pages the kernel
+can drop at will) is sampled while mining, once at a quarter of the size
+and once at the full size; the two should match.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from log_pipeline import iter_file_lines
+from log_templates import TemplateMiner
+
+COMPONENTS = ["Web Storefront", "Data Integration Service", "SAP HANA DB", "SAP-Salesforce Interface",
+              "Web Server 1", "Web Server 2", "Billing Microservice", "PostgreSQL DB A"]
+MESSAGES = {
+    "ERROR": ["Failed to submit order {id}, dependency timeout.", "Connection to SAP system failed (session {id}).",
+              "SSL Handshake failed, certificate expired."],
+    "WARN": ["High volume of failed login attempts from 'Data Integration Service' ({id}).",
+             "Slow query took {ms} ms."],
+    "INFO": ["Health check passed.", "Processed request {id} in {ms} ms."],
+}
+
+
+def write_synthetic_log(path, size_bytes, seed=11):
+    rng = random.Random(seed)
+    start = 1756937700  # 2025-09-03 22:15:00 UTC
+    levels = ["INFO"] * 8 + ["WARN"] + ["ERROR"]
+    written = 0
+    second = 0
+    with open(path, "w") as f:
+        while written < size_bytes:
+            lines = []
+            for _ in range(1000):
+                second += rng.random() < 0.05
+                level = rng.choice(levels)
+                message = rng.choice(MESSAGES[level]).format(id=rng.randrange(10 ** 6), ms=rng.randrange(5000))
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start + second))
+                lines.append(f"{timestamp} [{level}] [{rng.choice(COMPONENTS)}] - {message}\n")
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def rss_anon_kb():
+    """Anonymous resident memory from /proc (Linux); None elsewhere"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def digest(path, limit_bytes=None):
+    stats = {"read": 0, "peak": rss_anon_kb() or 0}
+
+    def metered_lines():
+        for count, line in enumerate(iter_file_lines(path)):
+            stats["read"] += len(line)
+            if count % 200_000 == 0:
+                stats["peak"] = max(stats["peak"], rss_anon_kb() or 0)
+            yield line
+            if limit_bytes and stats["read"] >= limit_bytes:
+                return
+
+    start = time.perf_counter()
+    result = TemplateMiner().update(metered_lines())
+    return result, stats["read"], time.perf_counter() - start, stats["peak"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--path", help="Mine an existing log instead of a synthetic one")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"synthetic_incident_{args.size_mb}mb.log")
+        if not os.path.exists(path) or os.path.getsize(path) < args.size_mb * 2 ** 20:
+            print(f"Writing {args.size_mb} MB synthetic log to {path} ...")
+            write_synthetic_log(path, args.size_mb * 2 ** 20)
+    size = os.path.getsize(path)
+
+    for fraction in (0.25, 1.0):
+        result, read, elapsed, peak = digest(path, int(size * fraction))
+        print(f"{read / 2 ** 20:8.0f} MB  {result.lines:>11,} lines  {read / 2 ** 20 / elapsed:6.0f} MB/s  "
+              f"peak RssAnon {peak / 1024:.1f} MB")
+    print("\nTemplates handed to Agent 3:\n" + result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Load millions of log lines into the LogStore and time the range and
+component queries Agent 5 runs, against a linear scan of the same rows.
+
+    python -m benchmarks.bench_log_store --size-mb 200
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_log_pipeline import COMPONENTS, write_synthetic_log
+from log_store import LogStore
+
+QUESTIONS = [
+    "What did SAP HANA DB log between 22:15 and 22:16?",
+    "Any errors from the Data Integration Service around 23:40?",
+    "Show warnings for Web Server 1 between 01:00 and 01:05",
+]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def random_queries(store, count, seed=3):
+    rng = random.Random(seed)
+    first, last = store.timestamps[0], store.timestamps[-1]
+    minutes = sorted({ts[:16] for ts in store.timestamps[::997]})
+    queries = []
+    for _ in range(count):
+        minute = rng.choice(minutes)
+        queries.append({
+            "start": f"{minute}:00",
+            "end": f"{minute}:59",
+            "components": rng.sample(COMPONENTS, rng.choice((1, 2))),
+            "levels": rng.choice((None, ["ERROR"], ["ERROR", "WARN"])),
+        })
+    return first, last, queries
+
+
+def linear_scan(store, start, end, components, levels, limit):
+    wanted = set(components)
+    rows = [row for row, ts in enumerate(store.timestamps)
+            if start <= ts <= end and store.components[row] in wanted
+            and (levels is None or store.levels[row] in levels)]
+    return len(rows), [store.record(row) for row in rows[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"synthetic_incident_{args.size_mb}mb.log")
+    if not os.path.exists(path) or os.path.getsize(path) < args.size_mb * 2 ** 20:
+        print(f"Writing {args.size_mb} MB synthetic log to {path} ...")
+        write_synthetic_log(path, args.size_mb * 2 ** 20)
+
+    start = time.perf_counter()
+    store = LogStore.from_file(path)
+    elapsed = time.perf_counter() - start
+    print(f"loaded {len(store):,} lines in {elapsed:.1f}s ({len(store) / elapsed:,.0f} lines/s)")
+
+    first, last, queries = random_queries(store, args.queries)
+    print(f"time span {first} .. {last}")
+
+    timings = []
+    matched = []
+    for query in queries:
+        started = time.perf_counter()
+        total, _ = store.query(limit=40, **query)
+        timings.append((time.perf_counter() - started) * 1000)
+        matched.append(total)
+    p50, p99 = percentiles(timings)
+    print(f"indexed query   p50 {p50:7.3f} ms  p99 {p99:7.3f} ms  "
+          f"(median {statistics.median(matched):.0f} matching lines)")
+
+    scans = []
+    for query in queries[:5]:
+        started = time.perf_counter()
+        expected = linear_scan(store, limit=40, **query)
+        scans.append((time.perf_counter() - started) * 1000)
+        assert store.query(limit=40, **query) == expected
+    print(f"linear scan     p50 {statistics.median(scans):7.1f} ms  (results identical)")
+
+    print()
+    for question in QUESTIONS:
+        filters = store.filters_for_question(question)
+        started = time.perf_counter()
+        total, records = store.query(limit=40, **filters)
+        took = (time.perf_counter() - started) * 1000
+        print(f"{question!r}\n  {filters}\n  {total:,} lines, {len(records)} sent, {took:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
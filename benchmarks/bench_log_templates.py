@@ -0,0 +1,49 @@
+"""
+Prompt size and mining cost of log templates against pasting raw lines.
+
+    python -m benchmarks.bench_log_templates --size-mb 64
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_log_pipeline import write_synthetic_log
+from log_pipeline import iter_file_lines
+from log_templates import TemplateMiner
+from prompt_context import estimate_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=16)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"synthetic_incident_{args.size_mb}mb.log")
+    if not os.path.exists(path):
+        write_synthetic_log(path, args.size_mb * 2 ** 20)
+    raw = open(path).read()
+
+    start = time.perf_counter()
+    miner = TemplateMiner.from_text(raw)
+    elapsed = time.perf_counter() - start
+    summary = miner.summary()
+    print(f"{miner.lines:,} lines -> {len(miner.clusters)} templates in {elapsed:.2f} s "
+          f"({miner.lines / elapsed:,.0f} lines/s)")
+    print(f"raw prompt      {estimate_tokens(raw):>12,} tokens")
+    print(f"template prompt {estimate_tokens(summary):>12,} tokens")
+
+    # Incremental: mining the second half on top of the first must land on the
+    # same clusters as a single pass, without revisiting the first half.
+    lines = list(iter_file_lines(path))
+    half = len(lines) // 2
+    incremental = TemplateMiner().update(lines[:half])
+    start = time.perf_counter()
+    incremental.update(lines[half:])
+    print(f"second half added in {time.perf_counter() - start:.2f} s, "
+          f"same templates as one pass: {incremental.summary() == summary}")
+    print("\n" + summary)
+
+
+if __name__ == "__main__":
+    main()
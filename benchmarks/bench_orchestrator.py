@@ -0,0 +1,104 @@
+"""
+Wall-clock per incident for the Agent 2 -> logs -> Agent 3 hand-off, run
+strictly in sequence (as the button-driven app did) and with the log work
+started speculatively by the orchestrator while Agent 2 is still talking.
+
+    python -m benchmarks.bench_orchestrator --incidents 5 --latency 0.3
+
+Model and TTS calls go to the stub server; logs come from a synthetic log
+file through the LogStore and TemplateMiner.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import http_client
+from agent_orchestrator import AgentRun, AgentTask
+from benchmarks.bench_log_pipeline import COMPONENTS, write_synthetic_log
+from benchmarks.stub_openai import start_stub_server
+from log_store import LogStore
+from log_templates import TemplateMiner
+from tts_pipeline import TTSPipeline
+
+
+def make_agents(base_url, store):
+    chat_url = base_url + "/chat/completions"
+    tts_url = base_url + "/audio/speech"
+
+    def synthesize(text):
+        return http_client.post_bytes(tts_url, {"model": "tts-1", "voice": "alloy", "input": text})
+
+    def confirm_and_speak(app):
+        """Agent 2: stream the confirmation and speak it, as stream_agent_message does"""
+        speech = TTSPipeline(synthesize)
+        for event in http_client.stream_sse(chat_url, {"model": "stub", "messages": [], "stream": True}):
+            speech.feed(event["choices"][0]["delta"]["content"])
+        speech.close()
+        return len(list(speech.audio()))
+
+    def fetch_logs(inputs, app):
+        _, records = store.query(components=[app, COMPONENTS[1], COMPONENTS[2]])
+        return store.format(records)
+
+    def digest_logs(inputs):
+        return TemplateMiner.from_text(inputs["logs"]).summary()
+
+    def summarize_logs(inputs):
+        return http_client.post_json(chat_url, {"model": "stub", "messages": [
+            {"role": "user", "content": inputs["templates"]}]})["choices"][0]["message"]["content"]
+
+    return confirm_and_speak, fetch_logs, digest_logs, summarize_logs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--incidents", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub time to first byte per call, seconds")
+    parser.add_argument("--log-mb", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"synthetic_incident_{args.log_mb}mb.log")
+    if not os.path.exists(path) or os.path.getsize(path) < args.log_mb * 2 ** 20:
+        write_synthetic_log(path, args.log_mb * 2 ** 20)
+    store = LogStore.from_file(path)
+    server, base_url = start_stub_server(latency=args.latency, token_delay=0.01, tts_char_delay=0.001)
+    confirm_and_speak, fetch_logs, digest_logs, summarize_logs = make_agents(base_url, store)
+
+    sequential, parallel, saved = [], [], []
+    for incident in range(args.incidents):
+        app = COMPONENTS[incident % len(COMPONENTS)]
+
+        started = time.perf_counter()
+        confirm_and_speak(app)
+        logs = fetch_logs({}, app)
+        templates = digest_logs({"logs": logs})
+        summarize_logs({"templates": templates})
+        sequential.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        run = AgentRun([
+            AgentTask("logs", lambda inputs: fetch_logs(inputs, app), resource="io"),
+            AgentTask("templates", digest_logs, deps=["logs"], resource="io"),
+            AgentTask("log_summary", summarize_logs, deps=["templates"]),
+        ]).start()
+        confirmed = time.perf_counter()
+        confirm_and_speak(app)
+        run.record("agent_2_confirmation", confirmed, time.perf_counter())
+        run.result("log_summary", timeout=60)
+        parallel.append((time.perf_counter() - started) * 1000)
+        saved.append(run.trace()["saved_ms"])
+
+    print(f"{len(store):,} log lines, stub latency {args.latency * 1000:.0f} ms, {args.incidents} incidents")
+    print(f"sequential   p50 {statistics.median(sequential):7.0f} ms per incident")
+    print(f"orchestrated p50 {statistics.median(parallel):7.0f} ms per incident "
+          f"(trace: {statistics.median(saved):.0f} ms saved)")
+    print("\nlast incident trace:")
+    for span in run.trace()["spans"]:
+        print(f"  {span['task']:<22} {span['resource']:<4} {span['start_ms']:8.1f} -> {span['end_ms']:8.1f} ms  {span['status']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Feed an hour of 20 ms WebRTC-sized frames through the PCM ring buffer and
+show that memory stays flat, then compare draining it with the old
+segment-by-segment concatenation.
+
+    python -m benchmarks.bench_pcm_buffer --minutes 60
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_log_pipeline import rss_anon_kb
+from pcm_buffer import CHANNELS, SAMPLE_RATE, PCMRingBuffer
+
+FRAME_MS = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--retention", type=float, default=30, help="Seconds kept in the ring")
+    args = parser.parse_args()
+
+    frame_samples = SAMPLE_RATE * FRAME_MS // 1000 * CHANNELS
+    rng = np.random.default_rng(1)
+    # A small pool of frames stands in for decoded microphone audio.
+    frames = [rng.integers(-3000, 3000, frame_samples, dtype=np.int16) for _ in range(64)]
+    buffer = PCMRingBuffer(retention_seconds=args.retention)
+    total_frames = int(args.minutes * 60 * 1000 / FRAME_MS)
+
+    tracemalloc.start()
+    rss = []
+    write_us = []
+    started = time.perf_counter()
+    for i in range(total_frames):
+        if i % 1000 == 0:
+            t = time.perf_counter()
+            buffer.write(frames[i % len(frames)])
+            write_us.append((time.perf_counter() - t) * 1e6)
+        else:
+            buffer.write(frames[i % len(frames)])
+        if i % (total_frames // 4 or 1) == 0:
+            rss.append(rss_anon_kb() or 0)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = buffer.stats()
+    print(f"{args.minutes:.0f} min of audio = {total_frames:,} frames in {elapsed:.2f}s "
+          f"({statistics.median(write_us):.1f} us/frame p50)")
+    print(f"ring {stats['capacity_bytes'] / 2 ** 20:.1f} MB for {args.retention:.0f}s; "
+          f"Python allocations while writing: peak {peak / 1024:.0f} KB")
+    print(f"RssAnon at 0/25/50/75%: {', '.join(f'{kb / 1024:.1f}' for kb in rss)} MB")
+    print(f"overflow {stats['overflow_samples'] / (SAMPLE_RATE * CHANNELS):.0f}s overwritten unread, "
+          f"{stats['dropped_frames']} frames dropped")
+
+    t = time.perf_counter()
+    samples = buffer.drain()
+    wav = buffer.to_wav(samples)
+    print(f"\ndrain + WAV of last {len(samples) / (SAMPLE_RATE * CHANNELS):.0f}s: "
+          f"{(time.perf_counter() - t) * 1000:.1f} ms, {len(wav) / 2 ** 20:.1f} MB")
+
+    # The old path: one object per frame, concatenated one at a time.
+    segments = [frames[i % len(frames)].tobytes() for i in range(int(args.retention * 1000 / FRAME_MS))]
+    t = time.perf_counter()
+    combined = b""
+    for segment in segments:
+        combined += segment
+    print(f"concatenating {len(segments):,} segments one by one: {(time.perf_counter() - t) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
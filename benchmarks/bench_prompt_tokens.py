@@ -0,0 +1,90 @@
+"""
+Tokens and CPU per chat turn for the system prompt, before and after caching.
+
+    python -m benchmarks.bench_prompt_tokens
+    python -m benchmarks.bench_prompt_tokens --cmdb cmdb.json --logs logs.txt
+
+"Before" rebuilds the original prompt (indented JSON CMDB, raw logs, state
+at the end) on every turn; "after" is incident_chat.build_messages for each
+agent that calls the model.
+"""
+import argparse
+import json
+import time
+
+import incident_chat
+from benchmarks.sample_data import SAMPLE_CMDB, SAMPLE_LOGS
+from log_templates import TemplateMiner
+from prompt_context import estimate_tokens
+
+STATES = ["app_selection", "joined_bridge", "in_flow", "analysis_done"]
+AGENTS = ["3", "4", "5"]
+
+
+def legacy_system_prompt(conversation_state, cmdb_data, simulated_logs):
+    return f"""You are a Major Incident Manager bot. Your goal is to guide the user through a structured incident response workflow. Your responses must be concise, specific, and formatted for a chat interface.
+                        * **Agent 1 (Triage):** Greets the user and asks for the application name.
+                        * **Agent 2 (CMDB):** Performs a lookup based on the user's input. If found, it provides a message and a JSON object with associated CIs.
+                        * **Agent 3 (Log Analysis):** Summarizes the provided logs and sends the findings to Agent 4 for RCA. It also provides the full logs.
+                        * **Agent 4 (RCA):** Provides the root cause, fix, and preventative measures.
+                        * **Agent 5 (Helper):** Provides guidance if the user enters an unexpected command.
+                    
+                    Your responses should always begin with the format "Agent X:" where X is the agent number. This is critical for the UI to display the correct agent name.
+                    
+                    Use the following data as your context:
+                    
+                    CMDB Data:
+                    {json.dumps(cmdb_data, indent=2)}
+                    
+                    Simulated Logs:
+                    {simulated_logs}
+                    
+                    Current conversation state: {conversation_state}"""
+
+
+def shared_prefix_chars(prompts):
+    first = prompts[0]
+    length = len(first)
+    for prompt in prompts[1:]:
+        length = min(length, len(prompt))
+        for i in range(length):
+            if prompt[i] != first[i]:
+                length = i
+                break
+    return length
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cmdb", help="CMDB JSON file (defaults to the index.html sample)")
+    parser.add_argument("--logs", help="Log file (defaults to the index.html sample)")
+    parser.add_argument("--turns", type=int, default=1000)
+    args = parser.parse_args()
+
+    cmdb = json.loads(open(args.cmdb).read()) if args.cmdb else SAMPLE_CMDB
+    logs = open(args.logs).read() if args.logs else SAMPLE_LOGS
+    app_data = {"cmdb": cmdb, "log_templates": TemplateMiner.from_text(logs).summary(), "version": ("benchmark",)}
+    user_input = "SAP S/4HANA"
+
+    start = time.perf_counter()
+    for turn in range(args.turns):
+        legacy_system_prompt(STATES[turn % len(STATES)], cmdb, logs)
+    legacy_us = (time.perf_counter() - start) / args.turns * 1e6
+
+    start = time.perf_counter()
+    for turn in range(args.turns):
+        incident_chat.build_messages(AGENTS[turn % len(AGENTS)], user_input, app_data)
+    cached_us = (time.perf_counter() - start) / args.turns * 1e6
+
+    legacy = [legacy_system_prompt(state, cmdb, logs) + user_input for state in STATES]
+    cached = ["".join(m["content"] for m in incident_chat.build_messages(agent, user_input, app_data)) for agent in AGENTS]
+    legacy_prefix = estimate_tokens(legacy[0][:shared_prefix_chars(legacy)])
+    cached_prefix = estimate_tokens(cached[0][:shared_prefix_chars(cached)])
+
+    print(f"{'':<8}{'tokens/request':>16}{'cacheable prefix':>18}{'build us/turn':>15}")
+    print(f"{'before':<8}{estimate_tokens(legacy[0]):>16}{legacy_prefix:>18}{legacy_us:>15.1f}")
+    print(f"{'after':<8}{estimate_tokens(cached[0]):>16}{cached_prefix:>18}{cached_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
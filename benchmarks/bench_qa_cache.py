@@ -0,0 +1,105 @@
+"""
+Fill the Agent 5 Q&A cache with 100k questions and time exact, paraphrased
+and missing lookups, then replay a bridge's question stream for the hit rate.
+
+    python -m benchmarks.bench_qa_cache --entries 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from qa_cache import QACache, context_key
+
+COMPONENTS = ["SAP HANA DB", "Salesforce Integration Server", "SAP-Salesforce Interface", "PostgreSQL DB A",
+              "Web Server 1", "NGINX Load Balancer", "Billing Microservice", "MySQL DB", "Legacy Mainframe"]
+# (question, paraphrase) pairs as heard on bridges
+QUESTIONS = [
+    ("What's the root cause?", "what is the root cause of this"),
+    ("Which DB is affected?", "which databases are impacted"),
+    ("When did the errors start on {c}?", "when did errors start on the {c}"),
+    ("Is {c} affected?", "is the {c} impacted right now"),
+    ("Show me the warnings for {c} after 22:{m:02d}", "any warnings for {c} after 22:{m:02d}?"),
+    ("How many errors did {c} log?", "how many errors were logged by {c}"),
+    ("What is the fix for {c}?", "whats the fix for the {c}"),
+]
+
+
+def question(rng, paraphrase=False, components=COMPONENTS):
+    return pick(rng, components)[paraphrase]
+
+
+def pick(rng, components=COMPONENTS):
+    """A random (question, paraphrase) pair"""
+    pair = rng.choice(QUESTIONS)
+    fields = {"c": rng.choice(components), "m": rng.randrange(0, 60, 15)}
+    return tuple(text.format(**fields) for text in pair)
+
+
+def timed(cache, context, questions):
+    times, hits = [], 0
+    for text in questions:
+        started = time.perf_counter()
+        hits += cache.get(context, text) is not None
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.99)], hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    cache = QACache(max_entries=args.entries)
+    # Worst case: every entry in one incident context, each question with a unique ticket number.
+    context = context_key("incident", 1)
+    started = time.perf_counter()
+    stored = []
+    for n in range(args.entries):
+        text, paraphrase = pick(rng)
+        cache.put(context, f"{text} ticket {n}", f"answer {n}")
+        stored.append((f"{text} ticket {n}", f"{paraphrase} ticket {n}"))
+    print(f"{args.entries} entries cached in {time.perf_counter() - started:.1f}s")
+
+    samples = rng.sample(stored, args.lookups)
+    cases = [
+        ("exact", [text for text, _ in samples]),
+        ("paraphrased", [paraphrase for _, paraphrase in samples]),
+        ("miss", [f"{question(rng)} ticket {args.entries + n}" for n in range(args.lookups)]),
+    ]
+    print(f"\n{'lookup':>12} {'p50':>8} {'p99':>8} {'hits':>6}")
+    for name, questions in cases:
+        p50, p99, hits = timed(cache, context, questions)
+        print(f"{name:>12} {p50:6.3f}ms {p99:6.3f}ms {hits / len(questions):6.0%}")
+
+    # A bridge: 50 incidents touching three components each, 40 questions per
+    # incident from several participants, half phrased the way someone else already asked.
+    cache = QACache()
+    model_calls = 0
+    for incident in range(50):
+        context = context_key("incident", incident)
+        components = rng.sample(COMPONENTS, 3)
+        for _ in range(40):
+            text = question(rng, paraphrase=rng.random() < 0.5, components=components)
+            if cache.get(context, text) is None:
+                model_calls += 1
+                cache.put(context, text, "answer")
+    stats = cache.stats()
+    print(f"\nbridge replay: {model_calls} model calls for 2000 questions, "
+          f"{stats['exact_hits']} exact + {stats['similar_hits']} paraphrase hits ({stats['hit_rate']:.0%})")
+
+    now = [0.0]
+    cache = QACache(max_entries=2, ttl=60, clock=lambda: now[0])
+    cache.put("ctx", "root cause?", "a")
+    cache.put("ctx", "which db is affected?", "b")
+    cache.put("ctx", "when did it start?", "c")
+    now[0] = 61
+    assert cache.get("ctx", "root cause?") is None and cache.get("ctx", "when did it start?") is None
+    print(f"eviction check: {cache.stats()['evictions']} LRU eviction, {cache.stats()['expirations']} expiry")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Provider calls under a rate limit: 429s, failures and latency with the old
+retry policy versus the shared limiter, plus priority classes and request
+coalescing, against a stub that enforces its own quota.
+
+    python -m benchmarks.bench_rate_limiter --quota 25 --requests 300 --threads 40
+
+"old retries" is the previous _send loop: jittered backoff, Retry-After
+ignored, every thread on its own. "Retry-After only" lifts the local limits,
+so the provider's 429s pause the model for every caller. "limiter" also
+spaces requests at 90% of the quota so 429s rarely happen at all.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import requests
+
+import http_client
+import rate_limiter
+from benchmarks.stub_openai import start_stub_server
+from rate_limiter import BACKGROUND, INTERACTIVE, RateLimiter
+
+MODEL = "gpt-4o-mini"
+UNLIMITED = {MODEL: {"requests": 10 ** 9, "tokens": None}}
+
+
+def payload(text):
+    return {"model": MODEL, "messages": [{"role": "user", "content": text}], "max_tokens": 50}
+
+
+_old_session = requests.Session()
+
+
+def old_post(url, body):
+    """http_client._send before the shared limiter"""
+    session = _old_session
+    attempt = 0
+    while True:
+        response = session.post(url, json=body, timeout=(5, 60))
+        if response.status_code in http_client.RETRY_STATUSES and attempt < http_client.MAX_RETRIES:
+            response.close()
+            time.sleep(http_client.backoff_delay(attempt))
+            attempt += 1
+            continue
+        response.raise_for_status()
+        return response.json()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def use_limits(model_limits):
+    # http_client always asks get_rate_limiter(), so swap the process-wide instance.
+    rate_limiter._rate_limiter = RateLimiter(model_limits)
+
+
+def load(server, url, label, post, count, threads):
+    server.counts = {"requests": 0, "throttled": 0}
+    latencies, failures = [], 0
+
+    def call(number):
+        started = time.perf_counter()
+        try:
+            post(url, payload(f"{label} request {number}"))
+        except (requests.HTTPError, aiohttp.ClientResponseError):
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for latency in pool.map(call, range(count)):
+            if latency is None:
+                failures += 1
+            else:
+                latencies.append(latency)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<18} {len(latencies) / elapsed:7.1f} {failures:9d} {server.counts['throttled']:6d} "
+          f"{percentile(latencies, 0.5):7.0f}ms {percentile(latencies, 0.99):7.0f}ms")
+
+
+def priorities(url, quota, background, interactive):
+    """Background work queued first, interactive requests arriving just after it"""
+    use_limits({MODEL: {"requests": quota * 60, "tokens": None}})
+    waits = {INTERACTIVE: [], BACKGROUND: []}
+
+    def call(args):
+        number, priority = args
+        if priority == INTERACTIVE:
+            time.sleep(0.2)
+        started = time.perf_counter()
+        http_client.post_json(url, payload(f"priority {priority} request {number}"), priority=priority)
+        waits[priority].append((time.perf_counter() - started) * 1000)
+
+    jobs = [(n, BACKGROUND) for n in range(background)] + [(n, INTERACTIVE) for n in range(interactive)]
+    with ThreadPoolExecutor(len(jobs)) as pool:
+        list(pool.map(call, jobs))
+    print(f"\npriority at {quota} req/s: {background} background requests queued, then {interactive} interactive")
+    for priority, name in ((INTERACTIVE, "interactive"), (BACKGROUND, "background")):
+        print(f"  {name:<12} p50 {percentile(waits[priority], 0.5):6.0f} ms  p99 {percentile(waits[priority], 0.99):6.0f} ms")
+
+
+def coalescing(server, url, callers):
+    use_limits(UNLIMITED)
+    server.counts = {"requests": 0, "throttled": 0}
+    with ThreadPoolExecutor(callers) as pool:
+        results = list(pool.map(lambda _: http_client.post_json(url, payload("What is the status of SAP S/4HANA?")),
+                                range(callers)))
+    threaded = server.counts["requests"]
+
+    async def concurrent():
+        async with http_client.async_client() as client:
+            return await asyncio.gather(*(http_client.post_json_async(client, url, payload("Which CIs are impacted?"))
+                                          for _ in range(callers)))
+
+    server.counts = {"requests": 0, "throttled": 0}
+    async_results = asyncio.run(concurrent())
+    assert len(results) == len(async_results) == callers
+    print(f"\n{callers} identical concurrent requests reach the provider as: {threaded} (threads), "
+          f"{server.counts['requests']} (asyncio)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quota", type=int, default=25, help="Stub requests per second before it answers 429")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds per request")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, requests_per_second=args.quota)
+    url = base_url + "/chat/completions"
+    try:
+        print(f"stub quota {args.quota} req/s, {args.requests} requests from {args.threads} threads\n")
+        print(f"{'policy':<18} {'req/s':>7} {'failures':>9} {'429s':>6} {'p50':>9} {'p99':>9}")
+        load(server, url, "old retries", old_post, args.requests, args.threads)
+        use_limits(UNLIMITED)
+        load(server, url, "Retry-After only", http_client.post_json, args.requests, args.threads)
+        use_limits({MODEL: {"requests": args.quota * 60 * 0.9, "tokens": None}})
+        load(server, url, "limiter", http_client.post_json, args.requests, args.threads)
+        priorities(url, args.quota, background=100, interactive=10)
+        coalescing(server, url, callers=50)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
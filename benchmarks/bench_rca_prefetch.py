@@ -0,0 +1,65 @@
+"""
+Time from the "Generate RCA & Fix" click to the report, with the RCA
+computed on click versus precomputed in the background as soon as Agent 3's
+summary exists, for a range of times the user spends before clicking.
+
+    python -m benchmarks.bench_rca_prefetch --rca-latency 3
+
+Also checks that a report prefetched for a different summary is rejected.
+"""
+import argparse
+import hashlib
+import time
+
+import http_client
+from agent_orchestrator import AgentRun, AgentTask
+from benchmarks.stub_openai import start_stub_server
+
+AGENT_4_PROMPT = "You are Agent 4, a Root Cause Analysis specialist."
+
+
+def rca_key(user_prompt):
+    return hashlib.sha256(f"{AGENT_4_PROMPT}\0{user_prompt}".encode()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rca-latency", type=float, default=3.0, help="Stub seconds per RCA completion")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.rca_latency)
+    url = base_url + "/chat/completions"
+
+    def generate(inputs):
+        user_prompt = f"Log summary: {inputs['log_summary']}"
+        report = http_client.post_json(url, {"model": "stub", "messages": [
+            {"role": "system", "content": AGENT_4_PROMPT}, {"role": "user", "content": user_prompt}]})
+        return {"key": rca_key(user_prompt), "report": report["choices"][0]["message"]["content"]}
+
+    def click(run, log_summary):
+        clicked = time.perf_counter()
+        prefetch = run.result("rca", timeout=60) if run else None
+        if prefetch is None or prefetch["key"] != rca_key(f"Log summary: {log_summary}"):
+            prefetch = generate({"log_summary": log_summary})
+        return (time.perf_counter() - clicked) * 1000
+
+    summary = "SSL handshake failures on the SAP-Salesforce Interface; SAP connection failures downstream."
+    print(f"RCA takes {args.rca_latency:.1f}s at the stub\n")
+    print(f"{'think time':>10} {'on click':>10} {'prefetched':>11}")
+    for think in (0.0, 1.0, 2.0, args.rca_latency + 0.5):
+        time.sleep(0.05)
+        on_click = click(None, summary)
+        run = AgentRun([AgentTask("rca", lambda inputs: generate({"log_summary": summary}))]).start()
+        time.sleep(think)
+        prefetched = click(run, summary)
+        print(f"{think:9.1f}s {on_click:8.0f} ms {prefetched:8.0f} ms")
+
+    run = AgentRun([AgentTask("rca", lambda inputs: generate({"log_summary": summary}))]).start()
+    run.result("rca", timeout=60)
+    stale = click(run, summary + " Also a DNS outage.")
+    print(f"\nsummary changed after prefetch: stale report rejected, recomputed in {stale:.0f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Cost of tracing the hot path: per span, per chat turn (traced versus
+disabled) and with the sampling profiler on, plus the waterfall and
+Prometheus output for one incident.
+
+    python -m benchmarks.bench_tracing --spans 100000 --incidents 50
+
+Turns run through incident_chat.chat_turn_async against the stub model
+backend with no latency, so the tracing overhead is not hidden by it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import http_client
+import incident_chat
+import tracing
+from benchmarks.bench_conversation import SCRIPT
+from benchmarks.sample_data import SAMPLE_CMDB, SAMPLE_LOGS
+from benchmarks.stub_openai import start_stub_server
+from conversation import ConversationStore
+
+
+def span_cost(tracer, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        with tracer.span("bench", trace_id="bench", tokens=1):
+            pass
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def run_incidents(app_data, incidents, prefix):
+    store = ConversationStore()
+    turn_ms = []
+    async with http_client.async_client() as client:
+        for number in range(incidents):
+            conversation = store.get(f"{prefix}-{number}")
+            for text, action in SCRIPT:
+                started = time.perf_counter()
+                await incident_chat.chat_turn_async(client, "stub", conversation, text, app_data, action)
+                turn_ms.append((time.perf_counter() - started) * 1000)
+    return sum(turn_ms) / len(turn_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", type=int, default=100_000)
+    parser.add_argument("--incidents", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--profile-interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tracing-bench-")
+    server, base_url = start_stub_server()
+    try:
+        cmdb_path = os.path.join(workdir, "cmdb.json")
+        logs_path = os.path.join(workdir, "logs.txt")
+        with open(cmdb_path, "w") as f:
+            json.dump(SAMPLE_CMDB, f)
+        with open(logs_path, "w") as f:
+            f.write(SAMPLE_LOGS)
+        app_data = incident_chat.load_app_data(cmdb_path, logs_path)
+        incident_chat.OPENAI_CHAT_URL = base_url + "/chat/completions"
+
+        jsonl_path = os.path.join(workdir, "spans.jsonl")
+        print(f"{'':<28}{'us/span':>10}")
+        print(f"{'disabled':<28}{span_cost(tracing.Tracer(enabled=False), args.spans):>10.2f}")
+        print(f"{'in memory':<28}{span_cost(tracing.Tracer(), args.spans):>10.2f}")
+        jsonl_tracer = tracing.Tracer(jsonl_path)
+        print(f"{'in memory + JSONL':<28}{span_cost(jsonl_tracer, args.spans):>10.2f}")
+        jsonl_tracer.close()
+        print(f"{'JSONL bytes per span':<28}{os.path.getsize(jsonl_path) / args.spans:>10.0f}\n")
+
+        tracer = tracing.get_tracer()
+        asyncio.run(run_incidents(app_data, 5, "warmup"))
+        # Rounds alternate between settings and keep each one's best, so drift
+        # on a shared machine does not land on a single setting.
+        results = {"tracing disabled": [], "traced": []}
+        for round_number in range(args.rounds):
+            for label in results:
+                tracer.enabled = label != "tracing disabled"
+                results[label].append(asyncio.run(run_incidents(app_data, args.incidents, f"{label}-{round_number}")))
+        tracer.enabled = True
+        tracer.start_profiler(args.profile_interval)
+        results["traced + profiler"] = [asyncio.run(run_incidents(app_data, args.incidents, "profiled"))]
+        results = [(label, min(turn_ms)) for label, turn_ms in results.items()]
+        baseline = results[0][1]
+        print(f"{'':<28}{'ms/turn':>10}{'overhead':>10}")
+        for label, turn_ms in results:
+            print(f"{label:<28}{turn_ms:>10.3f}{(turn_ms - baseline) / baseline * 100:>9.1f}%")
+        tracer.profiler.stop()
+
+        print("\nwaterfall for one incident:")
+        for row in tracer.waterfall("traced-0-0"):
+            attrs = {key: value for key, value in row["attrs"].items() if key in ("state", "prompt_tokens", "response_bytes", "status")}
+            print(f"  {row['start_ms']:8.1f} ms {row['duration_ms']:7.2f} ms  {'  ' * row['depth']}{row['name']} {attrs or ''}")
+
+        print("\nPrometheus excerpt:")
+        for line in tracer.render_prometheus().splitlines():
+            if line.startswith(("incident_span_duration_seconds_count", "incident_span_units_total")):
+                print(f"  {line}")
+        hottest = sorted(tracer.profiler.samples.items(), key=lambda item: -item[1])[:3]
+        print(f"\nprofiler: {sum(tracer.profiler.samples.values())} samples; hottest stacks (leaf frames):")
+        for stack, count in hottest:
+            frames = stack.split(";")
+            print(f"  {count:5d}  {frames[0]} ... {';'.join(frames[-3:])}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
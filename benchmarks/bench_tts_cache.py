@@ -0,0 +1,89 @@
+"""
+Replay the agent lines of repeated bridge calls through the TTS cache against
+the stub TTS endpoint and report latency, hit rate and eviction behaviour.
+
+    python -m benchmarks.bench_tts_cache --calls 20
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import http_client
+from benchmarks.stub_openai import start_stub_server
+from tts_cache import TTSCache
+from tts_pipeline import speak_text
+
+FIXED_LINES = [
+    "Welcome to the Major Incident bridge. Please tell me which application is having issues.",
+    "Joining the bridge call now...",
+    "I have completed the analysis and generated the final report. This incident bridge can now be closed.",
+    "I'm sorry, I couldn't find 'sap s4' in our CMDB. Did you mean 'SAP S/4HANA'? Please select a valid application from the list on the right.",
+]
+APPS = ["Web Storefront", "SAP S/4HANA", "Salesforce CRM", "Billing Microservice"]
+
+
+def call_lines(rng):
+    """Lines spoken during one bridge call: the fixed ones plus a few call-specific answers"""
+    lines = list(FIXED_LINES)
+    app = rng.choice(APPS)
+    lines.append(f"I have identified {app} and its associated CIs. Agent 3 will now extract the logs.")
+    lines.append(f"The error rate on {app} started at 22:{rng.randrange(60):02d}. Ticket {rng.randrange(10 ** 5)} is open.")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--tts-char-delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(tts_char_delay=args.tts_char_delay)
+    tts_url = base_url + "/audio/speech"
+    requests_sent = []
+
+    def synthesize(text):
+        requests_sent.append(text)
+        return http_client.post_bytes(tts_url, {"model": "tts-1", "voice": "alloy", "input": text})
+
+    directory = tempfile.mkdtemp(prefix="tts-cache-bench-")
+    try:
+        cache = TTSCache(directory)
+        rng = random.Random(2)
+        latencies = {"hit": [], "miss": []}
+        for _ in range(args.calls):
+            for line in call_lines(rng):
+                before = len(requests_sent)
+                started = time.perf_counter()
+                speech = speak_text(line, lambda chunk: cache.get_or_synthesize(chunk, "alloy", "tts-1", synthesize))
+                list(speech.audio())
+                kind = "miss" if len(requests_sent) > before else "hit"
+                latencies[kind].append((time.perf_counter() - started) * 1000)
+        stats = cache.stats()
+        print(f"{args.calls} calls: {len(requests_sent)} TTS requests, hit rate {stats['hit_rate']:.0%}")
+        for kind, samples in latencies.items():
+            print(f"  line with {kind:<4} p50 {statistics.median(samples):8.2f} ms  ({len(samples)} lines)")
+
+        restarted = TTSCache(directory)
+        before = len(requests_sent)
+        started = time.perf_counter()
+        speech = speak_text(FIXED_LINES[0], lambda chunk: restarted.get_or_synthesize(chunk, "alloy", "tts-1", synthesize))
+        list(speech.audio())
+        print(f"after restart: welcome line from disk in {(time.perf_counter() - started) * 1000:.2f} ms, "
+              f"{len(requests_sent) - before} TTS requests, {restarted.stats()['disk_hits']} disk hits")
+
+        small = TTSCache(f"{directory}/bounded", memory_max_bytes=20_000, disk_max_bytes=40_000)
+        for i in range(50):
+            small.get_or_synthesize(f"Status update {i}: still investigating.", "alloy", "tts-1", synthesize)
+        stats = small.stats()
+        print(f"bounded cache: memory {stats['memory_bytes']:,} B / 20,000, disk {stats['disk_bytes']:,} B / 40,000, "
+              f"{stats['memory_evictions']} memory and {stats['disk_evictions']} disk evictions")
+    finally:
+        shutil.rmtree(directory)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
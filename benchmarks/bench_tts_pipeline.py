@@ -0,0 +1,89 @@
+"""
+Time to first audio for a spoken agent reply against a local stub of the
+chat and TTS endpoints.
+
+    python -m benchmarks.bench_tts_pipeline --token-delay 0.01 --tts-char-delay 0.002
+
+Three strategies are compared: the old one (wait for the whole reply, then
+synthesize it in one request), chunked synthesis after the reply is
+complete, and chunks synthesized on the worker pool while the reply streams.
+"""
+import argparse
+import statistics
+import time
+
+import http_client
+from benchmarks.stub_openai import start_stub_server
+from tts_pipeline import TTSPipeline, speak_text
+
+REPLY = (
+    "Agent 4: The root cause is an expired SSL certificate on the SAP-Salesforce Interface. "
+    "Because the handshake fails, the Data Integration Service cannot reach SAP, and orders from the "
+    "Web Storefront time out waiting on it. The repeated retries also explain the burst of failed "
+    "logins on the SAP HANA DB. To fix it, renew the certificate on the interface and restart the "
+    "integration service so it picks up the new chain. Then replay the queued orders. Going forward, "
+    "add certificate expiry to monitoring with a thirty day warning, and document the renewal in the runbook."
+)
+
+
+def run(base_url, strategy):
+    chat_url = base_url + "/chat/completions"
+    tts_url = base_url + "/audio/speech"
+
+    def synthesize(text):
+        return http_client.post_bytes(tts_url, {"model": "tts-1", "voice": "alloy", "input": text})
+
+    def tokens():
+        for event in http_client.stream_sse(chat_url, {"model": "stub", "messages": [], "stream": True}):
+            yield event["choices"][0]["delta"]["content"]
+
+    started = time.perf_counter()
+    if strategy == "whole reply":
+        reply = "".join(tokens())
+        audio = [synthesize(reply)]
+        first = time.perf_counter()
+    else:
+        audio = []
+        first = None
+        if strategy == "chunks after reply":
+            speech = speak_text("".join(tokens()), synthesize)
+        else:
+            speech = TTSPipeline(synthesize)
+            # As in the app: play whatever is ready between tokens.
+            for token in tokens():
+                speech.feed(token)
+                for _, chunk in speech.ready():
+                    first = first or time.perf_counter()
+                    audio.append(chunk)
+            speech.close()
+        for _, chunk in speech.audio():
+            first = first or time.perf_counter()
+            audio.append(chunk)
+    done = time.perf_counter()
+    return (first - started) * 1000, (done - started) * 1000, audio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed 4-char tokens")
+    parser.add_argument("--tts-char-delay", type=float, default=0.002, help="Seconds of synthesis per character")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(token_delay=args.token_delay, tts_char_delay=args.tts_char_delay, reply=REPLY)
+    print(f"reply {len(REPLY)} chars, token delay {args.token_delay * 1000:.0f} ms, "
+          f"synthesis {args.tts_char_delay * 1000:.1f} ms/char\n")
+    print(f"{'strategy':<24} {'first audio p50':>16} {'all audio p50':>14} {'requests':>9}")
+    for strategy in ("whole reply", "chunks after reply", "pipelined with stream"):
+        results = [run(base_url, strategy) for _ in range(args.runs)]
+        first = statistics.median(r[0] for r in results)
+        total = statistics.median(r[1] for r in results)
+        audio = results[-1][2]
+        # Chunking drops inter-sentence whitespace and adds a header per chunk.
+        assert abs(sum(len(a) for a in audio) - (len(REPLY) * 64 + 3)) < len(audio) * 64 * 2
+        print(f"{strategy:<24} {first:>13.0f} ms {total:>11.0f} ms {len(audio):>9}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measure what voice activity detection saves before speech_to_text: bytes
+uploaded, transcription latency against the stub transcription endpoint,
+and how long after the speaker stops an utterance is closed.
+
+    python -m benchmarks.bench_vad
+    python -m benchmarks.bench_vad --wav bridge1.wav --wav bridge2.wav
+
+Without --wav, fixtures are synthesized: voiced, syllable-modulated
+harmonics (known utterance boundaries) over background noise.
+"""
+import argparse
+import io
+import statistics
+import time
+import wave
+
+import numpy as np
+import requests
+
+from benchmarks.stub_openai import start_stub_server
+from vad import UtteranceDetector, speech_segments, trim_to_speech
+
+SAMPLE_RATE = 48000
+CHUNK_MS = 20
+
+
+def synthetic_fixture(seed, length=20.0, sample_rate=SAMPLE_RATE):
+    """(mono int16 samples, [(start_s, end_s)]) with speech-like bursts over room noise"""
+    rng = np.random.default_rng(seed)
+    utterances = []
+    cursor = rng.uniform(0.5, 2.0)
+    while cursor < length - 4:
+        duration = rng.uniform(0.8, 3.5)
+        utterances.append((cursor, duration))
+        cursor += duration + rng.uniform(1.0, 5.0)
+    t = np.arange(int(length * sample_rate)) / sample_rate
+    audio = rng.normal(0, 60, len(t))
+    truth = []
+    for start, duration in utterances:
+        span = (t >= start) & (t < start + duration)
+        local = t[span] - start
+        pitch = 110 + 30 * np.sin(2 * np.pi * 0.7 * local)
+        phase = 2 * np.cumsum(np.pi * pitch / sample_rate)
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+        syllables = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * local) ** 2
+        audio[span] += 2500 * voiced * syllables
+        truth.append((start, start + duration))
+    return np.clip(audio, -32768, 32767).astype(np.int16), truth
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as wav:
+        assert wav.getsampwidth() == 2, "16-bit PCM WAV expected"
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        return samples, wav.getframerate()
+
+
+def wav_bytes(samples, sample_rate, channels=1):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return out.getvalue()
+
+
+def transcribe(session, url, audio):
+    started = time.perf_counter()
+    response = session.post(url, files={"file": ("audio.wav", audio, "audio/wav")}, data={"model": "whisper-1"})
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def end_of_speech_delays(samples, sample_rate, truth):
+    """Audio time from each true utterance end until the streaming detector closes it"""
+    detector = UtteranceDetector(sample_rate)
+    chunk = sample_rate * CHUNK_MS // 1000
+    closed = []
+    for offset in range(0, len(samples), chunk):
+        if detector.feed(samples[offset:offset + chunk]):
+            closed.append((offset + chunk) / sample_rate)
+    delays = []
+    for _, end in truth:
+        after = [c for c in closed if c >= end]
+        if after:
+            delays.append((after[0] - end) * 1000)
+    return delays, len(closed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wav", action="append", default=[], help="16-bit PCM WAV fixture (repeatable)")
+    parser.add_argument("--upload-mbps", type=float, default=8.0, help="Simulated uplink for the stub, Mbit/s")
+    args = parser.parse_args()
+
+    if args.wav:
+        fixtures = [(path, *read_wav(path), None) for path in args.wav]
+    else:
+        fixtures = []
+        for seed in range(4):
+            samples, truth = synthetic_fixture(seed)
+            fixtures.append((f"synthetic-{seed}", samples, SAMPLE_RATE, truth))
+
+    server, base_url = start_stub_server(latency=0.15, transcribe_byte_delay=8 / (args.upload_mbps * 1e6))
+    url = base_url + "/audio/transcriptions"
+    session = requests.Session()
+    session.trust_env = False
+    print(f"{'fixture':<14} {'audio':>6} {'speech':>7} {'upload full':>12} {'upload VAD':>11} "
+          f"{'latency full':>13} {'latency VAD':>12} {'VAD cost':>9} {'end-of-speech':>14}")
+    for name, samples, sample_rate, truth in fixtures:
+        started = time.perf_counter()
+        speech = trim_to_speech(samples, sample_rate)
+        vad_ms = (time.perf_counter() - started) * 1000
+        full, trimmed = wav_bytes(samples, sample_rate), wav_bytes(speech, sample_rate)
+        full_ms, trimmed_ms = transcribe(session, url, full), transcribe(session, url, trimmed)
+        delay = "n/a"
+        if truth:
+            delays, closed = end_of_speech_delays(samples, sample_rate, truth)
+            found = speech_segments(samples, sample_rate)
+            assert len(found) == len(truth) == closed, (found, truth, closed)
+            delay = f"{statistics.median(delays):.0f} ms"
+        print(f"{name:<14} {len(samples) / sample_rate:5.1f}s {len(speech) / sample_rate:6.1f}s "
+              f"{len(full) / 1024:9.0f} KB {len(trimmed) / 1024:8.0f} KB {full_ms:10.0f} ms {trimmed_ms:9.0f} ms "
+              f"{vad_ms:6.1f} ms {delay:>14}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Sample and synthetic incident data shared by the benchmarks."""
+
+# Same CIs as the CMDB embedded in index.html.
+SAMPLE_CMDB = [
+    {"id": "app-a", "type": "Application", "name": "Web Storefront", "associated_cis": ["lb-a", "web-s-1", "web-s-2", "pg-db-a", "data-int-svc", "pay-api"]},
+    {"id": "app-b", "type": "Application", "name": "SAP S/4HANA", "associated_cis": ["sap-as-1", "hana-db"]},
+    {"id": "app-c", "type": "Application", "name": "Salesforce CRM", "associated_cis": ["sf-int-s", "data-int-svc"]},
+    {"id": "app-d", "type": "Application", "name": "Legacy Mainframe", "associated_cis": ["mf-z"]},
+    {"id": "data-int-svc", "type": "Application", "name": "Data Integration Service", "associated_cis": ["sap-sf-if", "sf-int-s", "web-s-1"]},
+    {"id": "app-f", "type": "Application", "name": "Billing Microservice", "associated_cis": ["bill-host", "mysql-db"]},
+    {"id": "app-g", "type": "Application", "name": "Reporting Dashboard", "associated_cis": ["report-host", "pg-db-a"]},
+    {"id": "lb-a", "type": "Load Balancer", "name": "NGINX Load Balancer"},
+    {"id": "web-s-1", "type": "Server", "name": "Web Server 1"},
+    {"id": "web-s-2", "type": "Server", "name": "Web Server 2"},
+    {"id": "web-s-3", "type": "Server", "name": "Web Server 3"},
+    {"id": "pg-db-a", "type": "Database", "name": "PostgreSQL DB A"},
+    {"id": "hana-db", "type": "Database", "name": "SAP HANA DB"},
+    {"id": "mysql-db", "type": "Database", "name": "MySQL DB B"},
+    {"id": "sap-as-1", "type": "Server", "name": "SAP Application Server"},
+    {"id": "sf-int-s", "type": "Server", "name": "Salesforce Integration Server"},
+    {"id": "mf-z", "type": "Server", "name": "Mainframe Host Z"},
+    {"id": "bill-host", "type": "Server", "name": "Billing Service Host"},
+    {"id": "report-host", "type": "Server", "name": "Reporting Host"},
+    {"id": "sap-sf-if", "type": "Interface", "name": "SAP-Salesforce Interface"},
+    {"id": "pay-api", "type": "API", "name": "Payment Gateway API"},
+    {"id": "mon-agent-a", "type": "Agent", "name": "Monitoring Agent A"},
+    {"id": "net-firewall", "type": "Network", "name": "Network Firewall"},
+    {"id": "dns-svc", "type": "Service", "name": "DNS Service"},
+    {"id": "email-svc", "type": "Service", "name": "Email Notification Service"},
+]
+
+SAMPLE_LOGS = """
+            2025-09-03 22:15:01 [ERROR] [Web Storefront] - Failed to submit order, dependency timeout.
+            2025-09-03 22:15:02 [ERROR] [Data Integration Service] - Connection to SAP system failed.
+            2025-09-03 22:15:03 [WARN] [SAP HANA DB] - High volume of failed login attempts from 'Data Integration Service'.
+            2025-09-03 22:15:04 [INFO] [Web Server 1] - Health check passed.
+            2025-09-03 22:15:05 [INFO] [Web Server 2] - Health check passed.
+            2025-09-03 22:15:06 [ERROR] [SAP-Salesforce Interface] - SSL Handshake failed, certificate expired.
+            2025-09-03 22:15:07 [ERROR] [Data Integration Service] - Unable to submit data to SAP.
+        """
+
+
+def synthetic_cmdb(size, seed=7):
+    """
+    A CMDB of roughly ``size`` CIs shaped like the sample: applications with
+    their own servers (which point back at the application), databases shared
+    between a few applications, and cross-application integrations.
+    """
+    import random
+
+    rng = random.Random(seed)
+    records = []
+    apps = max(1, size // 20)
+    databases = max(1, apps // 3)
+    for d in range(databases):
+        records.append({"id": f"db-{d}", "type": "Database", "name": f"Database {d}", "associated_cis": []})
+    per_app = max(1, (size - databases) // apps)
+    for a in range(apps):
+        app_id = f"app-{a}"
+        deps = []
+        for s in range(per_app - 1):
+            server_id = f"srv-{a}-{s}"
+            records.append({"id": server_id, "type": "Server", "name": f"Server {a}-{s}", "associated_cis": [app_id]})
+            deps.append(server_id)
+        deps.append(f"db-{rng.randrange(databases)}")
+        if a and rng.random() < 0.3:
+            deps.append(f"app-{rng.randrange(a)}")
+        records.append({"id": app_id, "type": "Application", "name": f"Application {a}", "associated_cis": deps})
+    return records
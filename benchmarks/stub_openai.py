@@ -0,0 +1,185 @@
+"""
+Local stand-in for the OpenAI HTTP API used by the benchmarks.
+
+    python -m benchmarks.stub_openai --port 8765 --latency 0.05
+
+Only the endpoints the app calls are implemented, with canned payloads and a
+configurable artificial latency. Rate limiting can be simulated with
+``--requests-per-second`` (a provider quota) and ``--failure-rate`` (random
+429s); both answer with Retry-After headers as the provider does.
+"""
+import argparse
+import json
+import math
+import random
+import socket
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_REPLY = "Agent 2: I have identified SAP S/4HANA and its associated CIs in the CMDB."
+TOKEN_SIZE = 4
+# Fake MP3 body per input character for /audio/speech.
+AUDIO_BYTES_PER_CHAR = 64
+TRANSCRIPT = "SAP S/4HANA is down for the finance team."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between requests.
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Avoid Nagle/delayed-ACK stalls between the header and body writes.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_audio(self, text):
+        # Synthesis time grows with the input, as it does for real TTS.
+        time.sleep(self.server.tts_char_delay * len(text))
+        body = b"ID3" + bytes(AUDIO_BYTES_PER_CHAR * len(text))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(text), TOKEN_SIZE):
+            chunk = {"choices": [{"delta": {"content": text[i:i + TOKEN_SIZE]}}]}
+            self.write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            time.sleep(self.server.token_delay)
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = self.read_body()
+        request = json.loads(body) if self.headers.get("Content-Type", "").startswith("application/json") else {}
+        retry_after = self.server.throttle()
+        if retry_after is not None:
+            self.send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}}, {
+                "Retry-After": str(math.ceil(retry_after)),
+                "retry-after-ms": str(int(retry_after * 1000)),
+            })
+            return
+        time.sleep(self.server.latency)
+        if self.path.endswith("/chat/completions") and request.get("stream"):
+            self.send_stream(self.server.reply)
+        elif self.path.endswith("/audio/transcriptions"):
+            # Upload and decode time grow with the size of the audio file.
+            time.sleep(self.server.transcribe_byte_delay * len(body))
+            self.send_json(200, {"text": TRANSCRIPT, "bytes": len(body)})
+        elif self.path.endswith("/audio/speech"):
+            self.send_audio(request.get("input", ""))
+        elif self.path.endswith("/chat/completions"):
+            self.send_json(200, {
+                "choices": [{"message": {"role": "assistant", "content": self.server.reply}}],
+            })
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open hundreds of connections at once.
+    request_queue_size = 1024
+
+    requests_per_second = None
+    failure_rate = 0.0
+    # Retry-After sent with a random 429.
+    retry_after = 0.5
+
+    def server_activate(self):
+        super().server_activate()
+        self.lock = threading.Lock()
+        self.window = (0, 0)
+        self.counts = {"requests": 0, "throttled": 0}
+
+    def throttle(self):
+        """Seconds the client should wait if this request is rejected with a 429, else None"""
+        with self.lock:
+            self.counts["requests"] += 1
+            now = time.monotonic()
+            retry_after = None
+            if self.requests_per_second:
+                second, used = self.window
+                if int(now) != second:
+                    second, used = int(now), 0
+                if used >= self.requests_per_second:
+                    retry_after = second + 1 - now
+                else:
+                    self.window = (second, used + 1)
+            if retry_after is None and self.failure_rate and random.random() < self.failure_rate:
+                retry_after = self.retry_after
+            if retry_after is not None:
+                self.counts["throttled"] += 1
+            return retry_after
+
+
+def start_stub_server(port=0, latency=0.0, certfile=None, keyfile=None, token_delay=0.0, tts_char_delay=0.0, reply=CANNED_REPLY,
+                      transcribe_byte_delay=0.0, requests_per_second=None, failure_rate=0.0):
+    """Start the stub on a background thread and return (server, base_url)"""
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.requests_per_second = requests_per_second
+    server.failure_rate = failure_rate
+    server.latency = latency
+    server.token_delay = token_delay
+    server.tts_char_delay = tts_char_delay
+    server.reply = reply
+    server.transcribe_byte_delay = transcribe_byte_delay
+    scheme = "http"
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"{scheme}://localhost:{port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before replying")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens")
+    parser.add_argument("--tts-char-delay", type=float, default=0.0, help="Seconds of synthesis per input character")
+    parser.add_argument("--certfile", help="PEM certificate to serve HTTPS")
+    parser.add_argument("--keyfile", help="PEM private key for --certfile")
+    parser.add_argument("--requests-per-second", type=int, help="Answer 429 beyond this many requests per second")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with a random 429")
+    args = parser.parse_args()
+    server, base_url = start_stub_server(args.port, args.latency, args.certfile, args.keyfile, args.token_delay,
+                                         args.tts_char_delay, requests_per_second=args.requests_per_second,
+                                         failure_rate=args.failure_rate)
+    print(f"Stub OpenAI API listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
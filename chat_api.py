@@ -0,0 +1,113 @@
+"""
+Chat API for index.html.
+
+    uvicorn chat_api:app --port 8502
+
+``POST /chat`` answers a turn as JSON and ``GET /chat/stream`` streams it as
+server-sent events. Each browser session is a server-side conversation (see
+conversation.py) identified by the ``session`` id the page generates, so the
+page no longer sends its state and the model is only called for replies
+that need generating. Sessions are incidents in one registry (see
+incident_registry.py): turns on the same bridge run in order, and model
+calls from all bridges share one concurrency limit, whichever endpoint the
+turn arrives on. CMDB and log data come from the process-wide data
+registry (loaded at startup, reloaded when the files change), and model
+calls go through one pooled async client, so a single process serves many
+bridge sessions concurrently. ``GET /metrics`` serves per-stage latency,
+token and byte totals for Prometheus, ``GET /profile`` the sampling
+profiler's folded stacks (with TRACE_PROFILE_INTERVAL set) for a flame
+graph, and ``GET /incidents/{id}/trace`` an incident's recent spans for the
+page's waterfall. ``GET /`` serves
+index.html itself, so the page's relative API URLs reach this app; app.py
+points the page here with ``CHAT_API_BASE`` when Streamlit serves it.
+"""
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+import http_client
+import incident_chat
+import tracing
+from data_registry import get_registry, read_text
+from incident_registry import IncidentRegistry
+from rate_limiter import get_rate_limiter
+
+
+@asynccontextmanager
+async def lifespan(app):
+    incident_chat.get_app_data()
+    app.state.http = http_client.async_client()
+    app.state.incidents = IncidentRegistry(app.state.http, os.getenv("OPENAI_API_KEY", ""))
+    yield
+    await app.state.http.close()
+    # Flushes the JSONL trace file and stops the profiler.
+    tracing.get_tracer().close()
+
+
+app = FastAPI(title="Major Incident Manager Chat API", lifespan=lifespan)
+# index.html is usually served by Streamlit on another port.
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+class ChatRequest(BaseModel):
+    session: str
+    chat: str = ""
+    action: Optional[str] = None
+
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html")
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/", response_class=HTMLResponse)
+def index():
+    return get_registry().get(INDEX_PATH, [INDEX_PATH], read_text)
+
+
+@app.post("/chat")
+async def chat(request: Request, body: ChatRequest):
+    try:
+        return await request.app.state.incidents.submit(body.session, body.chat, body.action)
+    except Exception as e:
+        return JSONResponse(status_code=502, content={"error": f"An error occurred: {e}"})
+
+
+@app.get("/chat/stream")
+async def chat_stream(request: Request, session: str, chat: str = "", action: Optional[str] = None):
+    events = request.app.state.incidents.stream(session, chat, action)
+    return StreamingResponse(
+        (format_sse(event, data) async for event, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/incidents")
+def incidents(request: Request):
+    stats = request.app.state.incidents.stats()
+    stats["rate_limits"] = get_rate_limiter().stats()
+    return stats
+
+
+@app.get("/incidents/{incident_id}/trace")
+def incident_trace(incident_id: str, limit: int = 200):
+    return {"incident": incident_id, "spans": tracing.get_tracer().waterfall(incident_id, limit)}
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(tracing.get_tracer().render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profile")
+def profile():
+    return PlainTextResponse(tracing.get_tracer().render_profile())
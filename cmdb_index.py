@@ -0,0 +1,149 @@
+from collections import deque
+
+from fuzzy_match import TrigramIndex
+
+DEPENDENCIES = "dependencies"
+DEPENDENTS = "dependents"
+BOTH = "both"
+IMPACT_CACHE_SIZE = 4096
+
+
+class CmdbIndex:
+    """
+    In-memory index over CMDB records (dicts with id, type, name and
+    associated_cis). Lookups by id or by lowercased name/alias are dict hits,
+    and each CI's associated_cis are kept as an adjacency list, together with
+    the reverse list of CIs that reference it.
+    """
+
+    def __init__(self, records):
+        self.records = tuple(records)
+        self.by_id = {}
+        self.by_name = {}
+        self.adjacency = {}
+        self.reverse_adjacency = {}
+        for ci in self.records:
+            self.by_id[ci["id"]] = ci
+            for name in [ci.get("name")] + list(ci.get("aliases") or []):
+                if name:
+                    self.by_name.setdefault(self.normalize(name), ci)
+        for ci in self.records:
+            # Dangling references (CIs missing from the CMDB) are dropped, as
+            # the old isin() filter did.
+            self.adjacency[ci["id"]] = tuple(
+                dep for dep in (ci.get("associated_cis") or []) if dep in self.by_id
+            )
+            for dep in self.adjacency[ci["id"]]:
+                self.reverse_adjacency.setdefault(dep, []).append(ci["id"])
+        self._fuzzy = None
+        self._impact = {}
+        self._closures = {}
+        for ci in self.records:
+            if ci.get("type") == "Application":
+                self.dependency_closure(ci["id"])
+
+    @staticmethod
+    def normalize(name):
+        return " ".join(str(name).lower().split())
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, ci_id):
+        return self.by_id.get(ci_id)
+
+    def find(self, name):
+        """CI whose name or alias matches, ignoring case and extra whitespace"""
+        return self.by_name.get(self.normalize(name))
+
+    def suggest(self, name, k=5, min_score=0.3):
+        """
+        Ranked (score, CI) candidates for a name with no exact match. The
+        trigram index is built on first use.
+        """
+        if self._fuzzy is None:
+            self._fuzzy = TrigramIndex(
+                (alias, ci) for ci in self.records
+                for alias in [ci.get("name")] + list(ci.get("aliases") or []) if alias
+            )
+        suggestions = []
+        seen = set()
+        for score, _, ci in self._fuzzy.search(name, k=k * 2, min_score=min_score):
+            if ci["id"] not in seen:
+                seen.add(ci["id"])
+                suggestions.append((score, ci))
+        return suggestions[:k]
+
+    def applications(self):
+        return [ci for ci in self.records if ci.get("type") == "Application"]
+
+    def dependencies(self, ci_id):
+        """Directly associated CIs"""
+        return [self.by_id[dep] for dep in self.adjacency.get(ci_id, ())]
+
+    def dependency_closure(self, ci_id):
+        """
+        Ids of every CI reachable through associated_cis, excluding ci_id itself.
+        Precomputed for applications at build time and memoized for the rest.
+        """
+        closure = self._closures.get(ci_id)
+        if closure is None:
+            seen = {ci_id}
+            queue = deque([ci_id])
+            while queue:
+                for dep in self.adjacency.get(queue.popleft(), ()):
+                    if dep not in seen:
+                        seen.add(dep)
+                        queue.append(dep)
+            seen.discard(ci_id)
+            closure = frozenset(seen)
+            self._closures[ci_id] = closure
+        return closure
+
+    def blast_radius(self, ci_id, depth=3, direction=BOTH):
+        """
+        Every CI within ``depth`` hops of ci_id, breadth first, as a tuple of
+        (ci, hops, via) where via is the id the CI was reached from.
+        ``direction`` follows associated_cis (DEPENDENCIES), the CIs that
+        reference ci_id (DEPENDENTS), or both; the CMDB records links in either
+        direction, so BOTH is the default. Cycles such as app-a <-> web-s-1
+        are visited once. Linear in the size of the subgraph and cached per
+        (ci_id, depth, direction).
+        """
+        key = (ci_id, depth, direction)
+        cached = self._impact.get(key)
+        if cached is not None:
+            return cached
+        if ci_id not in self.by_id:
+            return ()
+
+        empty = ()
+        hops = {ci_id: 0}
+        frontier = [ci_id]
+        impacted = []
+        for hop in range(1, depth + 1):
+            next_frontier = []
+            for current in frontier:
+                neighbours = []
+                if direction in (DEPENDENCIES, BOTH):
+                    neighbours.append(self.adjacency.get(current, empty))
+                if direction in (DEPENDENTS, BOTH):
+                    neighbours.append(self.reverse_adjacency.get(current, empty))
+                for ids in neighbours:
+                    for neighbour in ids:
+                        if neighbour not in hops:
+                            hops[neighbour] = hop
+                            next_frontier.append(neighbour)
+                            impacted.append((self.by_id[neighbour], hop, current))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        result = tuple(impacted)
+        if len(self._impact) >= IMPACT_CACHE_SIZE:
+            self._impact.clear()
+        self._impact[key] = result
+        return result
+
+    def impacted_applications(self, ci_id, depth=3, direction=BOTH):
+        return [ci for ci, _, _ in self.blast_radius(ci_id, depth, direction) if ci.get("type") == "Application"]
@@ -0,0 +1,249 @@
+import re
+import threading
+import time
+
+# --- Conversation States ---
+# The bridge flow as index.html walks it: pick the application, join the
+# bridge, run the log analysis, generate the RCA. The server owns the state,
+# so routing a turn is a table lookup rather than a model call, and only log
+# summaries, RCA reports and free-form questions reach the model.
+APP_SELECTION = "app_selection"
+IN_FLOW = "in_flow"
+JOINED_BRIDGE = "joined_bridge"
+ANALYSIS_DONE = "analysis_done"
+COMPLETED = "completed"
+STATES = (APP_SELECTION, IN_FLOW, JOINED_BRIDGE, ANALYSIS_DONE, COMPLETED)
+
+JOIN_BRIDGE = "join_bridge"
+FUZZY_MATCH_THRESHOLD = 0.75
+IMPACT_DEPTH = 2
+
+LOG_ANALYSIS_REQUEST = re.compile(r"\b(log analysis|analy[sz]e (the )?logs?|check (the )?logs?|run (the )?analysis)\b", re.I)
+RCA_REQUEST = re.compile(r"\b(rca|root cause|fix|next step|proceed|continue|go ahead)\b", re.I)
+JOIN_REQUEST = re.compile(r"\bjoin\b.*\b(bridge|call)\b", re.I)
+QUESTION = re.compile(r"\?\s*$|^\s*(what|which|why|when|where|who|how|is|are|was|were|can|could|does|do|did|should|will)\b", re.I)
+
+BRIDGE_MESSAGES = (
+    "Joining the bridge call now...",
+    "You have successfully joined the bridge call. The core team is ready. Please proceed with the next step.",
+    'Feel free to type "run log analysis" to continue the incident flow.',
+)
+GUIDANCE = {
+    APP_SELECTION: "Please tell me which application is having issues, by its name in the CMDB list.",
+    IN_FLOW: "Join the bridge call when you are ready, then we can run the log analysis.",
+    JOINED_BRIDGE: 'Type "run log analysis" to have Agent 3 analyse the logs.',
+    ANALYSIS_DONE: 'Type "generate RCA" to have Agent 4 produce the root cause and fix.',
+    COMPLETED: "This incident is resolved and the bridge can be closed. You can still ask me questions about it.",
+}
+
+
+class Turn:
+    """
+    What the state machine decided for one input: canned messages to send as
+    they are and, at most, one reply to generate. ``finish(text)`` applies
+    the generated reply (advancing the state); ``abort()`` gives up on it.
+    """
+
+    def __init__(self, conversation):
+        self.conversation = conversation
+        self.messages = []
+        self.generate = None
+        self.on_reply = None
+
+    def say(self, agent, text):
+        self.messages.append((agent, text))
+
+    def ask_model(self, agent, user_prompt, on_reply=None):
+        self.generate = (agent, user_prompt)
+        self.on_reply = on_reply
+
+    def finish(self, text):
+        with self.conversation.lock:
+            self.conversation.model_calls += 1
+            self.conversation.busy = False
+            if self.on_reply is not None:
+                self.on_reply(text)
+
+    def abort(self):
+        with self.conversation.lock:
+            self.conversation.model_calls += 1
+            self.conversation.busy = False
+
+
+class Conversation:
+    """One bridge session's state and what has been established so far"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.state = APP_SELECTION
+        self.app = None
+        self.impacted = ()
+        self.log_summary = None
+        self.rca_report = None
+        self.model_calls = 0
+        self.turns = 0
+        self.busy = False
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def dispatch(self, user_input, app_data, action=None):
+        """Route one user message (or UI action such as JOIN_BRIDGE) to its agent handler"""
+        with self.lock:
+            self.turns += 1
+            self.updated = time.time()
+            turn = Turn(self)
+            text = (user_input or "").strip()
+            if self.busy:
+                turn.say("5", "I'm still working on your previous request; please send this again once it's done.")
+                return turn
+            if action == JOIN_BRIDGE or (text and JOIN_REQUEST.search(text) and self.state == IN_FLOW):
+                self._join_bridge(turn)
+            elif text:
+                HANDLERS[self.state](self, turn, text, app_data)
+            else:
+                turn.say("5", GUIDANCE[self.state])
+            self.busy = turn.generate is not None
+            return turn
+
+    # --- Handlers ---
+    def _select_app(self, turn, text, app_data):
+        """Agent 2: CMDB lookup, exact and then fuzzy"""
+        index = app_data["cmdb_index"]
+        app = index.find(text)
+        if app is None or app.get("type") != "Application":
+            suggestions = [(score, ci) for score, ci in index.suggest(text, k=5) if ci.get("type") == "Application"][:3]
+            if suggestions and suggestions[0][0] >= FUZZY_MATCH_THRESHOLD:
+                app = suggestions[0][1]
+            elif QUESTION.search(text):
+                self._answer(turn, text)
+                return
+            elif suggestions:
+                names = ", ".join(f"'{ci['name']}'" for _, ci in suggestions)
+                turn.say("2", f"I'm sorry, I couldn't find '{text}' in our CMDB. Did you mean {names}? Please select a valid application from the list on the right.")
+                return
+            else:
+                turn.say("2", f"I'm sorry, I couldn't find '{text}' in our CMDB. Please select a valid application from the list on the right.")
+                return
+        self.app = app
+        self.impacted = tuple(ci["id"] for ci, _, _ in index.blast_radius(app["id"], IMPACT_DEPTH))
+        message = f"I have identified {app['name']} and its associated CIs in the CMDB."
+        others = index.impacted_applications(app["id"], depth=IMPACT_DEPTH)
+        if others:
+            message += f" Other services impacted through shared CIs: {', '.join(ci['name'] for ci in others)}."
+        turn.say("2", message + " Agent 3 will extract the logs once you join the bridge call.")
+        self.state = IN_FLOW
+
+    def _in_flow(self, turn, text, app_data):
+        if QUESTION.search(text):
+            self._answer(turn, text)
+        elif app_data["cmdb_index"].find(text) is not None:
+            self._select_app(turn, text, app_data)
+        else:
+            turn.say("5", GUIDANCE[IN_FLOW])
+
+    def _join_bridge(self, turn):
+        """Agent 1: canned bridge messages"""
+        if self.state != IN_FLOW:
+            turn.say("5", GUIDANCE[self.state])
+            return
+        for message in BRIDGE_MESSAGES:
+            turn.say("1", message)
+        self.state = JOINED_BRIDGE
+
+    def _joined_bridge(self, turn, text, app_data):
+        """Agent 3: log summary"""
+        if LOG_ANALYSIS_REQUEST.search(text):
+            turn.ask_model("3", f"The affected application is {self.app['name']}. Summarize the key errors in the logs "
+                                "for it and the CIs around it, and say you are passing the summary to Agent 4 "
+                                "for root cause analysis.", self._analysis_done)
+        elif QUESTION.search(text):
+            self._answer(turn, text)
+        else:
+            turn.say("5", GUIDANCE[JOINED_BRIDGE])
+
+    def _analysis_done(self, text):
+        self.log_summary = text
+        self.state = ANALYSIS_DONE
+
+    def _rca(self, turn, text, app_data):
+        """Agent 4: root cause, fix and prevention"""
+        if RCA_REQUEST.search(text):
+            turn.ask_model("4", f"Log summary from Agent 3: {self.log_summary}\n\nProvide the root cause, the "
+                                "immediate fix and preventative measures as a concise report.", self._completed)
+        elif QUESTION.search(text):
+            self._answer(turn, text)
+        else:
+            turn.say("5", GUIDANCE[ANALYSIS_DONE])
+
+    def _completed(self, text):
+        self.rca_report = text
+        self.state = COMPLETED
+
+    def _after_resolution(self, turn, text, app_data):
+        if QUESTION.search(text):
+            self._answer(turn, text)
+        else:
+            turn.say("5", GUIDANCE[COMPLETED])
+
+    def _answer(self, turn, question):
+        """Agent 5: free-form question about the incident"""
+        notes = [f"Affected application: {self.app['name'] if self.app else 'not identified yet'}"]
+        if self.log_summary:
+            notes.append(f"Log summary: {self.log_summary}")
+        if self.rca_report:
+            notes.append(f"RCA report: {self.rca_report}")
+        turn.ask_model("5", "\n".join(notes) + f"\n\nUser Question: {question}")
+
+    def active(self):
+        """Whether the conversation has work in progress and must not be expired"""
+        return self.busy
+
+    def view(self):
+        """State for the UI: where the flow is and what has been established"""
+        return {
+            "state": self.state,
+            "app": {"id": self.app["id"], "name": self.app["name"]} if self.app else None,
+            "impacted": list(self.impacted),
+            "log_summary": self.log_summary,
+            "rca_report": self.rca_report,
+            "model_calls": self.model_calls,
+            "turns": self.turns,
+        }
+
+
+HANDLERS = {
+    APP_SELECTION: Conversation._select_app,
+    IN_FLOW: Conversation._in_flow,
+    JOINED_BRIDGE: Conversation._joined_bridge,
+    ANALYSIS_DONE: Conversation._rca,
+    COMPLETED: Conversation._after_resolution,
+}
+
+
+class ConversationStore:
+    """In-process conversations by session id; idle ones are dropped after ``idle_seconds``"""
+
+    conversation_class = Conversation
+
+    def __init__(self, idle_seconds=4 * 3600):
+        self.idle_seconds = idle_seconds
+        self.conversations = {}
+        self.lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.time()
+        with self.lock:
+            conversation = self.conversations.get(session_id)
+            if conversation is None:
+                if len(self.conversations) % 256 == 0:
+                    self._expire(now)
+                conversation = self.conversations[session_id] = self.conversation_class(session_id)
+            return conversation
+
+    def _expire(self, now):
+        for session_id, conversation in list(self.conversations.items()):
+            if now - conversation.updated > self.idle_seconds and not conversation.active():
+                del self.conversations[session_id]
+
+    def __len__(self):
+        return len(self.conversations)
@@ -0,0 +1,121 @@
+from collections import deque
+
+from prompt_context import estimate_tokens
+
+# --- History Budget ---
+# Tokens of history (pinned facts + rolling summary + recent turns) sent with
+# every call. Older turns are folded into the summary once the recent turns
+# outgrow their share, in batches down to a low watermark so the summarizer
+# runs every few turns rather than on every one.
+HISTORY_TOKEN_BUDGET = 2000
+SUMMARY_MAX_TOKENS = 300
+MIN_RECENT_TURNS = 2
+LOW_WATERMARK = 0.5
+
+SUMMARY_PROMPT = """You maintain the running summary of a major incident bridge call.
+Update the summary with the new exchanges below. Keep symptoms, affected systems, findings, decisions and open questions; drop greetings and repetition.
+Reply with the updated summary only, at most {max_words} words."""
+
+
+def llm_summarizer(complete):
+    """
+    Summarizer backed by a chat model. ``complete(messages, max_tokens)``
+    returns the reply text, so the same code serves the SDK and plain HTTP.
+    """
+    def summarize(summary, exchanges, max_tokens):
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT.format(max_words=int(max_tokens * 0.75))},
+            {"role": "user", "content": f"Current summary:\n{summary or '(empty)'}\n\nNew exchanges:\n{exchanges}"},
+        ]
+        return complete(messages, max_tokens)
+    return summarize
+
+
+def clip_tokens(text, max_tokens):
+    """Keep the tail of text within roughly max_tokens (newest facts survive)"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return "..." + text[-max_tokens * 4:]
+
+
+class ConversationHistory:
+    """
+    Bounded chat history: pinned facts, a rolling summary of older turns and
+    the most recent turns verbatim. The summary is updated incrementally from
+    the turns being evicted, never recomputed from the full transcript.
+    """
+
+    def __init__(self, summarize=None, token_budget=HISTORY_TOKEN_BUDGET, summary_tokens=SUMMARY_MAX_TOKENS):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.turns = deque()
+        self.turn_tokens = 0
+        self.summary = ""
+        self.pinned = {}
+        self.folded_turns = 0
+        self.summarizer_calls = 0
+
+    def __len__(self):
+        return len(self.turns)
+
+    def clear(self):
+        self.turns.clear()
+        self.turn_tokens = 0
+        self.summary = ""
+        self.pinned.clear()
+        self.folded_turns = 0
+
+    def pin(self, name, value):
+        """Keep a key fact (affected app, RCA, ...) in every prompt regardless of age"""
+        self.pinned[name] = clip_tokens(" ".join(str(value).split()), self.summary_tokens // 2)
+
+    def add(self, user_input, reply):
+        tokens = estimate_tokens(user_input) + estimate_tokens(reply) + 8
+        self.turns.append((user_input, reply, tokens))
+        self.turn_tokens += tokens
+        if self.turn_tokens > self.recent_budget():
+            self._compact()
+
+    def recent_budget(self):
+        fixed = self.summary_tokens + sum(estimate_tokens(v) + 4 for v in self.pinned.values())
+        return max(self.token_budget - fixed, 0)
+
+    def _compact(self):
+        target = self.recent_budget() * LOW_WATERMARK
+        evicted = []
+        while len(self.turns) > MIN_RECENT_TURNS and self.turn_tokens > target:
+            user_input, reply, tokens = self.turns.popleft()
+            self.turn_tokens -= tokens
+            evicted.append(f"User: {user_input}\nAssistant: {reply}")
+        if not evicted:
+            return
+        exchanges = "\n".join(evicted)
+        summary = None
+        if self.summarize is not None:
+            try:
+                self.summarizer_calls += 1
+                summary = self.summarize(self.summary, exchanges, self.summary_tokens)
+            except Exception:
+                summary = None
+        if not summary:
+            # Without a summarizer, keep the newest evicted text verbatim.
+            summary = f"{self.summary}\n{exchanges}".strip()
+        self.summary = clip_tokens(summary.strip(), self.summary_tokens)
+        self.folded_turns += len(evicted)
+
+    def messages(self):
+        """History as chat messages, to go between the system prompt and the new user turn"""
+        messages = []
+        if self.pinned:
+            facts = "\n".join(f"- {name}: {value}" for name, value in self.pinned.items())
+            messages.append({"role": "system", "content": f"Key incident facts:\n{facts}"})
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier {self.folded_turns} turns of this call:\n{self.summary}"})
+        for user_input, reply, _ in self.turns:
+            messages.append({"role": "user", "content": user_input})
+            messages.append({"role": "assistant", "content": reply})
+        return messages
+
+    def tokens(self):
+        return sum(estimate_tokens(m["content"]) + 4 for m in self.messages())
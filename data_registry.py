@@ -0,0 +1,150 @@
+import sys
+import threading
+import time
+
+from prompt_context import file_version
+
+# --- Registry Policy ---
+# CMDB, logs and static assets are loaded once per process and shared by every
+# session. Each dataset is an immutable snapshot: a reload builds a new one and
+# swaps the reference, so a session still holding the old snapshot is never
+# disturbed (copy-on-write). Source files are re-stat'ed at most every
+# RELOAD_CHECK_SECONDS, and a failed reload keeps serving the last good snapshot.
+RELOAD_CHECK_SECONDS = 1.0
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class ReadOnlyDict(dict):
+    """A dict that refuses changes; copy it (``dict(d)``) to get a private, writable one"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("shared data is read-only; copy it before changing it")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+def freeze(value):
+    """
+    Recursively turn dicts into ReadOnlyDicts and lists into tuples; other
+    objects are left as they are. Parts that are already frozen are kept, not
+    copied, so a loader can freeze records and build an index over them.
+    """
+    if isinstance(value, ReadOnlyDict):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        items = tuple(freeze(item) for item in value)
+        if isinstance(value, tuple) and all(item is original for item, original in zip(items, value)):
+            return value
+        return items
+    return value
+
+
+def deep_size(value, seen=None):
+    """Approximate bytes held by value and everything it references"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += deep_size(vars(value), seen)
+    return size
+
+
+class Snapshot:
+    """One loaded version of a dataset"""
+
+    __slots__ = ("value", "version", "loaded_at", "bytes")
+
+    def __init__(self, value, version):
+        self.value = value
+        self.version = version
+        self.loaded_at = time.time()
+        self.bytes = deep_size(value)
+
+
+class DataRegistry:
+    """
+    Named datasets, each built by ``loader(*paths)`` from its source files and
+    rebuilt when their mtimes or sizes change. Values are frozen before they
+    are shared.
+    """
+
+    def __init__(self, check_interval=RELOAD_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self.sources = {}
+        self.snapshots = {}
+        self.checked = {}
+        self.lock = threading.Lock()
+        self.metrics = {"loads": 0, "reloads": 0, "failed_reloads": 0}
+
+    def get(self, name, paths, loader):
+        """The current value of a dataset, loading it on first use"""
+        return self.snapshot(name, paths, loader).value
+
+    def snapshot(self, name, paths, loader):
+        paths = tuple(paths)
+        snapshot = self.snapshots.get(name)
+        now = time.monotonic()
+        if snapshot is not None and now - self.checked.get(name, 0.0) < self.check_interval:
+            return snapshot
+        version = file_version(*paths)
+        if snapshot is not None and snapshot.version == version:
+            self.checked[name] = now
+            return snapshot
+        with self.lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._load(name, paths, loader, version, snapshot)
+            self.checked[name] = time.monotonic()
+            return snapshot
+
+    def _load(self, name, paths, loader, version, previous):
+        try:
+            snapshot = Snapshot(freeze(loader(*paths)), version)
+        except Exception:
+            if previous is None:
+                raise
+            # Usually a file caught mid-write; the next check tries again.
+            self.metrics["failed_reloads"] += 1
+            return previous
+        self.sources[name] = paths
+        self.snapshots[name] = snapshot
+        self.metrics["reloads" if previous is not None else "loads"] += 1
+        return snapshot
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.metrics)
+            stats["datasets"] = {
+                name: {"bytes": snapshot.bytes, "loaded_at": snapshot.loaded_at, "files": list(self.sources[name])}
+                for name, snapshot in self.snapshots.items()
+            }
+        return stats
+
+
+def get_registry():
+    """Process-wide data registry, created on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DataRegistry()
+    return _registry
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
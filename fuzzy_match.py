@@ -0,0 +1,86 @@
+import heapq
+import re
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def squash(text):
+    """
+    Lowercase and drop everything but letters and digits, so spacing and
+    punctuation differences in transcripts ("sap s4 hana", "sales force crm")
+    disappear before trigrams are taken.
+    """
+    return _NON_ALNUM.sub("", str(text).lower())
+
+
+def trigrams(text, squashed=False):
+    padded = f"^{text if squashed else squash(text)}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index for typo-tolerant name matching.
+
+    Candidates are gathered from the query's rarest trigrams first, up to a
+    fixed posting budget, so common trigrams ("app", "ser") never force a
+    scan of most of the index. The best candidates by shared-trigram count
+    are then ranked by Dice similarity of their trigram sets.
+    """
+
+    def __init__(self, entries, posting_budget=30_000, rerank=32):
+        self.names = []
+        self.keys = []
+        self.values = []
+        postings = {}
+        for name, value in entries:
+            entry = len(self.names)
+            key = squash(name)
+            self.names.append(name)
+            self.keys.append(key)
+            self.values.append(value)
+            for gram in trigrams(key, squashed=True):
+                postings.setdefault(gram, []).append(entry)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.posting_budget = posting_budget
+        self.rerank = rerank
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, k=5, min_score=0.3):
+        """Top-k (score, name, value) matches with Dice similarity >= min_score"""
+        query_key = squash(query)
+        query_grams = trigrams(query_key, squashed=True)
+        if not query_grams or not self.names:
+            return []
+        lists = sorted(
+            (self.postings[gram] for gram in query_grams if gram in self.postings),
+            key=len,
+        )
+        selected = []
+        scanned = 0
+        for ids in lists:
+            if selected and scanned + len(ids) > self.posting_budget:
+                break
+            selected.append(ids)
+            scanned += len(ids)
+        if not selected:
+            return []
+        candidates, hits = np.unique(np.concatenate(selected), return_counts=True)
+        if len(candidates) > self.rerank:
+            candidates = candidates[np.argpartition(-hits, self.rerank - 1)[:self.rerank]]
+
+        results = []
+        for entry in candidates.tolist():
+            key = self.keys[entry]
+            grams = trigrams(key, squashed=True)
+            score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+            if score >= min_score:
+                # Trigram sets ignore repeats ("999" vs "9999"), so closer
+                # lengths win ties.
+                results.append((score, -abs(len(key) - len(query_key)), self.names[entry], self.values[entry]))
+        best = heapq.nlargest(k, results, key=lambda result: result[:2])
+        return [(score, name, value) for score, _, name, value in best]
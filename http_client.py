@@ -0,0 +1,319 @@
+import asyncio
+import atexit
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import tracing
+from rate_limiter import INTERACTIVE, SingleFlight, get_rate_limiter, request_key, request_tokens
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+# --- Connection Policy ---
+# One pooled keep-alive client per event loop is shared by every chat session
+# on it, so the TCP+TLS handshake to the provider is paid once per connection
+# instead of once per chat turn.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+ASYNC_MAX_CONNECTIONS = 256
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A 429 asking us to wait longer than this is surfaced rather than slept on.
+MAX_RETRY_AFTER = 30.0
+
+# Identical requests in flight at the same time are sent once (see SingleFlight).
+_single_flight = SingleFlight()
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def retry_after(headers):
+    """Seconds the provider asked us to wait (retry-after-ms or Retry-After), or None"""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(headers, attempt):
+    """
+    Seconds to wait before retrying: the jittered backoff, but never less than
+    the provider's Retry-After. None if it asks for more than MAX_RETRY_AFTER.
+    """
+    requested = retry_after(headers)
+    if requested is not None and requested > MAX_RETRY_AFTER:
+        return None
+    return max(backoff_delay(attempt), requested or 0.0)
+
+
+def _throttle(model, status, delay):
+    """
+    Wait out a retryable response. A 429 holds the model for every caller in
+    the process, and the retry waits for it in the limiter like everyone else.
+    """
+    if status == 429 and model:
+        get_rate_limiter().pause(model, delay)
+    else:
+        time.sleep(delay)
+
+
+def _record_usage(span, data):
+    """Token counts the provider reported, if it did"""
+    usage = data.get("usage") if isinstance(data, dict) else None
+    if usage:
+        span.set(prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0))
+
+
+# --- Async Client ---
+def async_client():
+    """
+    A pooled keep-alive aiohttp session with the timeouts above. It belongs to the event loop that creates it, so the caller
+    creates it at startup (inside the loop) and closes it with ``close()``.
+    """
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is required for the async client")
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=ASYNC_MAX_CONNECTIONS),
+        timeout=aiohttp.ClientTimeout(connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT),
+    )
+
+
+async def post_json_async(client, url, payload, headers=None, max_retries=MAX_RETRIES, priority=INTERACTIVE):
+    """
+    POST a JSON payload within the shared rate limits and return the decoded
+    body. Concurrent identical requests share one call and its (read-only) result.
+    """
+    async def send():
+        with tracing.span("provider.request") as span:
+            data = json.loads(await _send_async(client, url, payload, headers, max_retries, priority, span))
+            _record_usage(span, data)
+            return data
+    return await _single_flight.do_async(request_key(url, payload, headers), send)
+
+
+async def post_bytes_async(client, url, payload, headers=None, max_retries=MAX_RETRIES, priority=INTERACTIVE):
+    """POST a JSON payload within the shared rate limits and return the raw body (e.g. audio)"""
+    async def send():
+        with tracing.span("provider.request") as span:
+            return await _send_async(client, url, payload, headers, max_retries, priority, span)
+    return await _single_flight.do_async(request_key(url, payload, headers), send)
+
+
+async def _send_async(client, url, payload, headers, max_retries, priority, span, stream=False):
+    """
+    POST within the model's rate limits, retrying connection errors, timeouts
+    and retryable status codes with jittered backoff (honouring Retry-After)
+    until max_retries is spent. Returns the body or, with ``stream``, the open
+    response for the caller to read and release. Attempts, rate-limit waits,
+    status and bytes are recorded on ``span``.
+    """
+    model = payload.get("model")
+    tokens = request_tokens(payload)
+    span.set(model=model, priority=priority, budget_tokens=tokens)
+    attempt = 0
+    while True:
+        if model:
+            waited = time.perf_counter()
+            await get_rate_limiter().acquire_async(model, tokens, priority)
+            span.add("rate_limit_wait_ms", round((time.perf_counter() - waited) * 1000, 1))
+        try:
+            response = await client.post(url, json=payload, headers=headers)
+            span.set(status=response.status, attempts=attempt + 1)
+            if response.status in RETRY_STATUSES and attempt < max_retries:
+                delay = retry_delay(response.headers, attempt)
+                if delay is not None:
+                    response.release()
+                    if response.status == 429 and model:
+                        get_rate_limiter().pause(model, delay)
+                    else:
+                        await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+            if stream and response.ok:
+                return response
+            async with response:
+                response.raise_for_status()
+                body = await response.read()
+            span.set(response_bytes=len(body))
+            return body
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= max_retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+async def stream_sse_async(client, url, payload, headers=None, max_retries=MAX_RETRIES, priority=INTERACTIVE,
+                           parent=None):
+    """
+    POST a JSON payload and yield each decoded ``data:`` event of the
+    server-sent event stream that comes back. Retries only apply until the
+    response starts; a stream that breaks mid-way raises to the caller.
+    """
+    span = tracing.get_tracer().start_span("provider.request", parent=parent)
+    error = None
+    try:
+        response = await _send_async(client, url, payload, headers, max_retries, priority, span, stream=True)
+        span.set(first_byte_ms=round(span.duration_ms, 1))
+        received = 0
+        async with response:
+            async for line in response.content:
+                received += len(line)
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                event = json.loads(data)
+                _record_usage(span, event)
+                span.set(response_bytes=received)
+                yield event
+    except GeneratorExit:
+        error = "abandoned"
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        span.finish(error)
+
+
+# --- Blocking Callers ---
+# Threaded code (the TTS cache and pipeline, agent tools, scripts) runs the
+# async calls above on one background event loop with its own pooled client,
+# so there is a single request path whichever side the caller is on.
+_loop = None
+_loop_client = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="http-client", daemon=True).start()
+                atexit.register(_close_loop_client)
+                _loop = loop
+    return _loop
+
+
+def _close_loop_client():
+    if _loop_client is not None:
+        asyncio.run_coroutine_threadsafe(_loop_client.close(), _loop).result(timeout=5)
+
+
+def run_sync(call, parent=None):
+    """
+    Await ``call(client)`` on the background loop with its pooled client and
+    return the result, traced under ``parent`` (default: the current span).
+    """
+    parent = parent or tracing.current_span()
+
+    async def run():
+        global _loop_client
+        tracing.set_current(parent)
+        if _loop_client is None:
+            _loop_client = async_client()
+        return await call(_loop_client)
+    return asyncio.run_coroutine_threadsafe(run(), _background_loop()).result()
+
+
+def post_json(url, payload, headers=None, max_retries=MAX_RETRIES, priority=INTERACTIVE):
+    """post_json_async for threaded callers"""
+    return run_sync(lambda client: post_json_async(client, url, payload, headers, max_retries, priority))
+
+
+def post_bytes(url, payload, headers=None, max_retries=MAX_RETRIES, priority=INTERACTIVE):
+    """post_bytes_async for threaded callers"""
+    return run_sync(lambda client: post_bytes_async(client, url, payload, headers, max_retries, priority))
+
+
+def stream_sse(url, payload, headers=None, max_retries=MAX_RETRIES, priority=INTERACTIVE, parent=None):
+    """
+    stream_sse_async for threaded callers. ``parent`` is the span to trace
+    under, as a generator resumed from other threads cannot rely on the
+    current span.
+    """
+    parent = parent or tracing.current_span()
+    events = None
+
+    async def start(client):
+        nonlocal events
+        events = stream_sse_async(client, url, payload, headers, max_retries, priority, parent)
+
+    run_sync(start, parent)
+    try:
+        while True:
+            try:
+                yield run_sync(lambda client: events.__anext__(), parent)
+            except StopAsyncIteration:
+                return
+    finally:
+        run_sync(lambda client: events.aclose(), parent)
+
+
+# --- SDK Calls ---
+def call_limited(func, kwargs, priority=INTERACTIVE, max_retries=MAX_RETRIES):
+    """
+    Run an OpenAI SDK call, ``func(**kwargs)``, within the shared rate limits,
+    retrying 429 and 5xx errors with the same policy as post_json. Concurrent
+    identical calls share one call and its (read-only) result, except streams,
+    which each caller reads. Create the SDK client with ``max_retries=0`` so its
+    own retries do not stack on these.
+    """
+    model = kwargs.get("model")
+    tokens = request_tokens(kwargs)
+
+    def call():
+        with tracing.span("provider.request", model=model, priority=priority, budget_tokens=tokens) as span:
+            return _call_limited(model, lambda: func(**kwargs), tokens, priority, max_retries, span)
+    if kwargs.get("stream"):
+        return call()
+    return _single_flight.do(request_key(func.__qualname__, kwargs), call)
+
+
+def _call_limited(model, func, tokens, priority, max_retries, span):
+    attempt = 0
+    while True:
+        waited = time.perf_counter()
+        get_rate_limiter().acquire(model, tokens, priority)
+        span.add("rate_limit_wait_ms", round((time.perf_counter() - waited) * 1000, 1))
+        try:
+            span.set(attempts=attempt + 1)
+            return func()
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            span.set(status=status)
+            if status not in RETRY_STATUSES or attempt >= max_retries:
+                raise
+            delay = retry_delay(getattr(getattr(e, "response", None), "headers", None) or {}, attempt)
+            if delay is None:
+                raise
+            _throttle(model, status, delay)
+            attempt += 1
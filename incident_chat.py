@@ -0,0 +1,262 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+import http_client
+import tracing
+from cmdb_index import CmdbIndex
+from data_registry import freeze, get_registry
+from log_templates import TemplateMiner
+from prompt_context import estimate_tokens, file_version, format_cmdb
+
+OPENAI_CHAT_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1") + "/chat/completions"
+CHAT_MODEL = "gpt-4o-mini"
+
+
+# --- Prompt Building ---
+CMDB_PATH = "cmdb.json"
+LOGS_PATH = "logs.txt"
+
+CONTEXT_PROMPT = """You are part of a Major Incident Manager bot guiding a user through a structured incident response on a bridge call. Your responses must be concise, specific, and formatted for a chat interface.
+
+Use the following data as your context."""
+
+# The conversation state machine picks the agent, so each prompt only
+# describes that agent's job.
+AGENT_PROMPTS = {
+    "3": "You are Agent 3, a log analysis specialist. Briefly summarize the key errors in the log templates for the affected application and say you are passing the summary to Agent 4 for root cause analysis.",
+    "4": "You are Agent 4, a Root Cause Analysis specialist. Provide the root cause, the immediate fix and preventative measures, formatted in Markdown.",
+    "5": "You are Agent 5, a helpful Q&A assistant. Answer the user's question based ONLY on the provided context and bridge notes. If the information is not there, say that you cannot answer that question at this time.",
+}
+
+# The static prompt only changes when cmdb.json or logs.txt do, so it is
+# built once per data version and shared by every request in the process.
+_static_prompt = {"version": None, "prompt": None, "tokens": 0}
+_static_prompt_lock = threading.Lock()
+
+
+def data_version():
+    return file_version(CMDB_PATH, LOGS_PATH)
+
+
+def load_app_data(cmdb_path=None, logs_path=None):
+    """
+    Read cmdb.json and mine logs.txt into templates, along with the version
+    they were read at. The log is streamed rather than held in memory.
+    """
+    cmdb_path = cmdb_path or CMDB_PATH
+    logs_path = logs_path or LOGS_PATH
+    version = file_version(cmdb_path, logs_path)
+    # Frozen here so the index and the snapshot share one read-only copy.
+    cmdb = freeze(json.loads(open(cmdb_path).read()))
+    return {
+        "cmdb": cmdb,
+        "cmdb_index": CmdbIndex(cmdb),
+        "log_templates": TemplateMiner.from_file(logs_path).summary(),
+        "version": version
+    }
+
+
+def get_app_data():
+    """
+    The app data shared read-only by every session in the process, reloaded
+    when cmdb.json or logs.txt change
+    """
+    return get_registry().get("app_data", (CMDB_PATH, LOGS_PATH), load_app_data)
+
+
+def build_static_prompt(cmdb_data, log_templates):
+    if isinstance(cmdb_data, CmdbIndex):
+        cmdb_data = cmdb_data.records
+    return (
+        f"{CONTEXT_PROMPT}\n\n"
+        f"CMDB Data:\n{format_cmdb(cmdb_data)}\n\n"
+        f"Log Templates (one line per message template with counts, time range and example values):\n{log_templates}"
+    )
+
+
+def static_system_prompt(app_data):
+    """Return (prompt, token estimate) for the static context, memoized per data version"""
+    version = app_data.get("version")
+    if version is None:
+        prompt = build_static_prompt(app_data.get("cmdb_index") or app_data["cmdb"], app_data["log_templates"])
+        return prompt, estimate_tokens(prompt)
+    with _static_prompt_lock:
+        if _static_prompt["version"] != version:
+            prompt = build_static_prompt(app_data.get("cmdb_index") or app_data["cmdb"], app_data["log_templates"])
+            _static_prompt.update(version=version, prompt=prompt, tokens=estimate_tokens(prompt))
+        return _static_prompt["prompt"], _static_prompt["tokens"]
+
+
+def build_messages(agent, user_prompt, app_data):
+    """
+    Static context first and byte-identical across turns and agents so the
+    provider's prefix cache can hit; the agent's instructions go after it.
+    """
+    static_prompt, _ = static_system_prompt(app_data)
+    return [
+        {"role": "system", "content": static_prompt},
+        {"role": "system", "content": AGENT_PROMPTS[agent]},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def estimate_prompt_tokens(agent, user_prompt, app_data):
+    _, static_tokens = static_system_prompt(app_data)
+    return static_tokens + estimate_tokens(f"{AGENT_PROMPTS[agent]}\n{user_prompt}")
+
+
+def build_payload(agent, user_prompt, app_data, stream=False):
+    payload = {
+        "model": CHAT_MODEL,
+        "messages": build_messages(agent, user_prompt, app_data),
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def build_headers(openai_api_key):
+    return {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {openai_api_key}'
+    }
+
+
+# --- Chat Turns ---
+def turn_result(conversation, messages, started, prompt_tokens=0):
+    result = conversation.view()
+    result.update(
+        messages=[{"agent": agent, "text": text} for agent, text in messages],
+        used_model=bool(prompt_tokens),
+        total_ms=round((time.perf_counter() - started) * 1000, 1),
+        prompt_tokens=prompt_tokens,
+    )
+    return result
+
+
+async def chat_turn_async(client, openai_api_key, conversation, user_input, app_data, action=None, limiter=None):
+    """
+    One turn for the async chat API: the state machine answers directly where
+    it can, and the model is called only for the reply it asks for. Returns
+    the messages and the conversation's new state; model errors are raised.
+    ``limiter`` (see incident_registry.ModelLimiter) bounds model calls
+    across all conversations.
+    """
+    started = time.perf_counter()
+    with tracing.span("turn", trace_id=conversation.session_id, action=action) as turn_span:
+        with tracing.span("dispatch", state=conversation.state):
+            turn = conversation.dispatch(user_input, app_data, action)
+        messages = list(turn.messages)
+        prompt_tokens = 0
+        if turn.generate:
+            agent, user_prompt = turn.generate
+            try:
+                with tracing.span("prompt.build", agent=agent) as span:
+                    payload = build_payload(agent, user_prompt, app_data)
+                    prompt_tokens = estimate_prompt_tokens(agent, user_prompt, app_data)
+                    span.set(prompt_tokens=prompt_tokens)
+                with tracing.span(f"agent_{agent}.model"):
+                    if limiter is None:
+                        data = await http_client.post_json_async(client, OPENAI_CHAT_URL, payload,
+                                                                 headers=build_headers(openai_api_key))
+                    else:
+                        async with limiter.slot(conversation.session_id):
+                            data = await http_client.post_json_async(client, OPENAI_CHAT_URL, payload,
+                                                                     headers=build_headers(openai_api_key))
+                text = data['choices'][0]['message']['content'].strip()
+            except BaseException:
+                turn.abort()
+                raise
+            turn.finish(text)
+            messages.append((agent, text))
+        result = turn_result(conversation, messages, started, prompt_tokens)
+        turn_span.set(state=result["state"], used_model=result["used_model"], messages=len(messages))
+    return result
+
+
+async def stream_chat_turn_async(client, openai_api_key, conversation, user_input, app_data, action=None, limiter=None):
+    """
+    Streams one turn for the async chat API as (event, data) pairs:
+
+    * ``agent`` whenever an agent starts a message, with the time since the request,
+    * ``token`` for each piece of its text (a canned message is a single token),
+    * ``done`` with the messages, the conversation's new state and timings,
+      or ``error`` if the model call fails.
+
+    The streamed model call holds a ``limiter`` slot, as in chat_turn_async.
+    """
+    started = time.perf_counter()
+    tracer = tracing.get_tracer()
+    turn_span = tracer.start_span("turn", trace_id=conversation.session_id, parent=tracing.NO_SPAN, action=action,
+                                  streamed=True)
+    error = None
+    try:
+        with tracer.span("dispatch", parent=turn_span, state=conversation.state):
+            turn = conversation.dispatch(user_input, app_data, action)
+        messages = list(turn.messages)
+        try:
+            for agent, text in turn.messages:
+                yield "agent", {"agent": agent, "ttft_ms": round((time.perf_counter() - started) * 1000, 1)}
+                yield "token", {"text": text}
+        except BaseException:
+            # The client went away before the model was called.
+            if turn.generate:
+                turn.abort()
+            raise
+        prompt_tokens = 0
+        if turn.generate:
+            agent, user_prompt = turn.generate
+            parts = []
+            model_span = None
+            try:
+                with tracer.span("prompt.build", parent=turn_span, agent=agent) as span:
+                    payload = build_payload(agent, user_prompt, app_data, stream=True)
+                    prompt_tokens = estimate_prompt_tokens(agent, user_prompt, app_data)
+                    span.set(prompt_tokens=prompt_tokens)
+                model_span = tracer.start_span(f"agent_{agent}.model", parent=turn_span)
+                async with limiter.slot(conversation.session_id) if limiter else contextlib.nullcontext():
+                    async for event in http_client.stream_sse_async(client, OPENAI_CHAT_URL, payload,
+                                                                    headers=build_headers(openai_api_key),
+                                                                    parent=model_span):
+                        if not event.get("choices"):
+                            continue
+                        delta = event["choices"][0].get("delta", {}).get("content")
+                        if not delta:
+                            continue
+                        if not parts:
+                            model_span.set(ttft_ms=round(model_span.duration_ms, 1))
+                            yield "agent", {"agent": agent, "ttft_ms": round((time.perf_counter() - started) * 1000, 1)}
+                        parts.append(delta)
+                        yield "token", {"text": delta}
+            except Exception as e:
+                turn.abort()
+                if model_span is not None:
+                    model_span.finish(e)
+                error = e
+                yield "error", {"message": f"An error occurred: {e}"}
+                return
+            except BaseException:
+                # The client went away mid-stream.
+                turn.abort()
+                if model_span is not None:
+                    model_span.finish("abandoned")
+                raise
+            text = "".join(parts).strip()
+            model_span.set(completion_tokens=estimate_tokens(text))
+            model_span.finish()
+            turn.finish(text)
+            messages.append((agent, text))
+        result = turn_result(conversation, messages, started, prompt_tokens)
+        turn_span.set(state=result["state"], used_model=result["used_model"], messages=len(messages))
+        yield "done", result
+    except GeneratorExit:
+        error = "abandoned"
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        turn_span.finish(error)
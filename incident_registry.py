@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
+
+import incident_chat
+from conversation import Conversation, ConversationStore
+
+# --- Concurrency Policy ---
+# One server process runs many bridges at once. Each incident owns its state
+# and a queue of turns worked through one at a time, so two people typing on
+# the same bridge cannot interleave half-finished turns. Model calls from
+# every incident share one limit; an incident has at most one call waiting,
+# and waiters are served first come, first served, so a busy bridge cannot
+# starve a quiet one. CMDB and log data are the shared read-only snapshots
+# from the data registry. Requests and tokens per minute are paced separately
+# by rate_limiter; this cap bounds the calls held open at once.
+MAX_MODEL_CALLS = 64
+
+
+class ModelLimiter:
+    """At most ``limit`` model calls in flight at once, across all incidents"""
+
+    def __init__(self, limit=MAX_MODEL_CALLS):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.waiting = 0
+        self.wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, incident_id=None):
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.wait_seconds += time.perf_counter() - queued
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "peak": self.peak,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "mean_wait_ms": round(self.wait_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+        }
+
+
+class Incident(Conversation):
+    """A bridge's conversation plus its queue of turns still to run"""
+
+    def __init__(self, incident_id):
+        super().__init__(incident_id)
+        self.pending = deque()
+        self.worker = None
+        self.queue_seconds = 0.0
+
+    def active(self):
+        return self.busy or self.worker is not None
+
+
+class IncidentRegistry(ConversationStore):
+    """
+    Incidents by id, each with isolated state and its own turn queue. Turns
+    are submitted from the event loop; ``submit`` waits for the turn's result
+    and ``stream`` yields its events.
+    """
+
+    conversation_class = Incident
+
+    def __init__(self, client, openai_api_key="", get_app_data=incident_chat.get_app_data,
+                 max_model_calls=MAX_MODEL_CALLS, idle_seconds=4 * 3600):
+        super().__init__(idle_seconds)
+        self.client = client
+        self.openai_api_key = openai_api_key
+        self.get_app_data = get_app_data
+        self.limiter = ModelLimiter(max_model_calls)
+
+    async def submit(self, incident_id, user_input, action=None):
+        async def run(incident):
+            return await incident_chat.chat_turn_async(self.client, self.openai_api_key, incident, user_input,
+                                                       self.get_app_data(), action, self.limiter)
+        return await self._enqueue(incident_id, run)
+
+    async def stream(self, incident_id, user_input, action=None):
+        """
+        submit() for streamed turns: yields the turn's (event, data) pairs as
+        the incident's worker produces them. If the caller stops reading, a
+        queued turn is dropped and a running one is abandoned.
+        """
+        events = asyncio.Queue()
+
+        async def run(incident):
+            turn = incident_chat.stream_chat_turn_async(self.client, self.openai_api_key, incident, user_input,
+                                                        self.get_app_data(), action, self.limiter)
+            async with aclosing(turn):
+                async for event in turn:
+                    if future.done():
+                        break
+                    events.put_nowait(event)
+
+        future = self._enqueue(incident_id, run)
+        future.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+            if not future.cancelled() and future.exception() is not None:
+                yield "error", {"message": f"An error occurred: {future.exception()}"}
+        finally:
+            future.cancel()
+
+    def _enqueue(self, incident_id, run):
+        """Queue ``run(incident)`` behind the incident's earlier turns; the returned future gets its result"""
+        incident = self.get(incident_id)
+        future = asyncio.get_running_loop().create_future()
+        incident.pending.append((run, future, time.perf_counter()))
+        if incident.worker is None:
+            incident.worker = asyncio.create_task(self._work(incident))
+        return future
+
+    async def _work(self, incident):
+        try:
+            while incident.pending:
+                run, future, queued = incident.pending.popleft()
+                if future.done():
+                    # The caller went away before its turn started.
+                    continue
+                incident.queue_seconds += time.perf_counter() - queued
+                try:
+                    result = await run(incident)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            incident.worker = None
+
+    def stats(self):
+        with self.lock:
+            incidents = list(self.conversations.values())
+        return {
+            "incidents": len(incidents),
+            "active": sum(1 for incident in incidents if incident.active()),
+            "queued_turns": sum(len(incident.pending) for incident in incidents),
+            "model_calls": self.limiter.stats(),
+        }
@@ -0,0 +1,54 @@
+import io
+import mmap
+import re
+from collections import namedtuple
+
+# `2025-09-03 22:15:01 [ERROR] [Web Storefront] - Failed to submit order, ...`
+LOG_LINE = re.compile(r"\s*(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\s+\[(\w+)\]\s+\[([^\]]+)\]\s+-\s+(.*)")
+
+LogRecord = namedtuple("LogRecord", ["timestamp", "level", "component", "message"])
+
+SEVERITY = {"FATAL": 5, "CRITICAL": 5, "ERROR": 4, "WARN": 3, "WARNING": 3, "INFO": 2, "DEBUG": 1}
+
+
+# --- Readers ---
+def parse_line(line):
+    """LogRecord for a well-formed line, None for anything else"""
+    match = LOG_LINE.match(line)
+    if match is None:
+        return None
+    timestamp, level, component, message = match.groups()
+    return LogRecord(timestamp, level.upper(), component, message.rstrip())
+
+
+def iter_file_lines(path):
+    """
+    Yield decoded lines of a log file one at a time. The file is memory-mapped
+    when possible so the OS pages it in and out; only the current line is held.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and pipes cannot be mapped.
+            for line in f:
+                yield line.decode("utf-8", errors="replace")
+            return
+        with mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            for line in iter(mapped.readline, b""):
+                yield line.decode("utf-8", errors="replace")
+
+
+def iter_text_lines(text):
+    """Yield the lines of an in-memory log blob without splitting it into a list"""
+    return iter(io.StringIO(text))
+
+
+def iter_records(lines):
+    for line in lines:
+        record = parse_line(line)
+        if record is not None:
+            yield record
+
@@ -0,0 +1,165 @@
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import islice
+
+from fuzzy_match import squash
+from log_pipeline import LOG_LINE, LogRecord, iter_file_lines, iter_text_lines
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIME_OF_DAY = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)(?::([0-5]\d))?\b")
+LEVEL_WORDS = {
+    "ERROR": ("error", "errors", "fail", "failed", "failure", "failures"),
+    "WARN": ("warn", "warning", "warnings"),
+}
+
+
+class LogStore:
+    """
+    Columnar in-memory log store. Rows are kept in timestamp order, so a time
+    range is two bisects; per-component and per-level posting lists of row
+    numbers (also in time order) narrow a range to the lines of interest
+    without touching the rest.
+    """
+
+    def __init__(self):
+        self.timestamps = []
+        self.levels = []
+        self.components = []
+        self.messages = []
+        self.by_component = {}
+        self.by_level = {}
+        self.component_keys = {}
+        self._sorted = True
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def add(self, timestamp, level, component, message):
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            self._sorted = False
+        row = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        self.levels.append(level)
+        self.components.append(component)
+        self.messages.append(message)
+        self.by_component.setdefault(component, []).append(row)
+        self.by_level.setdefault(level, []).append(row)
+        self.component_keys.setdefault(squash(component), component)
+
+    def update(self, lines):
+        match = LOG_LINE.match
+        for line in lines:
+            found = match(line)
+            if found is not None:
+                timestamp, level, component, message = found.groups()
+                self.add(timestamp, level.upper(), component, message.rstrip())
+        return self
+
+    @classmethod
+    def from_file(cls, path):
+        return cls().update(iter_file_lines(path))
+
+    @classmethod
+    def from_text(cls, text):
+        return cls().update(iter_text_lines(text))
+
+    def _ensure_sorted(self):
+        """Out-of-order appends are rare; re-sort and rebuild postings once, lazily"""
+        if self._sorted:
+            return
+        order = sorted(range(len(self.timestamps)), key=self.timestamps.__getitem__)
+        columns = [self.timestamps, self.levels, self.components, self.messages]
+        self.timestamps, self.levels, self.components, self.messages = (
+            [column[row] for row in order] for column in columns
+        )
+        self.by_component = {}
+        self.by_level = {}
+        for row, (level, component) in enumerate(zip(self.levels, self.components)):
+            self.by_component.setdefault(component, []).append(row)
+            self.by_level.setdefault(level, []).append(row)
+        self._sorted = True
+
+    def record(self, row):
+        return LogRecord(self.timestamps[row], self.levels[row], self.components[row], self.messages[row])
+
+    def _rows_between(self, postings, start, end):
+        """Slice of a time-ordered posting list that falls inside [start, end]"""
+        timestamps = self.timestamps
+        lo = 0 if start is None else bisect_left(postings, start, key=timestamps.__getitem__)
+        hi = len(postings) if end is None else bisect_right(postings, end, key=timestamps.__getitem__)
+        return postings[lo:hi]
+
+    def query(self, start=None, end=None, components=None, levels=None, limit=None):
+        """
+        (matching row count, records) for lines with start <= timestamp <= end
+        (timestamps compare as 'YYYY-MM-DD HH:MM:SS' strings), restricted to
+        the given components and levels, in time order; at most ``limit``
+        records are materialized.
+        """
+        self._ensure_sorted()
+        if components is None:
+            lo = 0 if start is None else bisect_left(self.timestamps, start)
+            hi = len(self.timestamps) if end is None else bisect_right(self.timestamps, end)
+            ranges = [range(lo, hi)]
+        else:
+            ranges = [self._rows_between(self.by_component.get(c, []), start, end) for c in components]
+        if levels is not None:
+            # Narrow with the level postings when that is the smaller side.
+            level_rows = [self._rows_between(self.by_level.get(level, []), start, end) for level in levels]
+            if sum(map(len, level_rows)) < sum(map(len, ranges)):
+                wanted = set(components) if components is not None else None
+                ranges = [[row for row in rows if wanted is None or self.components[row] in wanted]
+                          for rows in level_rows]
+            else:
+                wanted_levels = set(levels)
+                ranges = [[row for row in rows if self.levels[row] in wanted_levels] for rows in ranges]
+        total = sum(map(len, ranges))
+        rows = merge(*ranges) if len(ranges) > 1 else iter(ranges[0])
+        return total, [self.record(row) for row in islice(rows, limit)]
+
+    # --- Question Filters ---
+    def components_in(self, text):
+        """Components whose names appear in free text, ignoring case and spacing"""
+        key = squash(text)
+        return [component for name, component in self.component_keys.items() if name and name in key]
+
+    def filters_for_question(self, question, default_components=None):
+        """
+        Query filters inferred from a Q&A question: components it names,
+        a time-of-day window ("between 22:15 and 22:16"), and error/warning
+        wording.
+        """
+        filters = {"components": self.components_in(question) or default_components}
+        times = TIME_OF_DAY.findall(question)
+        if times and self.timestamps:
+            self._ensure_sorted()
+            filters["start"], filters["end"] = self._time_window(times)
+        words = set(re.findall(r"[a-z]+", question.lower()))
+        levels = [level for level, vocabulary in LEVEL_WORDS.items() if words & set(vocabulary)]
+        if levels:
+            filters["levels"] = levels
+        return filters
+
+    def _time_window(self, times):
+        """
+        [start, end] for times of day, anchored at their latest occurrence
+        that is not after the last log line; a bare HH:MM covers its minute
+        and a window that wraps past midnight ends on the next day.
+        """
+        latest = datetime.strptime(self.timestamps[-1], TIMESTAMP_FORMAT)
+        seconds = [(int(h) * 3600 + int(m) * 60 + int(s or 0), int(h) * 3600 + int(m) * 60 + int(s or 59))
+                   for h, m, s in times]
+        first, last = seconds[0][0], seconds[-1][1]
+        midnight = latest.replace(hour=0, minute=0, second=0)
+        start = midnight + timedelta(seconds=first)
+        if start > latest:
+            start -= timedelta(days=1)
+        end = start.replace(hour=0, minute=0, second=0) + timedelta(seconds=last)
+        if end < start:
+            end += timedelta(days=1)
+        return start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)
+
+    def format(self, records):
+        return "\n".join(f"{r.timestamp} [{r.level}] [{r.component}] - {r.message}" for r in records)
@@ -0,0 +1,216 @@
+import re
+from collections import Counter
+
+from log_pipeline import LOG_LINE, SEVERITY, iter_file_lines, iter_text_lines
+
+WILDCARD = "<*>"
+
+# Obvious variables (UUIDs, IPs, hex, numbers with units) are masked before
+# clustering so that e.g. order ids never split a template.
+VARIABLE = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"
+    r"|\b0x[0-9a-fA-F]+\b"
+    r"|\b\d+(?:\.\d+)?(?:ms|s|MB|KB|GB|%)?\b"
+)
+MASK = "\x00"
+
+
+def tokenize(message):
+    """
+    (masked tokens, raw tokens) for a message. Masked values never contain
+    whitespace, so both lists line up position by position.
+    """
+    return VARIABLE.sub(MASK, message).split(), message.split()
+
+
+class LogCluster:
+    __slots__ = ("component", "template", "count", "levels", "first_seen", "last_seen", "examples")
+
+    def __init__(self, component, tokens, timestamp):
+        self.component = component
+        self.template = list(tokens)
+        self.count = 0
+        self.levels = Counter()
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.examples = []
+
+    def text(self):
+        return " ".join(self.template).replace(MASK, WILDCARD)
+
+
+class ComponentStats:
+    """Per-level counts of one component, its time span and the first and latest line at each level"""
+
+    __slots__ = ("levels", "first_seen", "last_seen", "first", "last")
+
+    def __init__(self, timestamp):
+        self.levels = Counter()
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        # level -> (timestamp, message)
+        self.first = {}
+        self.last = {}
+
+    def add(self, timestamp, level, message):
+        self.levels[level] += 1
+        self.last_seen = timestamp
+        if level not in self.first:
+            self.first[level] = (timestamp, message)
+        self.last[level] = (timestamp, message)
+
+
+class TemplateMiner:
+    """
+    Drain-style online log clustering. Messages are masked, tokenized and
+    bucketed by component, token count and first token; within a bucket a
+    line joins the most similar cluster if enough token positions agree,
+    and positions that disagree become wildcards. Each line is folded into
+    the existing clusters as it arrives, so new lines never trigger a
+    reprocess of earlier ones. Running per-component, per-level counts with
+    first and last occurrences are kept alongside, in constant memory.
+    """
+
+    def __init__(self, similarity=0.5, max_examples=3):
+        self.similarity = similarity
+        self.max_examples = max_examples
+        self.buckets = {}
+        self.clusters = []
+        self.lines = 0
+        self.unparsed = 0
+        self.levels = Counter()
+        self.components = {}
+        self.first_seen = None
+        self.last_seen = None
+
+    def _bucket_key(self, component, tokens):
+        first = tokens[0] if tokens and MASK not in tokens[0] else WILDCARD
+        return component, len(tokens), first
+
+    def _match(self, bucket, tokens):
+        best, best_score = None, -1.0
+        for cluster in bucket:
+            same = sum(1 for a, b in zip(cluster.template, tokens) if a == b)
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is not None and best_score >= self.similarity:
+            return best
+        return None
+
+    def add(self, timestamp, level, component, message):
+        tokens, raw_tokens = tokenize(message)
+        key = self._bucket_key(component, tokens)
+        bucket = self.buckets.setdefault(key, [])
+        cluster = self._match(bucket, tokens)
+        if cluster is None:
+            cluster = LogCluster(component, tokens, timestamp)
+            bucket.append(cluster)
+            self.clusters.append(cluster)
+        else:
+            for i, (have, token) in enumerate(zip(cluster.template, tokens)):
+                if have != token and have != MASK:
+                    cluster.template[i] = MASK
+        params = []
+        for have, raw in zip(cluster.template, raw_tokens):
+            if have == MASK:
+                params.append(raw)
+            elif MASK in have:
+                params.extend(VARIABLE.findall(raw))
+        cluster.count += 1
+        cluster.levels[level] += 1
+        cluster.last_seen = timestamp
+        if params and len(cluster.examples) < self.max_examples and params not in cluster.examples:
+            cluster.examples.append(params)
+
+        stats = self.components.get(component)
+        if stats is None:
+            stats = self.components[component] = ComponentStats(timestamp)
+        stats.add(timestamp, level, message)
+
+        self.lines += 1
+        self.levels[level] += 1
+        if self.first_seen is None:
+            self.first_seen = timestamp
+        self.last_seen = timestamp
+        return cluster
+
+    def update(self, lines):
+        match = LOG_LINE.match
+        for line in lines:
+            found = match(line)
+            if found is None:
+                if line.strip():
+                    self.lines += 1
+                    self.unparsed += 1
+                continue
+            timestamp, level, component, message = found.groups()
+            self.add(timestamp, level.upper(), component, message.rstrip())
+        return self
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        return cls(**kwargs).update(iter_file_lines(path))
+
+    @classmethod
+    def from_text(cls, text, **kwargs):
+        return cls(**kwargs).update(iter_text_lines(text))
+
+    def component_summary(self, max_components=25):
+        """One line per component, worst first: level counts, time span and the first and last line at its worst level"""
+        def worst_level(stats):
+            return max(stats.levels, key=lambda level: SEVERITY.get(level, 0))
+
+        def rank(item):
+            stats = item[1]
+            return -SEVERITY.get(worst_level(stats), 0), -stats.levels[worst_level(stats)]
+
+        ranked = sorted(self.components.items(), key=rank)
+        rows = []
+        for component, stats in ranked[:max_components]:
+            level = worst_level(stats)
+            counts = " ".join(f"{name}={count}" for name, count in stats.levels.most_common())
+            first_ts, first_msg = stats.first[level]
+            last_ts, last_msg = stats.last[level]
+            row = f"[{component}] {counts}"
+            if stats.first_seen != stats.last_seen:
+                row += f" | {stats.first_seen}..{stats.last_seen}"
+            row += f" | first {level} {first_ts}: {first_msg}"
+            if (last_ts, last_msg) != (first_ts, first_msg):
+                row += f" | last {level} {last_ts}: {last_msg}"
+            rows.append(row)
+        if len(ranked) > max_components:
+            rows.append(f"... {len(ranked) - max_components} more components")
+        return "\n".join(rows)
+
+    def summary(self, max_templates=40, max_components=25):
+        """
+        The header, one line per component (see component_summary), then one
+        line per template, most severe and most frequent first
+        """
+        if not self.clusters:
+            return f"No parseable log lines ({self.unparsed} unparsed)."
+
+        def rank(cluster):
+            worst = max(SEVERITY.get(level, 0) for level in cluster.levels)
+            return -worst, -cluster.count
+
+        levels = " ".join(f"{level}={count}" for level, count in self.levels.most_common())
+        rows = [f"{self.lines} lines, {len(self.clusters)} templates {self.first_seen}..{self.last_seen} | {levels}"
+                + (f" | {self.unparsed} unparsed" if self.unparsed else ""),
+                "Components:", self.component_summary(max_components), "Templates:"]
+        ranked = sorted(self.clusters, key=rank)
+        for cluster in ranked[:max_templates]:
+            if len(cluster.levels) == 1:
+                counts = next(iter(cluster.levels))
+            else:
+                counts = " ".join(f"{level}={count}" for level, count in cluster.levels.most_common())
+            span = cluster.first_seen if cluster.first_seen == cluster.last_seen else f"{cluster.first_seen}..{cluster.last_seen}"
+            row = f"[{cluster.component}] {counts} x{cluster.count} {span} | {cluster.text()}"
+            if cluster.examples and cluster.count > 1:
+                row += " | e.g. " + "; ".join(", ".join(params) for params in cluster.examples)
+            rows.append(row)
+        if len(ranked) > max_templates:
+            rows.append(f"... {len(ranked) - max_templates} more templates")
+        return "\n".join(rows)
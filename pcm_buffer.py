@@ -0,0 +1,127 @@
+import io
+import threading
+import wave
+
+import numpy as np
+
+# --- Capture Policy ---
+# Microphone audio is kept as raw interleaved 16-bit PCM in one preallocated
+# ring, so memory is fixed by the retention window however long the bridge runs.
+RETENTION_SECONDS = 30
+SAMPLE_RATE = 48000
+CHANNELS = 2
+
+
+class PCMRingBuffer:
+    """
+    Fixed-capacity ring of int16 samples fed from the WebRTC receive thread.
+    Frames are copied straight into the ring (at most two slice copies, no
+    per-frame objects). ``drain()`` returns the audio not read yet, reusing a
+    preallocated scratch array. Unread audio that is overwritten is counted
+    in ``overflow_samples``; frames in an unexpected format in ``dropped_frames``.
+    """
+
+    def __init__(self, retention_seconds=RETENTION_SECONDS, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.retention_seconds = retention_seconds
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.dropped_frames = 0
+        self.overflow_samples = 0
+        self._allocate(sample_rate, channels)
+
+    def _allocate(self, sample_rate, channels):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capacity = int(self.retention_seconds * sample_rate) * channels
+        self.ring = np.zeros(self.capacity, dtype=np.int16)
+        self.scratch = np.empty(self.capacity, dtype=np.int16)
+        self.written = 0
+        self.read = 0
+
+    # --- Writing ---
+    def write(self, samples):
+        """Append interleaved samples (any int16-compatible array)"""
+        samples = np.asarray(samples).reshape(-1)
+        if samples.dtype != np.int16:
+            if samples.dtype.kind != "f":
+                self.dropped_frames += 1
+                return
+            samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+        with self.lock:
+            total = len(samples)
+            if total > self.capacity:
+                samples = samples[-self.capacity:]
+            count = len(samples)
+            start = (self.written + total - count) % self.capacity
+            first = min(count, self.capacity - start)
+            self.ring[start:start + first] = samples[:first]
+            self.ring[:count - first] = samples[first:]
+            self.written += total
+            self.frames += 1
+            unread = self.written - self.read
+            if unread > self.capacity:
+                self.overflow_samples += unread - self.capacity
+                self.read = self.written - self.capacity
+
+    def write_frame(self, frame):
+        """Append an av.AudioFrame; the first frame fixes the sample rate and channel count"""
+        channels = len(frame.layout.channels)
+        if (frame.sample_rate, channels) != (self.sample_rate, self.channels):
+            with self.lock:
+                if self.written:
+                    self.dropped_frames += 1
+                    return
+                self._allocate(frame.sample_rate, channels)
+        samples = frame.to_ndarray()
+        if frame.format.is_planar and channels > 1:
+            samples = samples.T
+        self.write(samples)
+
+    # --- Reading ---
+    def _copy_out(self, start, end):
+        """Samples [start, end) of the stream into the scratch array; returns a view of it"""
+        count = end - start
+        offset = start % self.capacity
+        first = min(count, self.capacity - offset)
+        self.scratch[:first] = self.ring[offset:offset + first]
+        self.scratch[first:count] = self.ring[:count - first]
+        return self.scratch[:count]
+
+    def snapshot(self, seconds=None):
+        """The most recent audio (all retained by default); valid until the next read"""
+        with self.lock:
+            available = min(self.written, self.capacity)
+            if seconds is not None:
+                available = min(available, int(seconds * self.sample_rate) * self.channels)
+            return self._copy_out(self.written - available, self.written)
+
+    def drain(self):
+        """Audio captured since the previous drain; valid until the next read"""
+        with self.lock:
+            samples = self._copy_out(self.read, self.written)
+            self.read = self.written
+            return samples
+
+    def clear(self):
+        with self.lock:
+            self.read = self.written
+
+    def to_wav(self, samples):
+        """WAV file bytes for samples read from this buffer"""
+        out = io.BytesIO()
+        with wave.open(out, "wb") as wav:
+            wav.setnchannels(self.channels)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(samples.tobytes())
+        return out.getvalue()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "frames": self.frames,
+                "buffered_seconds": min(self.written - self.read, self.capacity) / (self.sample_rate * self.channels),
+                "overflow_samples": self.overflow_samples,
+                "dropped_frames": self.dropped_frames,
+                "capacity_bytes": self.ring.nbytes + self.scratch.nbytes,
+            }
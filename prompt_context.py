@@ -0,0 +1,54 @@
+import json
+import os
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+
+
+# --- Compact Context Encoding ---
+def format_cmdb(cmdb):
+    """
+    Render CMDB records as a pipe-separated table: one header row, one row per
+    CI, list fields comma-joined. Much denser than indented JSON for the model.
+    Anything that is not a list of records falls back to minified JSON.
+    """
+    if not isinstance(cmdb, (list, tuple)) or not all(isinstance(ci, dict) for ci in cmdb):
+        return json.dumps(cmdb, separators=(",", ":"))
+    columns = []
+    for ci in cmdb:
+        for key in ci:
+            if key not in columns:
+                columns.append(key)
+    rows = ["|".join(columns)]
+    for ci in cmdb:
+        cells = []
+        for column in columns:
+            value = ci.get(column, "")
+            if isinstance(value, (list, tuple)):
+                value = ",".join(str(v) for v in value)
+            cells.append(str(value))
+        rows.append("|".join(cells))
+    return "\n".join(rows)
+
+
+def estimate_tokens(text):
+    """Token count with tiktoken when installed, otherwise ~4 characters per token"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+# --- Data Versioning ---
+def file_version(*paths):
+    """Cheap version key for a set of files: their mtimes and sizes"""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
@@ -0,0 +1,236 @@
+import hashlib
+import heapq
+import itertools
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# --- Cache Policy ---
+# Bridge participants keep asking the same few questions, and the context Agent 5
+# answers from is identical for all of them until the incident moves on. Answers
+# are cached per context hash: an exact match on the normalized question first,
+# then a TF-IDF cosine match against earlier questions in the same context.
+# Entries expire after TTL_SECONDS and the least recently used go past MAX_ENTRIES.
+MAX_ENTRIES = 100_000
+TTL_SECONDS = 3600
+SIMILARITY_THRESHOLD = 0.8
+POSTING_BUDGET = 5_000
+RERANK = 32
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an the is are was were be been being am do does did s of for to in on at by with from about into this that these those
+it its there their they them we our us you your i me my can could would should will
+please tell show give let know any some just currently right now
+""".split())
+
+# Spellings bridge participants use interchangeably
+SYNONYMS = {"db": "database", "impacted": "affected", "app": "application", "apps": "application",
+            "svc": "service", "err": "error", "errs": "error", "whats": "what", "which": "what"}
+# Question words are kept as terms and must agree for a cached answer to be
+# reused: "why is the database affected?" is not "when was it affected?".
+INTERROGATIVES = frozenset(["what", "who", "whom", "whose", "when", "where", "why", "how"])
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def context_key(*parts):
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _term(word):
+    word = SYNONYMS.get(word, word)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return SYNONYMS.get(word, word)
+
+
+def question_terms(question):
+    """
+    Content words of a question: lowercased, apostrophes dropped (so "what's"
+    and "whats" agree), plurals and common synonyms folded
+    """
+    return [_term(word) for word in _WORD.findall(question.lower().replace("'", "").replace("’", ""))
+            if word not in STOPWORDS]
+
+
+class _Entry:
+    __slots__ = ("id", "context", "normalized", "terms", "answer", "created")
+
+    def __init__(self, entry_id, context, normalized, terms, answer, created):
+        self.id = entry_id
+        self.context = context
+        self.normalized = normalized
+        self.terms = terms
+        self.answer = answer
+        self.created = created
+
+
+class _Context:
+    """Questions cached for one context: exact lookup plus a term -> entry ids inverted index"""
+
+    def __init__(self):
+        self.exact = {}
+        self.postings = {}
+
+    def add(self, entry):
+        self.exact[entry.normalized] = entry
+        for term in entry.terms:
+            self.postings.setdefault(term, {})[entry.id] = entry
+
+    def remove(self, entry):
+        if self.exact.get(entry.normalized) is entry:
+            del self.exact[entry.normalized]
+        for term in entry.terms:
+            ids = self.postings.get(term)
+            if ids is not None:
+                ids.pop(entry.id, None)
+                if not ids:
+                    del self.postings[term]
+
+    def __len__(self):
+        return len(self.exact)
+
+
+class QACache:
+    """
+    Agent 5 answers keyed on (context hash, question). ``get`` returns the
+    cached answer for the question or a near-duplicate of it (cosine
+    similarity of TF-IDF term weights >= ``threshold``), else None.
+
+    Near-duplicates are only matched when both questions mention the same
+    numbers, so "errors after 10:05" never answers "errors after 10:15".
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, threshold=SIMILARITY_THRESHOLD, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.contexts = {}
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.metrics = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    # --- Lookup ---
+    def get(self, context, question):
+        terms = question_terms(question)
+        with self.lock:
+            shelf = self.contexts.get(context) if terms else None
+            entry = shelf.exact.get(" ".join(terms)) if shelf else None
+            if entry is not None and self._expired(entry):
+                entry = None
+            if entry is not None:
+                self.metrics["exact_hits"] += 1
+            elif shelf:
+                entry = self._most_similar(shelf, set(terms))
+                if entry is not None:
+                    self.metrics["similar_hits"] += 1
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            self.entries.move_to_end(entry.id)
+            return entry.answer
+
+    def _most_similar(self, shelf, terms):
+        # Candidates come from the query's rarest terms first, up to a posting
+        # budget, so a common word like "error" never forces a scan of the context.
+        lists = sorted((shelf.postings[term] for term in terms if term in shelf.postings), key=len)
+        hits = {}
+        scanned = 0
+        for ids in lists:
+            if hits and scanned + len(ids) > POSTING_BUDGET:
+                break
+            scanned += len(ids)
+            # Even the rarest term may be in most entries; then only the newest are considered.
+            for entry_id in itertools.islice(reversed(ids), POSTING_BUDGET):
+                hits[entry_id] = hits.get(entry_id, 0) + 1
+        if not hits:
+            return None
+        candidates = heapq.nlargest(RERANK, hits, key=hits.get)
+
+        size = len(shelf) + 1
+        idf = {}
+
+        def weight(term):
+            if term not in idf:
+                idf[term] = math.log(size / (1 + len(shelf.postings.get(term, ())))) + 1
+            return idf[term]
+
+        query_norm = math.sqrt(sum(weight(term) ** 2 for term in terms))
+        query_numbers = {term for term in terms if term.isdigit()}
+        query_interrogatives = terms & INTERROGATIVES
+        best, best_score = None, self.threshold
+        for entry_id in candidates:
+            entry = self.entries[entry_id]
+            if {term for term in entry.terms if term.isdigit()} != query_numbers or self._expired(entry):
+                continue
+            if entry.terms & INTERROGATIVES != query_interrogatives:
+                continue
+            shared = sum(weight(term) ** 2 for term in terms & entry.terms)
+            score = shared / (query_norm * math.sqrt(sum(weight(term) ** 2 for term in entry.terms)))
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    # --- Storage ---
+    def put(self, context, question, answer):
+        """Cache an answer; questions made only of stopwords ("what is it?") are too vague to reuse"""
+        terms = question_terms(question)
+        if not terms:
+            return
+        normalized = " ".join(terms)
+        now = self.clock()
+        with self.lock:
+            previous = self.contexts[context].exact.get(normalized) if context in self.contexts else None
+            if previous is not None:
+                self._remove(previous)
+            shelf = self.contexts.setdefault(context, _Context())
+            entry = _Entry(self.next_id, context, normalized, frozenset(terms), answer, now)
+            self.next_id += 1
+            self.entries[entry.id] = entry
+            shelf.add(entry)
+            while len(self.entries) > self.max_entries:
+                _, oldest = self.entries.popitem(last=False)
+                self._forget(oldest)
+                self.metrics["evictions"] += 1
+
+    def _expired(self, entry):
+        """Drops the entry when its TTL has run out; the lock is held by the caller"""
+        if self.clock() - entry.created < self.ttl:
+            return False
+        self._remove(entry)
+        self.metrics["expirations"] += 1
+        return True
+
+    def _remove(self, entry):
+        del self.entries[entry.id]
+        self._forget(entry)
+
+    def _forget(self, entry):
+        shelf = self.contexts[entry.context]
+        shelf.remove(entry)
+        if not len(shelf):
+            del self.contexts[entry.context]
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.metrics)
+            stats.update(entries=len(self.entries), contexts=len(self.contexts))
+        lookups = stats["exact_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def get_qa_cache():
+    """Process-wide Q&A cache, shared by every session on the bridge"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QACache()
+    return _cache
@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from prompt_context import estimate_tokens
+
+# --- Provider Limits ---
+# Requests and tokens per minute for each model, shared by every caller in the
+# process (Streamlit sessions, the chat API, TTS workers). Providers enforce
+# per-minute quotas over much shorter intervals, so a bucket only holds
+# BURST_SECONDS worth of its rate. When the bucket is empty, waiters are
+# served by priority class, then first come first served.
+# OPENAI_RATE_LIMITS (JSON, same shape, "default" for unlisted models)
+# overrides these for an account on a higher usage tier.
+MODEL_LIMITS = {
+    "gpt-4o-mini": {"requests": 500, "tokens": 200_000},
+    "tts-1": {"requests": 50, "tokens": None},
+    "whisper-1": {"requests": 50, "tokens": None},
+}
+DEFAULT_LIMITS = {"requests": 500, "tokens": 200_000}
+BURST_SECONDS = 1
+# Completion tokens counted for a request that does not set max_tokens.
+DEFAULT_COMPLETION_TOKENS = 500
+# Longest a waiter sleeps before checking again whether it is at the head.
+POLL_SECONDS = 0.05
+
+# Priority classes; lower is served first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+class TokenBucket:
+    """``per_minute`` units refilled continuously, holding at most ``capacity``"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """
+        Seconds until ``amount`` units are available (0 if they are now). A
+        request bigger than the bucket goes once it is full and leaves it in
+        debt, so large requests still count in full.
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+
+class _ModelState:
+    def __init__(self, limits):
+        self.requests = TokenBucket(limits["requests"])
+        self.tokens = TokenBucket(limits["tokens"]) if limits.get("tokens") else None
+        self.paused_until = 0.0
+        self.waiters = []
+        self.granted = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+
+class RateLimiter:
+    """
+    Token buckets for requests/min and tokens/min per model. ``acquire``
+    blocks the calling thread and ``acquire_async`` the calling task until the
+    request may be sent; both share the same buckets and waiting line.
+    ``pause`` stops a model's traffic after the provider returns 429.
+    """
+
+    def __init__(self, model_limits=None):
+        self.model_limits = dict(MODEL_LIMITS, **(model_limits or {}))
+        self.default_limits = self.model_limits.pop("default", DEFAULT_LIMITS)
+        self.models = {}
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+
+    def _state(self, model):
+        state = self.models.get(model)
+        if state is None:
+            state = self.models[model] = _ModelState(self.model_limits.get(model, self.default_limits))
+        return state
+
+    def _enqueue(self, model, priority):
+        ticket = (priority, next(self.sequence))
+        with self.lock:
+            heapq.heappush(self._state(model).waiters, ticket)
+        return ticket
+
+    def _try(self, model, ticket, tokens):
+        """0 once the request is granted, else the seconds to wait before trying again"""
+        with self.lock:
+            state = self._state(model)
+            now = time.monotonic()
+            wait = max(state.paused_until - now,
+                       state.requests.wait_time(1, now),
+                       state.tokens.wait_time(tokens, now) if state.tokens and tokens else 0.0)
+            if state.waiters[0] != ticket:
+                # Someone ahead in line gets the next capacity.
+                return max(wait, 0.001)
+            if wait > 0:
+                return wait
+            heapq.heappop(state.waiters)
+            state.requests.take(1)
+            if state.tokens and tokens:
+                state.tokens.take(tokens)
+            state.granted += 1
+            return 0.0
+
+    def _leave(self, model, ticket):
+        with self.lock:
+            waiters = self._state(model).waiters
+            if ticket in waiters:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+
+    def _granted(self, model, started):
+        with self.lock:
+            self._state(model).waited_seconds += time.monotonic() - started
+
+    def acquire(self, model, tokens=0, priority=INTERACTIVE):
+        started = time.monotonic()
+        ticket = self._enqueue(model, priority)
+        try:
+            while True:
+                wait = self._try(model, ticket, tokens)
+                if not wait:
+                    break
+                time.sleep(min(wait, POLL_SECONDS))
+        except BaseException:
+            self._leave(model, ticket)
+            raise
+        self._granted(model, started)
+
+    async def acquire_async(self, model, tokens=0, priority=INTERACTIVE):
+        started = time.monotonic()
+        ticket = self._enqueue(model, priority)
+        try:
+            while True:
+                wait = self._try(model, ticket, tokens)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, POLL_SECONDS))
+        except BaseException:
+            self._leave(model, ticket)
+            raise
+        self._granted(model, started)
+
+    def pause(self, model, seconds):
+        """Hold every request for ``model`` for ``seconds`` (the provider's Retry-After)"""
+        with self.lock:
+            state = self._state(model)
+            state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+            state.throttled += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                model: {
+                    "granted": state.granted,
+                    "waiting": len(state.waiters),
+                    "throttled": state.throttled,
+                    "mean_wait_ms": round(state.waited_seconds / state.granted * 1000, 1) if state.granted else 0.0,
+                }
+                for model, state in self.models.items()
+            }
+
+
+def get_rate_limiter():
+    """Process-wide rate limiter, created on first use"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(json.loads(os.getenv("OPENAI_RATE_LIMITS", "{}")))
+    return _rate_limiter
+
+
+def request_tokens(payload):
+    """Tokens a request counts against its model's budget: the prompt plus the completion it may produce"""
+    if "messages" in payload:
+        prompt = sum(estimate_tokens(message.get("content") or "") for message in payload["messages"])
+        return prompt + payload.get("max_tokens", DEFAULT_COMPLETION_TOKENS)
+    return estimate_tokens(payload.get("input", "")) if isinstance(payload.get("input"), str) else 0
+
+
+# --- Request Coalescing ---
+def request_key(url, payload, headers=None):
+    """Identifies a request by everything that can change its response, including the API key"""
+    return hashlib.sha256(json.dumps([url, payload, headers], sort_keys=True, default=_digest).encode()).hexdigest()
+
+
+def _digest(value):
+    """Uploads (e.g. audio for transcription) are keyed by their content"""
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    return repr(value)
+
+
+class SingleFlight:
+    """
+    Identical requests in flight at the same time are sent once and every
+    caller gets the same result (or exception). Results are shared, so callers
+    must not change them.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.async_calls = {}
+        self.lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+    async def do_async(self, key, func):
+        """
+        do() for coroutines: ``func()`` returns an awaitable; futures are per
+        event loop. If the caller making the call is cancelled, the next
+        caller still waiting makes it again instead of failing with it.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            calls = self.async_calls.setdefault(loop, {})
+            future = calls.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                self.coalesced -= 1
+        future = calls[key] = loop.create_future()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an unshared failure is not reported as never retrieved.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del calls[key]
+            if not calls:
+                self.async_calls.pop(loop, None)
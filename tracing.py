@@ -0,0 +1,467 @@
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Tracing Policy ---
+# A span costs a few clock reads and a small object, so the hot path is traced
+# all the time. Spans belong to a trace (one per incident or session) and nest
+# through the current span of the running thread or task. Finished spans are
+# kept per trace for the waterfall view, aggregated per span name for the
+# Prometheus endpoint and, if TRACE_JSONL is set, appended to that file.
+# Numeric attributes named *tokens or *bytes are summed per span name. Past
+# MAX_TRACES, the oldest trace with no span still open is dropped first.
+MAX_TRACES = 1000
+MAX_SPANS_PER_TRACE = 2000
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TRACE_JSONL = os.getenv("TRACE_JSONL")
+# Seconds between stack samples; 0 leaves the sampling profiler off.
+PROFILE_INTERVAL = float(os.getenv("TRACE_PROFILE_INTERVAL", "0"))
+PROFILE_MAX_DEPTH = 40
+METRICS_HOST = os.getenv("TRACE_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("TRACE_METRICS_PORT", "9464"))
+
+_current = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+# Wall-clock time of perf_counter() == 0, so spans read one clock.
+_WALL_OFFSET = time.time() - time.perf_counter()
+_tracer = None
+_tracer_lock = threading.Lock()
+_metrics_server = None
+_metrics_server_started = False
+_metrics_server_lock = threading.Lock()
+
+
+class Span:
+    """One timed piece of work; ``set`` adds attributes, ``finish`` records it"""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "thread_id", "start", "end", "attrs", "error")
+
+    def __init__(self, tracer, name, trace_id, parent_id, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attrs = attrs
+        self.error = None
+        self.end = None
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    def add(self, name, amount):
+        self.attrs[name] = self.attrs.get(name, 0) + amount
+
+    def finish(self, error=None):
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        if error is not None:
+            self.error = error if isinstance(error, str) else type(error).__name__
+        self.tracer._record(self)
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start + _WALL_OFFSET, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _NoSpan:
+    """Stands in for a span while tracing is disabled"""
+
+    trace_id = span_id = None
+    duration_ms = 0.0
+
+    def set(self, **attrs):
+        return self
+
+    def add(self, name, amount):
+        pass
+
+    def finish(self, error=None):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class _SpanStats:
+    __slots__ = ("count", "errors", "seconds", "buckets", "totals")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.totals = {}
+
+
+class Tracer:
+    """
+    Collects spans. ``span()`` is a context manager that makes the span
+    current for nested work; ``start_span()``/``Span.finish()`` are for work
+    that outlives one block, such as a streamed reply.
+    """
+
+    def __init__(self, jsonl_path=TRACE_JSONL, enabled=True):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.traces = OrderedDict()
+        self.stats = {}
+        self.open_spans = {}
+        self.active = {}
+        self.lock = threading.Lock()
+        self.profiler = None
+        self._jsonl = None
+        self._jsonl_lines = deque()
+        self._jsonl_lock = threading.Lock()
+
+    def start_span(self, name, trace_id=None, parent=None, **attrs):
+        if not self.enabled:
+            return NO_SPAN
+        if parent is None:
+            parent = _current.get()
+        if parent is NO_SPAN:
+            parent = None
+        trace_id = trace_id or (parent.trace_id if parent is not None else uuid.uuid4().hex)
+        span = Span(self, name, trace_id, parent.span_id if parent is not None else None, attrs)
+        with self.lock:
+            self.open_spans[trace_id] = self.open_spans.get(trace_id, 0) + 1
+            if self.profiler is not None:
+                self.active.setdefault(span.thread_id, []).append(span)
+        return span
+
+    def span(self, name, trace_id=None, parent=None, **attrs):
+        return _SpanContext(self, name, trace_id, parent, attrs)
+
+    def _record(self, span):
+        seconds = span.end - span.start
+        line = json.dumps(span.to_dict(), default=str) + "\n" if self.jsonl_path else None
+        with self.lock:
+            stack = self.active.get(span.thread_id)
+            if stack and span in stack:
+                stack.remove(span)
+            still_open = self.open_spans.get(span.trace_id, 1) - 1
+            if still_open:
+                self.open_spans[span.trace_id] = still_open
+            else:
+                self.open_spans.pop(span.trace_id, None)
+            spans = self.traces.get(span.trace_id)
+            if spans is None:
+                spans = self.traces[span.trace_id] = deque(maxlen=MAX_SPANS_PER_TRACE)
+                if len(self.traces) > MAX_TRACES:
+                    self._evict_trace()
+            spans.append(span)
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = _SpanStats()
+            stats.count += 1
+            stats.seconds += seconds
+            if span.error:
+                stats.errors += 1
+            bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+            if bucket < len(LATENCY_BUCKETS):
+                stats.buckets[bucket] += 1
+            for key, value in span.attrs.items():
+                if (key.endswith("tokens") or key.endswith("bytes")) and isinstance(value, (int, float)):
+                    stats.totals[key] = stats.totals.get(key, 0) + value
+        if line is not None:
+            self._jsonl_lines.append(line)
+            self._write_jsonl()
+
+    def _evict_trace(self):
+        """Drop the oldest finished trace, or the oldest trace if every one still has open spans"""
+        for trace_id in self.traces:
+            if trace_id not in self.open_spans:
+                del self.traces[trace_id]
+                return
+        self.traces.popitem(last=False)
+
+    def _write_jsonl(self):
+        """
+        Append queued JSONL lines outside the tracer lock. Whichever thread
+        gets the writer lock writes everything queued; the others move on.
+        """
+        while self._jsonl_lines and self._jsonl_lock.acquire(blocking=False):
+            try:
+                lines = []
+                while self._jsonl_lines:
+                    lines.append(self._jsonl_lines.popleft())
+                if self._jsonl is None:
+                    self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+                self._jsonl.write("".join(lines))
+                self._jsonl.flush()
+            finally:
+                self._jsonl_lock.release()
+
+    # --- Views ---
+    def waterfall(self, trace_id, limit=200):
+        """
+        The trace's most recent spans in start order, each with its offset from
+        the first one, duration and nesting depth, for a waterfall chart
+        """
+        with self.lock:
+            spans = list(self.traces.get(trace_id, ()))[-limit:]
+        if not spans:
+            return []
+        spans.sort(key=lambda span: span.start)
+        origin = spans[0].start
+        depth = {}
+        rows = []
+        for span in spans:
+            depth[span.span_id] = depth[span.parent_id] + 1 if span.parent_id in depth else 0
+            rows.append({
+                "name": span.name,
+                "depth": depth[span.span_id],
+                "start_ms": round((span.start - origin) * 1000, 1),
+                "duration_ms": round(span.duration_ms, 1),
+                "error": span.error,
+                "attrs": span.attrs,
+            })
+        return rows
+
+    def render_prometheus(self):
+        """Span counts, latency histograms and token/byte totals in the Prometheus text format"""
+        with self.lock:
+            stats = {name: (s.count, s.errors, s.seconds, list(s.buckets), dict(s.totals)) for name, s in self.stats.items()}
+        lines = [
+            "# HELP incident_span_duration_seconds Time spent in each traced stage.",
+            "# TYPE incident_span_duration_seconds histogram",
+        ]
+        for name, (count, _, seconds, buckets, _) in sorted(stats.items()):
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'incident_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'incident_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {count}')
+            lines.append(f'incident_span_duration_seconds_sum{{span="{name}"}} {seconds:.6f}')
+            lines.append(f'incident_span_duration_seconds_count{{span="{name}"}} {count}')
+        lines += ["# HELP incident_span_errors_total Traced stages that raised.",
+                  "# TYPE incident_span_errors_total counter"]
+        lines += [f'incident_span_errors_total{{span="{name}"}} {errors}' for name, (_, errors, _, _, _) in sorted(stats.items())]
+        lines += ["# HELP incident_span_units_total Tokens and bytes recorded on traced stages.",
+                  "# TYPE incident_span_units_total counter"]
+        for name, (_, _, _, _, totals) in sorted(stats.items()):
+            lines += [f'incident_span_units_total{{span="{name}",unit="{unit}"}} {total}' for unit, total in sorted(totals.items())]
+        return "\n".join(lines) + "\n"
+
+    # --- Profiling ---
+    def start_profiler(self, interval=PROFILE_INTERVAL or 0.01):
+        """Sample the stacks of threads inside a span every ``interval`` seconds (see SamplingProfiler)"""
+        with self.lock:
+            if self.profiler is None:
+                self.profiler = SamplingProfiler(self, interval)
+                self.profiler.start()
+        return self.profiler
+
+    def render_profile(self):
+        """The profiler's samples as folded stacks; empty while it is off"""
+        return self.profiler.folded() if self.profiler is not None else ""
+
+    def close(self):
+        if self.profiler is not None:
+            self.profiler.stop()
+        with self._jsonl_lock:
+            if self._jsonl_lines:
+                if self._jsonl is None:
+                    self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+                self._jsonl.write("".join(self._jsonl_lines))
+                self._jsonl_lines.clear()
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+
+class _SpanContext:
+    """``with tracer.span(...) as span``: the span is current inside the block and finished (with any error) after it"""
+
+    __slots__ = ("tracer", "name", "trace_id", "parent", "attrs", "span", "token")
+
+    def __init__(self, tracer, name, trace_id, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.parent = parent
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.span = self.tracer.start_span(self.name, self.trace_id, self.parent, **self.attrs)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current.reset(self.token)
+        self.span.finish(exc)
+        return False
+
+
+class SamplingProfiler(threading.Thread):
+    """
+    Counts stack samples of threads running a span, keyed by the innermost
+    span's name, and writes them in the folded format flame graph tools read.
+    Only spans started while the profiler runs are sampled.
+    """
+
+    def __init__(self, tracer, interval):
+        super().__init__(name="trace-profiler", daemon=True)
+        self.tracer = tracer
+        self.interval = interval
+        self.samples = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            with self.tracer.lock:
+                current = {thread_id: stack[-1].name for thread_id, stack in self.tracer.active.items() if stack}
+            if not current:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                name = current.get(thread_id)
+                if name is None or thread_id == own:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ";".join([name] + frames[::-1])
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def stop(self):
+        self.stopped.set()
+
+    def folded(self):
+        # Copied first: the sampling thread keeps adding stacks.
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(dict(self.samples).items()))
+
+
+def get_tracer():
+    """Process-wide tracer, created on first use; the profiler starts with it when TRACE_PROFILE_INTERVAL is set"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                tracer = Tracer()
+                if PROFILE_INTERVAL:
+                    tracer.start_profiler(PROFILE_INTERVAL)
+                _tracer = tracer
+    return _tracer
+
+
+def span(name, trace_id=None, parent=None, **attrs):
+    return get_tracer().span(name, trace_id, parent, **attrs)
+
+
+def current_span():
+    """The innermost span of the running thread or task, or a no-op span outside any"""
+    return _current.get() or NO_SPAN
+
+
+def set_current(span):
+    """Make ``span`` current for the rest of the running context (e.g. one Streamlit rerun)"""
+    _current.set(span)
+
+
+def traced(name=None):
+    """Decorator: run the function in a span named after it"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind(func):
+    """
+    Wrap ``func`` so spans it starts on a worker thread nest under the span
+    current here; thread pools do not carry context variables across
+    """
+    parent = _current.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+# --- Metrics Endpoint ---
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = get_tracer().render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif path == "/profile":
+            body, content_type = get_tracer().render_profile().encode(), "text/plain"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def get_metrics_server():
+    """
+    Prometheus text endpoint (GET /metrics, plus GET /profile for the
+    profiler's folded stacks) on a background thread, for
+    processes without an HTTP API. Started once per process; None if no port
+    could be bound.
+    """
+    global _metrics_server, _metrics_server_started
+    if not _metrics_server_started:
+        with _metrics_server_lock:
+            if not _metrics_server_started:
+                _metrics_server = _start_metrics_server()
+                _metrics_server_started = True
+    return _metrics_server
+
+
+def _start_metrics_server():
+    # METRICS_PORT is taken when another process on the host already serves
+    # metrics; any free port will do then, and server_address says which.
+    for port in (METRICS_PORT, 0):
+        try:
+            server = ThreadingHTTPServer((METRICS_HOST, port), MetricsHandler)
+        except OSError:
+            continue
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    return None
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from rate_limiter import SingleFlight
+
+# --- Cache Policy ---
+# Most agent lines repeat (welcome, "couldn't find ...", closing), so synthesized
+# audio is kept by content hash: a bounded in-memory LRU in front of a disk
+# directory that is trimmed oldest-first once it outgrows its size limit.
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "incident-tts-cache"))
+MEMORY_MAX_BYTES = 32 * 2 ** 20
+DISK_MAX_BYTES = 512 * 2 ** 20
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def audio_key(text, voice, model):
+    return hashlib.sha256(f"{model}\0{voice}\0{text}".encode()).hexdigest()
+
+
+class CachedAudio:
+    """Synthesized audio with its cache key, which also names it on disk and in URLs"""
+
+    __slots__ = ("key", "data")
+
+    def __init__(self, key, data):
+        self.key = key
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class TTSCache:
+    def __init__(self, directory=TTS_CACHE_DIR, memory_max_bytes=MEMORY_MAX_BYTES, disk_max_bytes=DISK_MAX_BYTES):
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        # Disk size accounting and trimming; never held with self.lock.
+        self.disk_lock = threading.Lock()
+        # Concurrent misses for the same text share one synthesis.
+        self.in_flight = SingleFlight()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                        "memory_evictions": 0, "disk_evictions": 0}
+        self.disk_bytes = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    # --- Memory Tier ---
+    def _remember(self, audio):
+        if audio.key in self.memory:
+            self.memory.move_to_end(audio.key)
+            return
+        self.memory[audio.key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.memory_max_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.metrics["memory_evictions"] += 1
+
+    # --- Disk Tier ---
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        # mtime doubles as last-use time for disk eviction.
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+        return data
+
+    def _write_disk(self, key, data):
+        if not self.directory:
+            return
+        path = self.path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+        except OSError:
+            return
+        with self.disk_lock:
+            # Rewriting a cached phrase replaces its file rather than adding one.
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                return
+            if self.disk_bytes is None:
+                self.disk_bytes = self._scan_disk_bytes()
+            else:
+                self.disk_bytes += len(data) - replaced
+            if self.disk_bytes > self.disk_max_bytes:
+                self._trim_disk()
+
+    def _scan_disk_bytes(self):
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".mp3"):
+                    total += entry.stat().st_size
+        return total
+
+    def _trim_disk(self):
+        """Delete least recently used files until the directory is under 90% of its limit"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        evicted = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        self.disk_bytes = total
+        with self.lock:
+            self.metrics["disk_evictions"] += evicted
+
+    # --- Lookup ---
+    def get(self, text, voice, model):
+        return self.lookup(audio_key(text, voice, model))
+
+    def lookup(self, key, record=True):
+        """Audio by cache key; record=False keeps serving reads out of the hit/miss metrics"""
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.metrics["memory_hits"] += record
+                return audio
+        data = self._read_disk(key)
+        if data is None:
+            return None
+        audio = CachedAudio(key, data)
+        with self.lock:
+            self.metrics["disk_hits"] += record
+            self._remember(audio)
+        return audio
+
+    def put(self, text, voice, model, data):
+        """Cache audio; it is served from memory at once, and the disk copy is written outside the lock"""
+        audio = CachedAudio(audio_key(text, voice, model), data)
+        with self.lock:
+            self._remember(audio)
+        self._write_disk(audio.key, data)
+        return audio
+
+    def get_or_synthesize(self, text, voice, model, synthesize):
+        """
+        Cached audio for text, calling ``synthesize(text)`` for the bytes on a
+        miss. Callers missing on the same text at once share one call.
+        """
+        audio = self.get(text, voice, model)
+        if audio is not None:
+            return audio
+        key = audio_key(text, voice, model)
+
+        def synthesize_once():
+            # The previous synthesis of this text may have finished since the lookup above.
+            with self.lock:
+                audio = self.memory.get(key)
+                if audio is None:
+                    self.metrics["misses"] += 1
+            return audio or self.put(text, voice, model, synthesize(text))
+        return self.in_flight.do(key, synthesize_once)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.metrics)
+            stats.update(memory_entries=len(self.memory), memory_bytes=self.memory_bytes,
+                         disk_bytes=self.disk_bytes, coalesced=self.in_flight.coalesced)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def get_tts_cache():
+    """Process-wide TTS cache, created on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache()
+    return _cache
@@ -0,0 +1,133 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Chunking ---
+# The first chunk is kept short so playback can start as soon as the model has
+# produced one sentence; later chunks are merged up to a size that keeps the
+# number of TTS requests down without delaying the next one much.
+SENTENCE_END = re.compile(r"(?<=[.!?;:])[\"')\]]*\s+|\n+")
+FIRST_CHUNK_MIN_CHARS = 20
+CHUNK_MIN_CHARS = 80
+CHUNK_MAX_CHARS = 400
+TTS_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide TTS worker pool, shared by every session"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+    return _executor
+
+
+class SentenceChunker:
+    """Incrementally split streamed text into speakable chunks at sentence boundaries"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+
+    def feed(self, text):
+        self.buffer += text
+        chunks = []
+        while True:
+            cut = self._cut(FIRST_CHUNK_MIN_CHARS if self.emitted == 0 else CHUNK_MIN_CHARS)
+            if cut is None:
+                break
+            chunk, self.buffer = self.buffer[:cut].strip(), self.buffer[cut:]
+            if chunk:
+                chunks.append(chunk)
+                self.emitted += 1
+        return chunks
+
+    def _cut(self, minimum):
+        """End of the next chunk: the first sentence end past minimum, or a word break once the buffer is too long"""
+        cut = None
+        for match in SENTENCE_END.finditer(self.buffer):
+            if match.end() > CHUNK_MAX_CHARS and cut is not None:
+                return cut
+            cut = match.end()
+            if cut >= minimum:
+                return cut
+        if len(self.buffer) >= CHUNK_MAX_CHARS:
+            if cut is not None:
+                return cut
+            space = self.buffer.rfind(" ", 0, CHUNK_MAX_CHARS)
+            return space + 1 if space > 0 else CHUNK_MAX_CHARS
+        return None
+
+    def flush(self):
+        chunk, self.buffer = self.buffer.strip(), ""
+        if chunk:
+            self.emitted += 1
+            return [chunk]
+        return []
+
+
+class TTSPipeline:
+    """
+    Synthesize a reply chunk by chunk on the shared worker pool while it is
+    still being generated. Chunks are submitted as soon as they are complete;
+    audio comes back strictly in order. ``synthesize(text)`` returns audio
+    bytes; a chunk that fails to synthesize is skipped.
+    """
+
+    def __init__(self, synthesize, executor=None):
+        self.synthesize = synthesize
+        self.executor = executor or get_executor()
+        self.chunker = SentenceChunker()
+        self.pending = deque()
+        self.started = time.perf_counter()
+        self.first_audio_ms = None
+        self.errors = []
+
+    def _submit(self, chunks):
+        for chunk in chunks:
+            self.pending.append((chunk, self.executor.submit(self.synthesize, chunk)))
+
+    def feed(self, text):
+        self._submit(self.chunker.feed(text))
+
+    def close(self):
+        self._submit(self.chunker.flush())
+
+    def _take(self):
+        chunk, future = self.pending.popleft()
+        try:
+            audio = future.result()
+        except Exception as e:
+            self.errors.append(e)
+            return None
+        if self.first_audio_ms is None:
+            self.first_audio_ms = (time.perf_counter() - self.started) * 1000
+        return chunk, audio
+
+    def ready(self):
+        """Chunks whose audio is done, in order, without blocking on later ones"""
+        while self.pending and self.pending[0][1].done():
+            item = self._take()
+            if item is not None:
+                yield item
+
+    def audio(self):
+        """All remaining chunks in order, waiting for each; call after close()"""
+        while self.pending:
+            item = self._take()
+            if item is not None:
+                yield item
+
+
+def speak_text(text, synthesize, executor=None):
+    """Start synthesizing an already complete reply in parallel chunks; read them back with .audio()"""
+    pipeline = TTSPipeline(synthesize, executor)
+    pipeline.feed(text)
+    pipeline.close()
+    return pipeline
@@ -0,0 +1,163 @@
+import numpy as np
+
+# --- Detection Policy ---
+# Energy/zero-crossing voice activity detection on 30 ms frames. A frame is
+# speech when its RMS clears the noise floor by ENERGY_RATIO (and an absolute
+# minimum); very "hissy" frames (high zero-crossing rate) need twice that.
+# Short blips are ignored, short pauses are bridged, and a little audio is
+# kept either side of each utterance so word edges are not clipped.
+FRAME_MS = 30
+ENERGY_RATIO = 3.0
+MIN_RMS = 200.0
+HISS_ZCR = 0.35
+MIN_SPEECH_MS = 150
+HANGOVER_MS = 450
+PAD_MS = 150
+CALIBRATION_MS = 300
+
+
+def to_mono(samples, channels=1):
+    """Interleaved int16 samples as a mono float32 array"""
+    samples = np.asarray(samples)
+    if channels > 1:
+        usable = len(samples) - len(samples) % channels
+        return samples[:usable].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return samples.astype(np.float32)
+
+
+def frame_features(mono, frame_length):
+    """Per-frame RMS and zero-crossing rate, computed for all whole frames at once"""
+    count = len(mono) // frame_length
+    frames = mono[:count * frame_length].reshape(count, frame_length)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1) if frame_length > 1 else np.zeros(count)
+    return rms, zcr
+
+
+def speech_frames(rms, zcr, noise_floor):
+    threshold = max(noise_floor * ENERGY_RATIO, MIN_RMS)
+    return (rms > threshold) & ((zcr < HISS_ZCR) | (rms > threshold * 2))
+
+
+def _runs(mask):
+    """(start, end) frame index pairs of the True runs in mask"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+def speech_segments(samples, sample_rate, channels=1):
+    """
+    (start, end) sample offsets, in mono samples, of each utterance in a
+    recording. The noise floor is the quiet end of the recording itself.
+    """
+    mono = to_mono(samples, channels)
+    frame_length = sample_rate * FRAME_MS // 1000
+    rms, zcr = frame_features(mono, frame_length)
+    if not len(rms):
+        return []
+    mask = speech_frames(rms, zcr, np.percentile(rms, 10))
+    min_speech = MIN_SPEECH_MS // FRAME_MS
+    hangover = HANGOVER_MS // FRAME_MS
+    pad = PAD_MS // FRAME_MS
+    segments = []
+    for start, end in _runs(mask):
+        if segments and start - segments[-1][1] <= hangover:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+    return [
+        (max(start - pad, 0) * frame_length, min(end + pad, len(rms)) * frame_length)
+        for start, end in segments if end - start >= min_speech
+    ]
+
+
+def trim_to_speech(samples, sample_rate, channels=1):
+    """Only the utterances in a recording, back to back, as mono int16 (empty if no speech)"""
+    mono = to_mono(samples, channels)
+    parts = [mono[start:end] for start, end in speech_segments(mono, sample_rate)]
+    if not parts:
+        return np.zeros(0, dtype=np.int16)
+    return np.concatenate(parts).astype(np.int16)
+
+
+class UtteranceDetector:
+    """
+    Streaming counterpart of speech_segments for live capture: feed raw mono
+    int16 chunks as they arrive and get each utterance back as soon as
+    HANGOVER_MS of silence follows it. The noise floor is calibrated on the
+    first CALIBRATION_MS and then tracks the non-speech frames.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * FRAME_MS // 1000
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.noise_floor = None
+        self.calibration = []
+        self.preroll = []
+        self.speech = []
+        self.speech_run = 0
+        self.silence_run = 0
+        self.in_speech = False
+        self.frames_seen = 0
+
+    @property
+    def speaking(self):
+        return self.in_speech
+
+    def feed(self, chunk):
+        """Returns the utterances completed by this chunk, as mono int16 arrays"""
+        self.pending = np.concatenate((self.pending, np.asarray(chunk, dtype=np.float32)))
+        count = len(self.pending) // self.frame_length
+        if not count:
+            return []
+        frames = self.pending[:count * self.frame_length].reshape(count, self.frame_length)
+        self.pending = self.pending[count * self.frame_length:]
+        rms, zcr = frame_features(frames.reshape(-1), self.frame_length)
+        done = []
+        for frame, frame_rms, frame_zcr in zip(frames, rms, zcr):
+            utterance = self._step(frame, frame_rms, frame_zcr)
+            if utterance is not None:
+                done.append(utterance)
+        return done
+
+    def _step(self, frame, rms, zcr):
+        self.frames_seen += 1
+        if self.noise_floor is None:
+            self.calibration.append(rms)
+            if len(self.calibration) * FRAME_MS >= CALIBRATION_MS:
+                self.noise_floor = float(np.median(self.calibration))
+            return None
+        is_speech = bool(speech_frames(np.array([rms]), np.array([zcr]), self.noise_floor)[0])
+        if not is_speech and not self.in_speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        pad = PAD_MS // FRAME_MS
+        if not self.in_speech:
+            self.preroll = (self.preroll + [frame])[-(pad + MIN_SPEECH_MS // FRAME_MS):]
+            self.speech_run = self.speech_run + 1 if is_speech else 0
+            if self.speech_run >= MIN_SPEECH_MS // FRAME_MS:
+                self.in_speech = True
+                self.speech = list(self.preroll)
+                self.silence_run = 0
+            return None
+        self.speech.append(frame)
+        self.silence_run = 0 if is_speech else self.silence_run + 1
+        if self.silence_run * FRAME_MS < HANGOVER_MS:
+            return None
+        # Keep PAD_MS of the trailing silence, drop the rest of the hangover.
+        keep = len(self.speech) - self.silence_run + pad
+        utterance = np.concatenate(self.speech[:keep]).astype(np.int16)
+        self.in_speech = False
+        self.speech = []
+        self.preroll = []
+        self.speech_run = 0
+        return utterance
+
+    def flush(self):
+        """Whatever utterance is still open (e.g. when capture stops mid-sentence)"""
+        if not self.in_speech or not self.speech:
+            return None
+        utterance = np.concatenate(self.speech).astype(np.int16)
+        self.in_speech = False
+        self.speech = []
+        return utterance